@@ -0,0 +1,154 @@
+# Per-host request timeouts that follow the latency each host has actually shown
+import math
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from config import TIMEOUT_SETTINGS
+
+MIN_SAMPLES = 5  # Responses needed before a host's own latency takes over
+MIN_TIMEOUT = 0.5
+MAX_TIMEOUT = 10.0
+MIN_CONNECT_TIMEOUT = 0.5
+MAX_CONNECT_TIMEOUT = 5.0
+EWMA_ALPHA = 0.2
+TIMEOUT_BACKOFF = 1.5  # Read timeout growth per consecutive timeout of a host
+MAX_HOSTS = 1000  # Least recently used hosts are forgotten past this
+
+# Percentile sketch: log-spaced buckets from 10 ms, 25% apart, up to ~9 minutes
+SKETCH_BASE = 0.01
+SKETCH_GROWTH = 1.25
+SKETCH_BUCKETS = 50
+SKETCH_DECAY_AT = 512  # Counts are halved past this many samples so old latency fades
+
+
+def _bucket(seconds):
+    if seconds <= SKETCH_BASE:
+        return 0
+    return min(SKETCH_BUCKETS - 1, int(math.log(seconds / SKETCH_BASE, SKETCH_GROWTH)))
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+class HostLatency:
+    """Latency history of one host: an EWMA plus a log-bucket percentile sketch.
+
+    Fixed size per host; percentiles are accurate to one bucket (25%).
+    """
+
+    __slots__ = ('ewma', 'counts', 'total', 'samples', 'consecutive_timeouts')
+
+    def __init__(self):
+        self.ewma = None
+        self.counts = [0] * SKETCH_BUCKETS
+        self.total = 0
+        self.samples = 0
+        self.consecutive_timeouts = 0
+
+    def observe(self, seconds):
+        self.ewma = seconds if self.ewma is None else self.ewma + EWMA_ALPHA * (seconds - self.ewma)
+        self.counts[_bucket(seconds)] += 1
+        self.total += 1
+        self.samples += 1
+        if self.total >= SKETCH_DECAY_AT:
+            self.counts = [count >> 1 for count in self.counts]
+            self.total = sum(self.counts)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (0-100)"""
+        rank = q / 100.0 * self.total
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if count and cumulative >= rank:
+                return SKETCH_BASE * SKETCH_GROWTH ** (i + 1)
+        return 0.0
+
+    def timeouts(self, baseline):
+        """(connect, read) timeouts for the next request to this host"""
+        if self.samples < MIN_SAMPLES:
+            read = baseline
+            connect = baseline
+        else:
+            # Room for the slow tail, and for a latency shift the sketch has not caught up with
+            read = max(self.percentile(99) * 1.5, self.ewma * 3)
+            connect = self.percentile(50) * 2
+        read = _clamp(read * TIMEOUT_BACKOFF ** self.consecutive_timeouts, MIN_TIMEOUT, MAX_TIMEOUT)
+        connect = _clamp(connect, MIN_CONNECT_TIMEOUT, min(read, MAX_CONNECT_TIMEOUT))
+        return connect, read
+
+
+class TimeoutPolicy:
+    """Thread-safe per-host latency tracking shared by all crawl jobs"""
+
+    def __init__(self, baselines=None, max_hosts=MAX_HOSTS):
+        # Starting timeouts per request kind, used until a host has history
+        self.baselines = dict(TIMEOUT_SETTINGS, **(baselines or {}))
+        self.max_hosts = max_hosts
+        self._hosts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _host(self, url):
+        """HostLatency of url's host; caller holds the lock"""
+        host = urlparse(url).netloc
+        latency = self._hosts.get(host)
+        if latency is None:
+            latency = self._hosts[host] = HostLatency()
+            if len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+        else:
+            self._hosts.move_to_end(host)
+        return latency
+
+    def timeout_for(self, url, kind='deep_crawl'):
+        """(connect, read) timeout tuple for a request of the given kind, as requests accepts it"""
+        baseline = self.baselines.get(kind, self.baselines['deep_crawl'])
+        with self._lock:
+            return self._host(url).timeouts(baseline)
+
+    def observe(self, url, seconds):
+        """Record the duration of a request that got a response"""
+        with self._lock:
+            latency = self._host(url)
+            latency.observe(seconds)
+            latency.consecutive_timeouts = 0
+
+    def observe_timeout(self, url, timeout):
+        """Record a timed-out request; the limit it hit counts as a (censored) sample"""
+        if isinstance(timeout, tuple):
+            timeout = timeout[-1]
+        with self._lock:
+            latency = self._host(url)
+            if timeout:
+                latency.observe(timeout)
+            latency.consecutive_timeouts += 1
+
+    def snapshot(self, url):
+        """JSON-friendly latency summary of url's host"""
+        with self._lock:
+            latency = self._host(url)
+            connect, read = latency.timeouts(self.baselines['deep_crawl'])
+            return {
+                'samples': latency.samples,
+                'ewma': round(latency.ewma or 0.0, 4),
+                'p50': round(latency.percentile(50), 4),
+                'p99': round(latency.percentile(99), 4),
+                'consecutive_timeouts': latency.consecutive_timeouts,
+                'connect_timeout': round(connect, 3),
+                'read_timeout': round(read, 3),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._hosts.clear()
+
+
+# Latency history outlives single jobs, so repeat crawls of a site start adapted
+TIMEOUT_POLICY = TimeoutPolicy()
+
+
+def configure_timeouts(settings):
+    """Replace the starting timeouts per request kind, e.g. from TIMEOUT_SETTINGS"""
+    TIMEOUT_POLICY.baselines.update(settings)
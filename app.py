@@ -1,32 +1,56 @@
-from flask import Flask, render_template, request, jsonify, send_file
-from enhanced_crawler import EnhancedCrawler
-from sitemap_generator import SitemapGenerator
-from production_optimizations import setup_memory_cleanup, rate_limit, PRODUCTION_CONFIG
+from flask import Blueprint, Flask, render_template, request, jsonify, send_file, Response
+from metrics import GLOBAL_STATS, render_prometheus
+from seen_set import make_seen_set, DEFAULT_ERROR_RATE
+from duplicates import EXCLUDED_STATUSES
+from result_cache import ResultCache, cache_key, estimate_result_size
+from exports import csv_chunks, gzip_chunks, export_crawl, CachedExport, EXPORT_DIR, EXPORT_FORMATS, GRAPH_FORMATS, GZIP_MIN_BYTES
+from config import PRODUCTION_CONFIG
+from production_optimizations import rate_limit
+from batch import BatchScheduler
+from contextlib import nullcontext
 import threading
 import logging
 import os
+import hmac
+import json
+import adaptive_timeouts
 import uuid
+import shutil
 import time
 from threading import Lock
-import atexit
 import gc
 
-app = Flask(__name__)
+# The crawlers (requests, bs4, urllib3), distributed mode, profiling and the
+# HTTP pool are imported where first used, so a cold start only pays for Flask.
+# Background services start from create_app(), not as an import side effect.
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize production optimizations
-setup_memory_cleanup()
+bp = Blueprint('sitemap', __name__)
 
-# Production configuration for Render.com free tier
-app.config.update(PRODUCTION_CONFIG)
+# Admin-only features (per-job profiling) are disabled unless a token is set
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+def is_admin_request():
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
 
 # Thread-safe dictionary to store crawling sessions
 crawling_sessions = {}
 sessions_lock = Lock()
 
+# Identical crawl requests share one session (see result_cache.py)
+RESULT_CACHE = ResultCache(ttl=PRODUCTION_CONFIG["MEMORY_SETTINGS"]["result_cache_ttl"],
+                           max_bytes=PRODUCTION_CONFIG["MEMORY_SETTINGS"]["result_cache_max_mb"] * 1024 * 1024)
+
+# Batch requests run their sites on one shared pool (see batch.py)
+BATCH_SCHEDULER = BatchScheduler(max_sites=PRODUCTION_CONFIG["CRAWLING_LIMITS"]["batch_concurrency"],
+                                 per_host=PRODUCTION_CONFIG["CRAWLING_LIMITS"]["batch_per_host"],
+                                 directory=os.path.join(EXPORT_DIR, 'batch'),
+                                 crawler_options={'spill_threshold': PRODUCTION_CONFIG["MEMORY_SETTINGS"]["spill_threshold"]})
+
 def cleanup_expired_sessions():
-    """Clean up sessions older than 10 minutes that are not actively crawling"""
+    """Clean up sessions older than 10 minutes that are not actively crawling; returns how many went"""
     current_time = time.time()
     expired_sessions = []
     
@@ -34,34 +58,90 @@ def cleanup_expired_sessions():
         for session_id, session_data in crawling_sessions.items():
             # Keep sessions active for 20 minutes (1200 seconds) to handle slow sites
             if current_time - session_data.get('last_access', session_data['start_time']) > 1200:
-                if session_data.get('completed', False):
+                # Cached results outlive idle sessions until the cache drops them
+                if session_data.get('completed', False) and not RESULT_CACHE.holds(session_id):
                     expired_sessions.append(session_id)
         
         for session_id in expired_sessions:
-            del crawling_sessions[session_id]
+            release_session(session_id)
             logger.info(f"Cleaned up expired session: {session_id}")
+    return len(expired_sessions)
+
+def release_session(session_id):
+    """Drop a session with its crawler, exports and profile; caller holds sessions_lock"""
+    session_data = crawling_sessions.pop(session_id, None)
+    if session_data is None:
+        return
+    profiler = session_data.get('profiler')
+    if profiler:
+        profiler.cleanup()
+    shutil.rmtree(os.path.join(EXPORT_DIR, session_id), ignore_errors=True)
+    session_data['crawler'].close()
+
+_cleanup_thread = None
+_cleanup_lock = Lock()
+_app_lock = Lock()
 
-# Start cleanup thread
-def start_cleanup_thread():
+def start_background_services(interval=None):
+    """Start the cleanup thread once per process: expire idle sessions and old batches.
+    
+    A full gc.collect() only runs after a crawl was released, when there is
+    garbage worth collecting, instead of on a fixed timer.
+    """
+    global _cleanup_thread
+    interval = interval or PRODUCTION_CONFIG["MEMORY_SETTINGS"]["cleanup_interval"]
+    
     def cleanup_loop():
         while True:
-            time.sleep(300)  # Run cleanup every 5 minutes to reduce overhead
-            cleanup_expired_sessions()
+            time.sleep(interval)
+            released = cleanup_expired_sessions()
+            for batch_id in BATCH_SCHEDULER.expire(1200):
+                logger.info(f"Cleaned up expired batch: {batch_id}")
+                released += 1
+            if released:
+                gc.collect()
     
-    cleanup_thread = threading.Thread(target=cleanup_loop)
-    cleanup_thread.daemon = True
-    cleanup_thread.start()
+    with _cleanup_lock:
+        if _cleanup_thread is None:
+            _cleanup_thread = threading.Thread(target=cleanup_loop, name='session-cleanup', daemon=True)
+            _cleanup_thread.start()
+    return _cleanup_thread
 
-start_cleanup_thread()
+def create_app(config=None, start_services=True):
+    """Build the Flask app; start_services=False skips the cleanup thread (tests, tooling)"""
+    app = Flask(__name__)
+    # Production configuration for Render.com free tier
+    app.config.update(PRODUCTION_CONFIG)
+    if config:
+        app.config.update(config)
+    adaptive_timeouts.configure_timeouts(app.config["TIMEOUT_SETTINGS"])
+    app.register_blueprint(bp)
+    if start_services:
+        start_background_services()
+    return app
 
-@app.route('/')
+def __getattr__(name):
+    # `app:app` (gunicorn, vercel) gets a default app built on first access
+    global app
+    if name == 'app':
+        with _app_lock:
+            if 'app' not in globals():
+                app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/crawl', methods=['POST'])
+@bp.route('/crawl', methods=['POST'])
 @rate_limit
 def crawl():
     try:
+        from enhanced_crawler import EnhancedCrawler
+        from distributed import DistributedCrawl, PARTITION_MODES
+        from incremental import load_snapshot, load_previous_sitemap, save_snapshot
+        from profiling import JobProfiler
         data = request.json
         if not data or 'url' not in data:
             return jsonify({"error": "URL is required"}), 400
@@ -70,22 +150,119 @@ def crawl():
         if not url:
             return jsonify({"error": "URL cannot be empty"}), 400
         
+        profile = bool(data.get('profile'))
+        if profile and not is_admin_request():
+            return jsonify({"error": "Profiling requires admin access"}), 403
+        
+        # Very large crawls can deduplicate URLs with a Bloom filter instead of an exact set
+        try:
+            seen_set = make_seen_set(data.get('dedup', 'exact'), float(data.get('dedup_error_rate', DEFAULT_ERROR_RATE)))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        if not seen_set.probabilistic:
+            seen_set = None  # The crawler's own exact store, which spills to disk
+        
+        limits = PRODUCTION_CONFIG["CRAWLING_LIMITS"]
+        try:
+            max_urls = int(data.get('max_urls', limits["max_urls"]))
+        except (TypeError, ValueError):
+            return jsonify({"error": "max_urls must be an integer"}), 400
+        if not 0 < max_urls <= limits["max_urls_limit"]:
+            return jsonify({"error": f"max_urls must be between 1 and {limits['max_urls_limit']}"}), 400
+        
+        # Distributed mode splits one job's frontier across several worker processes
+        try:
+            workers = int(data.get('workers', 1))
+        except (TypeError, ValueError):
+            return jsonify({"error": "workers must be an integer"}), 400
+        if not 1 <= workers <= limits["max_job_workers"]:
+            return jsonify({"error": f"workers must be between 1 and {limits['max_job_workers']}"}), 400
+        partition_by = data.get('partition_by', 'url')
+        if partition_by not in PARTITION_MODES:
+            return jsonify({"error": f"partition_by must be one of: {', '.join(PARTITION_MODES)}"}), 400
+        incremental = bool(data.get('incremental'))
+        if workers > 1 and incremental:
+            return jsonify({"error": "Incremental mode is not available with multiple workers"}), 400
+        previous_sitemap = data.get('previous_sitemap')
+        if previous_sitemap is not None and not (isinstance(previous_sitemap, str)
+                                                 and previous_sitemap.startswith(('http://', 'https://'))):
+            return jsonify({"error": "previous_sitemap must be an http(s) URL"}), 400
+        
+        # Optional deadline for the whole job, e.g. "best sitemap in 60 s"
+        time_budget = data.get('time_budget', limits["time_budget"])
+        if time_budget is not None:
+            try:
+                time_budget = float(time_budget)
+            except (TypeError, ValueError):
+                return jsonify({"error": "time_budget must be a number of seconds"}), 400
+            if not 0 < time_budget <= limits["max_time_budget"]:
+                return jsonify({"error": f"time_budget must be between 0 and {limits['max_time_budget']:g} seconds"}), 400
+        
+        # Which page linked to which (priorities, edges/csr exports); {"links": false} skips it
+        record_links = bool(data.get('links', workers == 1))
+        if workers > 1:
+            # Each worker process holds one partition and the job's dedup runs in the queue backend
+            if seen_set is not None:
+                return jsonify({"error": "Bloom dedup is not available with multiple workers"}), 400
+            if record_links:
+                return jsonify({"error": "The link graph is not recorded with multiple workers"}), 400
+        
         # Generate unique session ID for each request
         session_id = str(uuid.uuid4())
         
-        # Thread-safe session initialization
+        # Requests with the same start URL and options share one job: a running
+        # crawl is joined, a recent result is served again
+        key = None
+        if data.get('cache', True) and not profile and not incremental:
+            key = cache_key(url, {'dedup': data.get('dedup', 'exact'), 'dedup_error_rate': float(data.get('dedup_error_rate', DEFAULT_ERROR_RATE)),
+                                  'max_urls': max_urls, 'workers': workers, 'partition_by': partition_by,
+                                  'time_budget': time_budget, 'links': record_links})
+        
+        # Claiming the key and registering its session happen under one lock, so a
+        # concurrent identical request either joins this session or claims first
         with sessions_lock:
+            if key is not None:
+                shared_id = RESULT_CACHE.claim(key, session_id)
+                shared = crawling_sessions.get(shared_id) if shared_id != session_id else None
+                if shared:
+                    shared['last_access'] = time.time()
+                    GLOBAL_STATS.record_cache('result', True)
+                    return jsonify({"message": "Cached result" if shared['completed'] else "Joined running crawl",
+                                    "url": url, "session_id": shared_id, "profile": False, "shared": True})
+                if shared_id != session_id:
+                    # The session behind the entry is gone; start over
+                    RESULT_CACHE.discard(key, shared_id)
+                    RESULT_CACHE.claim(key, session_id)
+                GLOBAL_STATS.record_cache('result', False)
+            try:
+                if workers > 1:
+                    crawler = DistributedCrawl(url, workers=workers, partition_by=partition_by, max_urls=max_urls,
+                                               time_budget=time_budget,
+                                               spill_threshold=PRODUCTION_CONFIG["MEMORY_SETTINGS"]["spill_threshold"])
+                else:
+                    crawler = EnhancedCrawler(url, seen_set=seen_set, max_urls=max_urls,
+                                              spill_threshold=PRODUCTION_CONFIG["MEMORY_SETTINGS"]["spill_threshold"],
+                                              time_budget=time_budget, record_links=record_links)
+                profiler = JobProfiler(session_id, thread_prefix=crawler.thread_prefix) if profile else None
+            except Exception:
+                # Nothing will ever finish the claimed key
+                if key is not None:
+                    RESULT_CACHE.discard(key, session_id)
+                raise
             crawling_sessions[session_id] = {
-                'crawler': EnhancedCrawler(url),
-                'sitemap_generator': SitemapGenerator(),
+                'crawler': crawler,
                 'completed': False,
                 'error': None,
                 'start_time': time.time(),
                 'last_access': time.time(),
-                'url': url
+                'url': url,
+                'profiler': profiler,
+                'profile_ready': False,
+                'cache_key': key
             }
 
         def crawl_and_generate():
+            cached = False
             try:
                 with sessions_lock:
                     if session_id not in crawling_sessions:
@@ -94,18 +271,50 @@ def crawl():
                     
                     session_data = crawling_sessions[session_id]
                     crawler = session_data['crawler']
-                    sitemap_gen = session_data['sitemap_generator']
+                
+                # Incremental mode reuses the previous crawl of this domain (or a given sitemap)
+                if incremental:
+                    previous_pages = load_snapshot(crawler.domain)
+                    if previous_sitemap:
+                        for page_url, page in load_previous_sitemap(previous_sitemap, crawler.session).items():
+                            previous_pages.setdefault(page_url, page)
+                    crawler.previous_pages = previous_pages
                 
                 logger.info(f"Starting crawl for {url} (session: {session_id})")
-                crawler.crawl()
+                with profiler.block('crawl') if profiler else nullcontext():
+                    crawler.crawl()
                 logger.info(f"Crawl completed for {url}. Found {len(crawler.visited)} URLs")
+                if crawler.visited:
+                    # Next incremental crawl of this domain starts from here
+                    save_snapshot(crawler)
+                
+                exports = None
+                csv_export = None
+                if crawler.visited:
+                    # One sorted pass writes the XML, text, JSONL, columnar and CSV exports
+                    try:
+                        with profiler.block('generate') if profiler else nullcontext():
+                            exports = export_crawl(crawler, os.path.join(EXPORT_DIR, session_id), stats=crawler.stats)
+                            shutil.copyfile(exports['xml'], 'sitemap.xml')  # Served by /download
+                            with open(exports['csv'], 'rb') as f:
+                                csv_export = CachedExport(f.read())
+                    except Exception as e:
+                        logger.error(f"Error exporting crawl results: {str(e)}")
+                result_size = estimate_result_size(crawler, len(csv_export.data)) if key and csv_export else 0
                 
                 with sessions_lock:
                     if session_id in crawling_sessions:
                         if crawler.visited:
-                            success = sitemap_gen.generate(crawler.visited)
-                            if success:
+                            if exports and csv_export:
+                                crawling_sessions[session_id]['exports'] = exports
+                                crawling_sessions[session_id]['csv_export'] = csv_export
                                 logger.info("Sitemap generated successfully")
+                                if key:
+                                    # Results the cache dropped to make room are not served again
+                                    for evicted_id in RESULT_CACHE.finish(key, session_id, result_size):
+                                        release_session(evicted_id)
+                                        logger.info(f"Released session {evicted_id} evicted from the result cache")
+                                    cached = True
                             else:
                                 crawling_sessions[session_id]['error'] = "Failed to generate sitemap"
                         else:
@@ -141,18 +350,38 @@ def crawl():
                     if session_id in crawling_sessions:
                         crawling_sessions[session_id]['error'] = str(e)
                         crawling_sessions[session_id]['completed'] = True
+            finally:
+                if key and not cached:
+                    # Failed crawls are not reused; the next request starts a new one
+                    RESULT_CACHE.discard(key, session_id)
+                if profiler:
+                    try:
+                        profiler.save()
+                        with sessions_lock:
+                            if session_id in crawling_sessions:
+                                crawling_sessions[session_id]['profile_ready'] = True
+                    except Exception as e:
+                        logger.error(f"Error saving profile for session {session_id}: {str(e)}")
 
         thread = threading.Thread(target=crawl_and_generate)
         thread.daemon = True
-        thread.start()
+        try:
+            thread.start()
+        except Exception:
+            with sessions_lock:
+                crawling_sessions.pop(session_id, None)
+            if key is not None:
+                RESULT_CACHE.discard(key, session_id)
+            crawler.close()
+            raise
 
-        return jsonify({"message": "Crawling started", "url": url, "session_id": session_id})
+        return jsonify({"message": "Crawling started", "url": url, "session_id": session_id, "profile": profile})
         
     except Exception as e:
         logger.error(f"Error starting crawl: {str(e)}")
         return jsonify({"error": "Failed to start crawling"}), 500
 
-@app.route('/progress/<session_id>')
+@bp.route('/progress/<session_id>')
 def progress(session_id):
     with sessions_lock:
         if session_id not in crawling_sessions:
@@ -177,18 +406,173 @@ def progress(session_id):
         else:
             percentage = (len(crawler.visited) / crawler.total_urls * 100) if crawler.total_urls > 0 else 0
         
+        # Fetch workers add URLs concurrently; copy under the crawler lock
+        with crawler.lock:
+            visited_urls = list(crawler.visited)
+        
         return jsonify({
-            "crawled_urls": len(crawler.visited),
+            "crawled_urls": len(visited_urls),
             "total_urls": crawler.total_urls,
-            "visited_urls": list(crawler.visited),
+            "visited_urls": visited_urls,
             "completed": session_data['completed'],
             "percentage": round(percentage, 2),
             "error": session_data['error'],
             "error_details": session_data.get('error_details', ''),
-            "url": session_data['url']
+            "url": session_data['url'],
+            "phase_timings": crawler.phase_timings,
+            "first_result_time": crawler.first_result_time,
+            "unchanged_urls": crawler.unchanged,
+            "budget": crawler.budget_report(),
+            "workers": crawler.worker_progress() if hasattr(crawler, 'worker_progress') else None
         })
 
-@app.route('/download')
+@bp.route('/metrics')
+def metrics():
+    """Process-wide crawl metrics in Prometheus text format"""
+    with sessions_lock:
+        crawlers = [session_data['crawler'] for session_data in crawling_sessions.values()]
+        active = sum(1 for session_data in crawling_sessions.values() if not session_data['completed'])
+    
+    import http_pool
+    pool = http_pool.SHARED_POOL.snapshot()
+    results = RESULT_CACHE.snapshot()
+    gauges = {
+        'sitemap_sessions': ("Crawl sessions held in memory", len(crawlers)),
+        'sitemap_active_sessions': ("Crawl sessions still running", active),
+        'sitemap_frontier_depth': ("URLs queued across all sessions", sum(c.stats.queue_depth for c in crawlers)),
+        'sitemap_http_pools': ("Per-host connection pools held by the shared HTTP pool", pool['pools']),
+        'sitemap_http_idle_connections': ("Idle keep-alive connections ready for reuse", pool['idle_connections']),
+        'sitemap_result_cache_entries': ("Crawl results shared through the result cache", results['entries']),
+        'sitemap_result_cache_bytes': ("Estimated memory of cached crawl results", results['bytes']),
+    }
+    return Response(render_prometheus(GLOBAL_STATS, gauges), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/stats/<session_id>')
+def stats(session_id):
+    with sessions_lock:
+        if session_id not in crawling_sessions:
+            return jsonify({"error": "Session not found"}), 404
+        session_data = crawling_sessions[session_id]
+        crawler = session_data['crawler']
+        completed = session_data['completed']
+    
+    data = crawler.stats.snapshot()
+    data.update({
+        "completed": completed,
+        "visited_urls": len(crawler.visited),
+        "phase_timings": crawler.phase_timings,
+        "first_result_time": crawler.first_result_time,
+        "budget": crawler.budget_report(),
+        "host_latency": adaptive_timeouts.TIMEOUT_POLICY.snapshot(crawler.start_url),
+        "link_graph": crawler.link_graph.snapshot() if getattr(crawler, 'link_graph', None) is not None else None
+    })
+    return jsonify(data)
+
+@bp.route('/profile/<session_id>')
+def download_profile(session_id):
+    """Download a profiled job's artifact: ?format=pstats (default), folded or alloc"""
+    if not is_admin_request():
+        return jsonify({"error": "Admin access required"}), 403
+    
+    with sessions_lock:
+        if session_id not in crawling_sessions:
+            return jsonify({"error": "Session not found"}), 404
+        session_data = crawling_sessions[session_id]
+        profiler = session_data.get('profiler')
+        ready = session_data.get('profile_ready', False)
+    
+    if not profiler:
+        return jsonify({"error": "Session was not profiled"}), 404
+    if not ready:
+        return jsonify({"error": "Profile not ready yet"}), 409
+    
+    fmt = request.args.get('format', 'pstats')
+    downloads = {
+        'pstats': ('application/octet-stream', f'{session_id}.pstats'),
+        'folded': ('text/plain', f'{session_id}.folded'),
+        'alloc': ('text/plain', f'{session_id}.alloc.txt'),
+    }
+    if fmt not in downloads or fmt not in profiler.artifacts:
+        return jsonify({"error": f"Unknown format, use one of: {', '.join(downloads)}"}), 400
+    
+    mimetype, download_name = downloads[fmt]
+    return send_file(profiler.artifacts[fmt], mimetype=mimetype, as_attachment=True, download_name=download_name)
+
+@bp.route('/batch', methods=['POST'])
+@rate_limit
+def start_batch():
+    """Crawl a list of start URLs on the shared batch pool; poll /batch/<id> or stream /batch/<id>/results"""
+    data = request.json
+    urls = data.get('urls') if isinstance(data, dict) else None
+    if not isinstance(urls, list) or not urls:
+        return jsonify({"error": "urls must be a non-empty list"}), 400
+    urls = [u.strip() for u in urls if isinstance(u, str) and u.strip()]
+    if not urls:
+        return jsonify({"error": "URL cannot be empty"}), 400
+    
+    limits = PRODUCTION_CONFIG["CRAWLING_LIMITS"]
+    if len(urls) > limits["max_batch_urls"]:
+        return jsonify({"error": f"A batch may contain at most {limits['max_batch_urls']} URLs"}), 400
+    try:
+        max_urls = int(data.get('max_urls', limits["max_urls"]))
+    except (TypeError, ValueError):
+        return jsonify({"error": "max_urls must be an integer"}), 400
+    if not 0 < max_urls <= limits["max_urls_limit"]:
+        return jsonify({"error": f"max_urls must be between 1 and {limits['max_urls_limit']}"}), 400
+    
+    # Applies to each site, not to the whole batch
+    time_budget = data.get('time_budget', limits["time_budget"])
+    if time_budget is not None:
+        try:
+            time_budget = float(time_budget)
+        except (TypeError, ValueError):
+            return jsonify({"error": "time_budget must be a number of seconds"}), 400
+        if not 0 < time_budget <= limits["max_time_budget"]:
+            return jsonify({"error": f"time_budget must be between 0 and {limits['max_time_budget']:g} seconds"}), 400
+    
+    batch = BATCH_SCHEDULER.submit(urls, {'max_urls': max_urls, 'time_budget': time_budget,
+                                          'record_links': bool(data.get('links', True))})
+    return jsonify({"message": "Batch started", "batch_id": batch.id, "total": len(urls)})
+
+@bp.route('/batch/<batch_id>')
+def batch_progress(batch_id):
+    """Combined progress of a batch: counts per state, URLs found so far, and every site"""
+    batch = BATCH_SCHEDULER.get(batch_id)
+    if batch is None:
+        return jsonify({"error": "Batch not found"}), 404
+    return jsonify(batch.progress())
+
+@bp.route('/batch/<batch_id>/results')
+def batch_results(batch_id):
+    """Stream one JSON line per site as it finishes (NDJSON), until the whole batch is done"""
+    batch = BATCH_SCHEDULER.get(batch_id)
+    if batch is None:
+        return jsonify({"error": "Batch not found"}), 404
+    
+    def lines():
+        for site in batch.results():
+            yield json.dumps(site, ensure_ascii=False) + '\n'
+    return Response(lines(), mimetype='application/x-ndjson', headers={'X-Accel-Buffering': 'no'})
+
+@bp.route('/batch/<batch_id>/<int:index>/<fmt>')
+def download_batch_export(batch_id, index, fmt):
+    """Download one export of one finished batch site, in the formats of /export"""
+    formats = {**EXPORT_FORMATS, **GRAPH_FORMATS}
+    if fmt not in formats:
+        return jsonify({"error": f"Unknown format, use one of: {', '.join(formats)}"}), 400
+    batch = BATCH_SCHEDULER.get(batch_id)
+    if batch is None or not 0 <= index < len(batch.sites):
+        return jsonify({"error": "Batch not found"}), 404
+    
+    exports = batch.paths.get(index)
+    if exports is None:
+        return jsonify({"error": "Exports not ready yet"}), 409
+    if fmt not in exports:
+        return jsonify({"error": "No export of this format for this site"}), 404
+    filename, mimetype, _writer = formats[fmt]
+    return send_file(os.path.abspath(exports[fmt]), mimetype=mimetype, as_attachment=True, download_name=filename)
+
+@bp.route('/download')
 def download():
     try:
         if os.path.exists('sitemap.xml'):
@@ -199,7 +583,35 @@ def download():
         logger.error(f"Error downloading sitemap: {str(e)}")
         return jsonify({"error": "Failed to download sitemap"}), 500
 
-@app.route('/download-csv/<session_id>')
+@bp.route('/export/<session_id>/<fmt>')
+def download_export(session_id, fmt):
+    """Download one export of a finished crawl: xml, txt, jsonl, columnar, csv, or the link graph as edges or csr"""
+    formats = {**EXPORT_FORMATS, **GRAPH_FORMATS}
+    if fmt not in formats:
+        return jsonify({"error": f"Unknown format, use one of: {', '.join(formats)}"}), 400
+    
+    with sessions_lock:
+        if session_id not in crawling_sessions:
+            return jsonify({"error": "Session not found"}), 404
+        session_data = crawling_sessions[session_id]
+        session_data['last_access'] = time.time()
+        exports = session_data.get('exports')
+    
+    if not exports:
+        return jsonify({"error": "Exports not ready yet"}), 409
+    if fmt not in exports:
+        return jsonify({"error": "No link graph was recorded for this crawl"}), 404
+    
+    filename, mimetype, _writer = formats[fmt]
+    return send_file(os.path.abspath(exports[fmt]), mimetype=mimetype, as_attachment=True, download_name=filename)
+
+def wants_gzip(size):
+    """Compress big exports when the client accepts gzip; ?gzip=1 forces it, ?gzip=0 disables it"""
+    if 'gzip' not in request.headers.get('Accept-Encoding', '') or request.args.get('gzip') == '0':
+        return False
+    return request.args.get('gzip') == '1' or size >= GZIP_MIN_BYTES
+
+@bp.route('/download-csv/<session_id>')
 def download_csv(session_id):
     try:
         with sessions_lock:
@@ -208,38 +620,43 @@ def download_csv(session_id):
                 
             session_data = crawling_sessions[session_id]
             crawler = session_data['crawler']
+            completed = session_data['completed']
+            cached = session_data.get('csv_export')
         
-        if crawler and crawler.url_data:
-            import csv
-            import io
-            
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow(['URL', 'Sayfa Başlığı'])
-            
-            for url in sorted(crawler.visited):
-                title = crawler.url_data.get(url, 'Başlık bulunamadı')
-                writer.writerow([url, title])
-            
-            csv_data = output.getvalue()
-            output.close()
-            
-            # Create a BytesIO object for the response
-            csv_bytes = io.BytesIO()
-            csv_bytes.write(csv_data.encode('utf-8'))
-            csv_bytes.seek(0)
-            
-            return send_file(
-                csv_bytes,
-                mimetype='text/csv',
-                as_attachment=True,
-                download_name='sitemap_urls.csv'
-            )
-        else:
+        if not (crawler and crawler.url_data):
             return jsonify({"error": "CSV data not found. Please generate a sitemap first."}), 404
+        
+        headers = {
+            'Content-Disposition': 'attachment; filename=sitemap_urls.csv',
+            'Vary': 'Accept-Encoding'
+        }
+        
+        if completed:
+            # Results no longer change: sort and serialize once, then serve the cached bytes
+            if cached is None:
+                with crawler.lock:
+                    urls = sorted(url for url in crawler.visited if crawler.status.get(url) not in EXCLUDED_STATUSES)
+                cached = CachedExport(b''.join(csv_chunks(urls, crawler.url_data)))
+                with sessions_lock:
+                    if session_id in crawling_sessions:
+                        cached = crawling_sessions[session_id].setdefault('csv_export', cached)
+            
+            if wants_gzip(len(cached.data)):
+                headers['Content-Encoding'] = 'gzip'
+                return Response(cached.gzip(), mimetype='text/csv', headers=headers)
+            return Response(cached.data, mimetype='text/csv', headers=headers)
+        
+        # Crawl still running: stream a snapshot without caching it
+        with crawler.lock:
+            urls = sorted(url for url in crawler.visited if crawler.status.get(url) not in EXCLUDED_STATUSES)
+        chunks = csv_chunks(urls, crawler.url_data)
+        if wants_gzip(len(urls) * 100):  # Roughly 100 bytes per row
+            headers['Content-Encoding'] = 'gzip'
+            chunks = gzip_chunks(chunks)
+        return Response(chunks, mimetype='text/csv', headers=headers)
     except Exception as e:
         logger.error(f"Error downloading CSV: {str(e)}")
         return jsonify({"error": "Failed to download CSV"}), 500
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
+    create_app().run(host='0.0.0.0', port=5000)
@@ -0,0 +1,204 @@
+# Batch crawls: many start URLs on one shared worker pool with global and per-host concurrency limits
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from exports import export_crawl
+
+logger = logging.getLogger(__name__)
+
+# Site states, in order
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class HostLimiter:
+    """Caps in-flight requests per host across every crawl that shares it.
+
+    Two batch entries for the same site (or two batches) then cannot
+    hammer one server with twice the connections. Idle hosts are forgotten.
+    """
+
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self._hosts = {}  # host -> [semaphore, users]
+        self._lock = threading.Lock()
+
+    def acquire(self, url, timeout=None):
+        """Wait for a slot on url's host; returns a release callable, or None on timeout"""
+        host = (urlsplit(url).hostname or '').lower()
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None:
+                entry = self._hosts[host] = [threading.BoundedSemaphore(self.per_host), 0]
+            entry[1] += 1
+        if entry[0].acquire(timeout=timeout):
+            return lambda: self._release(host, entry, True)
+        self._release(host, entry, False)
+        return None
+
+    def _release(self, host, entry, held):
+        if held:
+            entry[0].release()
+        with self._lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._hosts[host]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._hosts)
+
+
+def site_directory(index, url):
+    """Export directory name of one batch entry: position plus a readable host"""
+    host = re.sub(r'[^A-Za-z0-9.-]+', '_', urlsplit(url if '//' in url else '//' + url).netloc) or 'site'
+    return f"{index:04d}-{host}"
+
+
+class Batch:
+    """One submitted list of start URLs and what became of each"""
+
+    def __init__(self, batch_id, urls, options):
+        self.id = batch_id
+        self.options = options
+        self.created = time.time()
+        self.finished = None
+        self.sites = [{'index': i, 'url': url, 'state': QUEUED, 'urls': 0, 'seconds': None, 'error': None,
+                       'exports': []} for i, url in enumerate(urls)]
+        self.crawlers = {}  # index -> crawler while its site runs
+        self.paths = {}  # index -> {format: export path}
+        self.completed = []  # Site indexes in completion order
+        self.cond = threading.Condition()
+
+    def progress(self):
+        """Combined view: per-state counts, URLs found so far across all sites, and each site"""
+        with self.cond:
+            sites = [dict(site) for site in self.sites]
+            running = dict(self.crawlers)
+        for index, crawler in running.items():
+            sites[index]['urls'] = len(crawler.visited)
+        counts = {state: sum(1 for site in sites if site['state'] == state) for state in (QUEUED, RUNNING, DONE, FAILED)}
+        finished = counts[DONE] + counts[FAILED]
+        return {
+            'batch_id': self.id,
+            'total': len(sites),
+            **counts,
+            'completed': finished == len(sites),
+            'percentage': round(finished / len(sites) * 100, 2) if sites else 100.0,
+            'urls_found': sum(site['urls'] for site in sites),
+            'elapsed': round((self.finished or time.time()) - self.created, 3),
+            'sites': sites,
+        }
+
+    def results(self, timeout=None):
+        """Yield each site's result as it finishes, in completion order.
+
+        Blocks between sites; with a timeout, stops early when no site
+        finished for that long.
+        """
+        sent = 0
+        while True:
+            with self.cond:
+                while sent == len(self.completed) and len(self.completed) < len(self.sites):
+                    if not self.cond.wait(timeout):
+                        return
+                ready = [dict(self.sites[index]) for index in self.completed[sent:]]
+                sent = len(self.completed)
+                done = sent == len(self.sites)
+            yield from ready
+            if done:
+                return
+
+
+class BatchScheduler:
+    """Runs the sites of every batch on one pool of max_sites crawl threads.
+
+    max_sites bounds how many sites are crawled at once across all batches;
+    per_host bounds concurrent requests to any one host across all of them.
+    Each finished site is exported under directory/<batch id>/ and its
+    crawler closed, so a batch of hundreds of sites keeps only summaries.
+    """
+
+    def __init__(self, max_sites, per_host, directory, crawler_options=None):
+        self.max_sites = max_sites
+        self.directory = directory
+        self.crawler_options = crawler_options or {}
+        self.host_limiter = HostLimiter(per_host)
+        self.batches = {}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def submit(self, urls, options=None, formats=None):
+        """Queue a batch; options are EnhancedCrawler keyword arguments (max_urls, time_budget, ...)"""
+        batch = Batch(str(uuid.uuid4()), list(urls), dict(options or {}))
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_sites, thread_name_prefix='batch')
+            self.batches[batch.id] = batch
+            for index in range(len(batch.sites)):
+                self._pool.submit(self._run_site, batch, index, formats)
+        logger.info(f"Batch {batch.id}: {len(batch.sites)} sites queued")
+        return batch
+
+    def get(self, batch_id):
+        with self._lock:
+            return self.batches.get(batch_id)
+
+    def _run_site(self, batch, index, formats):
+        from enhanced_crawler import EnhancedCrawler  # Loaded with the first batch, not with the app
+        site = batch.sites[index]
+        start = time.time()
+        crawler = None
+        try:
+            crawler = EnhancedCrawler(site['url'], **{**self.crawler_options, **batch.options})
+            crawler.host_limiter = self.host_limiter
+            with batch.cond:
+                site['state'] = RUNNING
+                batch.crawlers[index] = crawler
+            crawler.crawl()
+            found = len(crawler.visited)
+            paths = {}
+            if found:
+                paths = export_crawl(crawler, os.path.join(self.directory, batch.id, site_directory(index, site['url'])),
+                                     formats=formats, stats=crawler.stats)
+                state, error = DONE, None
+            else:
+                state, error = FAILED, "Taranacak URL bulunamadı"
+        except Exception as e:
+            logger.error(f"Batch {batch.id}: crawling {site['url']} failed: {e}")
+            state, error, found, paths = FAILED, str(e), 0, {}
+        finally:
+            if crawler is not None:
+                crawler.close()
+        with batch.cond:
+            batch.crawlers.pop(index, None)
+            batch.paths[index] = paths
+            site.update(state=state, error=error, urls=found, seconds=round(time.time() - start, 3), exports=sorted(paths))
+            batch.completed.append(index)
+            if len(batch.completed) == len(batch.sites):
+                batch.finished = time.time()
+            batch.cond.notify_all()
+
+    def expire(self, max_age):
+        """Forget finished batches older than max_age seconds and delete their exports"""
+        now = time.time()
+        with self._lock:
+            expired = [batch_id for batch_id, batch in self.batches.items()
+                       if batch.finished is not None and now - batch.finished > max_age]
+            for batch_id in expired:
+                del self.batches[batch_id]
+        for batch_id in expired:
+            shutil.rmtree(os.path.join(self.directory, batch_id), ignore_errors=True)
+        return expired
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
@@ -0,0 +1,141 @@
+"""Connection reuse across crawl jobs: per-session pools vs the shared HTTP pool.
+
+Serves a small site over TLS on 127.0.0.1 (self-signed certificate made with
+the openssl CLI) and runs several short jobs one after another, each with a
+fresh requests.Session, as the web app does. Reports new TCP/TLS connections
+accepted by the server, wall time and the shared pool's hit rate.
+
+Usage:
+    python benchmarks/bench_connection_pool.py [--jobs 20] [--requests 30] [--output results.json]
+"""
+import argparse
+import json
+import os
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from http_pool import SharedConnectionPool, SharedPoolAdapter  # noqa: E402
+from metrics import CrawlStats  # noqa: E402
+
+BODY = b'<html><head><title>Pool</title></head><body>' + b'x' * 2000 + b'</body></html>'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class TLSServer(ThreadingHTTPServer):
+    """Local HTTPS stand-in counting accepted (i.e. newly handshaken) connections"""
+
+    daemon_threads = True
+
+    def __init__(self, certfile, keyfile):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        self.socket = context.wrap_socket(self.socket, server_side=True)
+        self.accepted = 0
+
+    def get_request(self):
+        request = super().get_request()
+        request[0].setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Headers and body are separate writes
+        self.accepted += 1
+        return request
+
+
+def make_certificate(directory):
+    certfile = os.path.join(directory, 'cert.pem')
+    keyfile = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-keyout', keyfile, '-out', certfile, '-subj', '/CN=127.0.0.1',
+         '-addext', 'subjectAltName=IP:127.0.0.1'],
+        check=True, capture_output=True,
+    )
+    return certfile, keyfile
+
+
+def run_jobs(server, certfile, jobs, requests_per_job, make_adapter):
+    url = f'https://127.0.0.1:{server.server_address[1]}/'
+    accepted = server.accepted
+    start = time.perf_counter()
+    for _ in range(jobs):
+        session = requests.Session()
+        adapter = make_adapter()
+        session.mount('https://', adapter)
+        for i in range(requests_per_job):
+            session.get(f'{url}page-{i}', verify=certfile, timeout=5).content
+        session.close()
+    seconds = time.perf_counter() - start
+    return {
+        'connections_opened': server.accepted - accepted,
+        'seconds': round(seconds, 3),
+        'requests_per_sec': round(jobs * requests_per_job / seconds, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=30, help='requests per job')
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        certfile, keyfile = make_certificate(directory)
+        server = TLSServer(certfile, keyfile)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            per_session = run_jobs(server, certfile, args.jobs, args.requests, HTTPAdapter)
+            stats = CrawlStats()
+            pool = SharedConnectionPool()
+            shared = run_jobs(server, certfile, args.jobs, args.requests,
+                              lambda: SharedPoolAdapter(stats=stats, pool=pool))
+            hits = stats.cache_hits['connection']
+            misses = stats.cache_misses['connection']
+            shared.update({'pool_hits': hits, 'pool_misses': misses,
+                           'pool_hit_rate': round(hits / max(1, hits + misses), 4)})
+            shared.update(pool.snapshot())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    results = {
+        'jobs': args.jobs,
+        'requests_per_job': args.requests,
+        'per_session_pool': per_session,
+        'shared_pool': shared,
+        # The shared pool must connect once in total, not once per job
+        'reused_across_jobs': shared['connections_opened'] == 1,
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""JS route extraction: the old per-pattern regexes vs the single-pass string-literal scanner.
+
+Usage:
+    python benchmarks/bench_js_routes.py [--bundles 20] [--bundle-kb 200] [--rounds 3] [--output results.json]
+
+Fixtures are generated minified bundles whose real routes are known, so
+precision and recall are measured alongside throughput. Throughput is given
+for extraction alone and for the crawler pipeline, which also resolves and
+validates every extracted match (urljoin + urlparse) as Crawler.parse_links does.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from urllib.parse import urljoin, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from js_routes import extract_json_routes, extract_routes  # noqa: E402
+
+DOMAIN = 'example.com'
+BASE_URL = f'https://{DOMAIN}/'
+WORDS = ['urun', 'kategori', 'blog', 'hakkimizda', 'iletisim', 'kampanya', 'sepet', 'hesap', 'yardim', 'marka']
+
+
+def extract_routes_regex(script_text, domain=DOMAIN):
+    """Crawler.parse_links script scanning as it was before the scanner"""
+    patterns = [
+        r'https?://[^\s"\'\)]+' + re.escape(domain) + r'[^\s"\'\)]*',
+        r'["\'](/[^"\']*)["\']',
+        r'href["\s]*:["\s]*["\']([^"\']*)["\']',
+        r'url["\s]*:["\s]*["\']([^"\']*)["\']',
+        r'link["\s]*:["\s]*["\']([^"\']*)["\']',
+    ]
+    found = []
+    for pattern in patterns:
+        found.extend(re.findall(pattern, script_text))
+    return found
+
+
+def resolve(matches):
+    """Crawler.parse_links per-match work: resolve against the page URL, keep same-site URLs"""
+    urls = set()
+    for match in matches:
+        url = urljoin(BASE_URL, match)
+        parsed = urlparse(url)
+        if parsed.netloc == DOMAIN and parsed.scheme in ('http', 'https'):
+            urls.add(url)
+    return urls
+
+
+def _ident(rng):
+    return rng.choice('abcdefghijklmnopqrstuvwxyz') + rng.choice(['', str(rng.randint(0, 99))])
+
+
+def _route(rng):
+    return '/' + '/'.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))) + rng.choice(['', f'/{rng.randint(1, 9999)}', '/'])
+
+
+def build_bundle(size, rng):
+    """Minified-looking bundle of about size characters; returns (source, set of real routes)"""
+    routes = set()
+    parts = []
+    length = 0
+    while length < size:
+        kind = rng.randrange(12)
+        a, b = _ident(rng), _ident(rng)
+        if kind == 0:
+            route = _route(rng)
+            routes.add(route)
+            chunk = f'{a}.push("{route}");'
+        elif kind == 1:
+            route = _route(rng)
+            routes.add(route)
+            chunk = f'{{path:"{route}",component:{b}}},'
+        elif kind == 2:
+            route = rng.choice(WORDS) + '.html'
+            routes.add(route)
+            chunk = f'{a}.href="{route}";'
+        elif kind == 3:
+            route = f'https://{DOMAIN}{_route(rng)}'
+            routes.add(route)
+            chunk = f'var {a}={{"url":"{route}","w":{rng.randint(1, 900)}}};'
+        elif kind == 4:
+            # Not routes: assets, MIME types, regex sources, templates, separators
+            chunk = rng.choice([
+                f'{a}("/static/js/{b}.{rng.randint(1000, 9999)}.chunk.js");',
+                f'{a}.type="text/{rng.choice(["css", "html", "plain"])}";',
+                f'{a}=/^\\/(?:{rng.choice(WORDS)})\\/["\']?$/i;',
+                f'{a}.replace(/\\//g,"/");',
+                f'{a}=`/{rng.choice(WORDS)}/${{{b}}}`;',
+                f'{a}.split(" / ");',
+                f'{a}="/{rng.choice(WORDS)}/[slug]";',
+                f'{a}.src="/img/{b}.{rng.choice(["png", "svg", "webp"])}";',
+            ])
+        elif kind == 5:
+            chunk = f'/*! {a} v{rng.randint(1, 9)}.{rng.randint(0, 20)} "/license" */'
+        elif kind == 6:
+            chunk = f'{a}={b}/{rng.randint(2, 9)}/{_ident(rng)};'
+        else:
+            chunk = (f'function {a}({b}){{return {b}&&{b}.{_ident(rng)}?'
+                     f'"{rng.choice(WORDS)} {rng.choice(WORDS)}":{b}[{rng.randint(0, 9)}]}}'
+                     f'var {_ident(rng)}={{{_ident(rng)}:"{rng.choice(WORDS)}",{_ident(rng)}:!0}};')
+        parts.append(chunk)
+        length += len(chunk)
+    return ''.join(parts), routes
+
+
+def build_next_data(rng, posts=200):
+    """__NEXT_DATA__ payload; returns (text, set of real routes)"""
+    routes = {f'/blog/{rng.choice(WORDS)}-{i}' for i in range(posts)}
+    data = {
+        'props': {'pageProps': {'posts': [{'title': f'Yazı {i}', 'href': route, 'image': f'/img/{i}.jpg'}
+                                          for i, route in enumerate(sorted(routes))]}},
+        'page': '/blog/[slug]',
+        'query': {},
+        'buildId': 'a1b2c3',
+    }
+    return json.dumps(data, separators=(',', ':')), routes
+
+
+def _score(found, expected):
+    found = set(found)  # The regex baseline repeats matches
+    hits = len(found & expected)
+    return hits, len(found)
+
+
+def measure(func, corpus, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for source in corpus:
+            func(source)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bundles', type=int, default=20)
+    parser.add_argument('--bundle-kb', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    fixtures = [build_bundle(args.bundle_kb * 1024, rng) for _ in range(args.bundles)]
+    corpus = [source for source, _ in fixtures]
+    total_bytes = sum(len(source) for source in corpus)
+
+    results = {'bundles': len(corpus), 'total_kb': total_bytes // 1024}
+    for name, func in (('regex', extract_routes_regex), ('scanner', extract_routes)):
+        hits = found = expected = 0
+        for source, routes in fixtures:
+            h, f = _score(func(source), routes)
+            hits, found, expected = hits + h, found + f, expected + len(routes)
+        seconds = measure(func, corpus, args.rounds)
+        pipeline_seconds = measure(lambda source: resolve(func(source)), corpus, args.rounds)
+        results[name] = {
+            'extract_mb_per_sec': round(total_bytes / seconds / 1e6, 2),
+            'pipeline_mb_per_sec': round(total_bytes / pipeline_seconds / 1e6, 2),
+            'routes_found': found,
+            'precision': round(hits / found, 4) if found else 0.0,
+            'recall': round(hits / expected, 4) if expected else 0.0,
+        }
+    results['extract_speedup'] = round(results['scanner']['extract_mb_per_sec'] / results['regex']['extract_mb_per_sec'], 2)
+    results['pipeline_speedup'] = round(results['scanner']['pipeline_mb_per_sec'] / results['regex']['pipeline_mb_per_sec'], 2)
+
+    text, routes = build_next_data(rng)
+    hits, found = _score(extract_json_routes(text), routes)
+    regex_hits, regex_found = _score(extract_routes_regex(text), routes)
+    results['next_data'] = {
+        'routes': len(routes),
+        'precision': round(hits / found, 4) if found else 0.0,
+        'recall': round(hits / len(routes), 4),
+        'regex_precision': round(regex_hits / regex_found, 4) if regex_found else 0.0,
+        'regex_recall': round(regex_hits / len(routes), 4),
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Link capture overhead: recording edges vs the link extraction that produces them.
+
+Usage:
+    python benchmarks/bench_link_capture.py [--pages 2000] [--links 60] [--max-edges 50000] [--output results.json]
+
+Runs EnhancedCrawler._comprehensive_link_extraction over generated pages
+with and without LinkGraph.add_links, then repeats the capture with a
+max_edges bound to show that graph memory stops growing at the cap.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from enhanced_crawler import EnhancedCrawler  # noqa: E402
+from link_graph import LinkGraph  # noqa: E402
+
+BASE_URL = 'https://example.com'
+
+
+def build_pages(pages, links, seed=13):
+    """(url, html) pairs: shared navigation plus links into the rest of the site"""
+    rng = random.Random(seed)
+    paths = [f'/bolum-{i % 40}/sayfa-{i}' for i in range(pages)]
+    nav = ''.join(f'<li><a href="/bolum-{i}/">Bölüm {i}</a></li>' for i in range(20))
+    result = []
+    for path in paths:
+        body = ''.join(f'<p><a href="{rng.choice(paths)}">Yazı</a> metin metin metin</p>'
+                       for _ in range(max(links - 20, 0)))
+        html = (f'<html><head><title>Sayfa</title></head><body><nav><ul>{nav}</ul></nav>'
+                f'<main>{body}</main><footer><a href="mailto:info@example.com">E-posta</a></footer></body></html>')
+        result.append((BASE_URL + path, html))
+    return result
+
+
+def run(crawler, pages, graph=None):
+    start = time.perf_counter()
+    edges = 0
+    for url, html in pages:
+        links = crawler._comprehensive_link_extraction(html, url)
+        if graph is not None:
+            graph.add_links(url, links)
+        edges += len(links)
+    return time.perf_counter() - start, edges
+
+
+def capture_only(pages_links, graph):
+    start = time.perf_counter()
+    for url, links in pages_links:
+        graph.add_links(url, links)
+    return time.perf_counter() - start
+
+
+def traced_graph(pages_links, max_edges):
+    """Bytes held by a graph built from pages_links (URL strings excluded, the crawler holds them)"""
+    tracemalloc.start()
+    graph = LinkGraph(max_edges=max_edges)
+    capture_only(pages_links, graph)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, graph
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--links', type=int, default=60, help='links per page')
+    parser.add_argument('--max-edges', type=int, default=50000, help='cap for the bounded run')
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    pages = build_pages(args.pages, args.links)
+    crawler = EnhancedCrawler(BASE_URL, record_links=False)
+    run(crawler, pages[:50])  # Warm up the parser
+    extract_seconds, links = run(crawler, pages)
+    with_capture_seconds, _ = run(crawler, pages, LinkGraph(max_edges=None))
+
+    pages_links = [(url, crawler._comprehensive_link_extraction(html, url)) for url, html in pages]
+    unbounded = LinkGraph(max_edges=None)
+    capture_seconds = capture_only(pages_links, unbounded)
+    unbounded_bytes, _ = traced_graph(pages_links, None)
+    bounded_bytes, bounded = traced_graph(pages_links, args.max_edges)
+
+    results = {
+        'pages': len(pages),
+        'links_extracted': links,
+        'edges': unbounded.edge_count,
+        'extract_ms_per_page': round(extract_seconds / len(pages) * 1000, 3),
+        'extract_with_capture_ms_per_page': round(with_capture_seconds / len(pages) * 1000, 3),
+        'capture_us_per_page': round(capture_seconds / len(pages) * 1e6, 2),
+        'capture_overhead_pct': round(capture_seconds / extract_seconds * 100, 2),
+        'unbounded_bytes': unbounded_bytes,
+        'bytes_per_edge': round(unbounded_bytes / unbounded.edge_count, 1),
+        'bounded': {
+            'max_edges': args.max_edges,
+            'bytes': bounded_bytes,
+            **bounded.snapshot(),
+        },
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
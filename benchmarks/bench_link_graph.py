@@ -0,0 +1,122 @@
+"""Link-graph priorities: edge capture cost and score computation at 100k+ pages.
+
+Usage:
+    python benchmarks/bench_link_graph.py [--pages 100000] [--links 12] [--rounds 1] [--output results.json]
+
+Scores use numpy when it is installed and pure Python otherwise; "backend"
+in the output says which. The graph is also rebuilt in shuffled page order
+to check that the priorities do not depend on crawl order.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import link_graph  # noqa: E402
+from link_graph import LinkGraph, PriorityModel  # noqa: E402
+
+
+def build_pages(pages, links, seed=11):
+    """Site-like graph: navigation to section pages on every page, a few popular pages, many leaf links"""
+    rng = random.Random(seed)
+    urls = ['https://example.com/'] + [f'https://example.com/bolum-{i % 50}/sayfa-{i}' for i in range(1, pages)]
+    sections = urls[1:51]
+    popular = urls[51:551]
+    result = []
+    for i, url in enumerate(urls):
+        targets = [urls[0]] + rng.sample(sections, 5) + [rng.choice(popular)]
+        targets += [urls[rng.randrange(1, pages)] for _ in range(max(links - len(targets), 0))]
+        if i < 51:
+            # Section pages list their own pages, as an index would
+            targets += urls[i + 50:min(i + 50 + 50 * 40, pages):50]
+        result.append((url, targets))
+    return result
+
+
+def capture(pages):
+    graph = LinkGraph()
+    for url, targets in pages:
+        graph.add_links(url, targets)
+    return graph
+
+
+def tuple_edges(pages):
+    """The naive alternative: a set of (source, target) string tuples"""
+    edges = set()
+    for url, targets in pages:
+        edges.update((url, target) for target in targets)
+    return edges
+
+
+def best_of(func, rounds):
+    best, result = float('inf'), None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def traced_bytes(func):
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=100000)
+    parser.add_argument('--links', type=int, default=12, help='out-links per page')
+    parser.add_argument('--rounds', type=int, default=1)
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    pages = build_pages(args.pages, args.links)
+    model = PriorityModel()
+    root = [pages[0][0]]
+
+    capture_seconds, graph = best_of(lambda: capture(pages), args.rounds)
+    freeze_seconds, frozen = best_of(graph.freeze, args.rounds)
+    pagerank_seconds, _ = best_of(frozen.pagerank, args.rounds)
+    assign_seconds, ranking = best_of(lambda: model.assign(frozen, root), args.rounds)
+    graph_bytes, _ = traced_bytes(lambda: capture(pages))
+    tuple_bytes, _ = traced_bytes(lambda: tuple_edges(pages))
+
+    shuffled = pages[:]
+    random.Random(5).shuffle(shuffled)
+    deterministic = model.assign(capture(shuffled), root) == ranking
+
+    levels = {}
+    for priority, _changefreq in ranking.values():
+        levels[priority] = levels.get(priority, 0) + 1
+    results = {
+        'backend': 'numpy' if link_graph.load_numpy() is not None else 'python',
+        'pages': len(graph),
+        'edges': graph.edge_count,
+        'capture_seconds': round(capture_seconds, 3),
+        'capture_edges_per_sec': round(graph.edge_count / capture_seconds),
+        'graph_bytes': graph_bytes,
+        'tuple_set_bytes': tuple_bytes,
+        'freeze_seconds': round(freeze_seconds, 3),
+        'pagerank_seconds': round(pagerank_seconds, 3),
+        'assign_seconds': round(assign_seconds, 3),
+        'deterministic': deterministic,
+        'priority_levels': dict(sorted(levels.items(), reverse=True)),
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Rate limiter under load: the previous list-per-IP limiter vs the sliding-window backends.
+
+Usage:
+    python benchmarks/bench_rate_limit.py [--requests 1000000] [--clients 200000] [--threads 8]
+                                          [--max-keys 50000] [--sqlite-requests 50000] [--output results.json]
+
+Requests come from a skewed client mix (a few busy IPs, a long tail of
+one-off ones) over simulated time, so windows slide and idle clients pile
+up. Reported: throughput single-threaded and across threads, memory and
+keys held afterwards, and how many requests each limiter let through.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rate_limiter import LocalBackend, RateLimiter, SQLiteBackend  # noqa: E402
+
+LIMIT = 3
+WINDOW = 30
+
+
+class PreviousLimiter:
+    """production_optimizations.rate_limit as it was before: a timestamp list per IP, never pruned"""
+
+    def __init__(self):
+        self.request_times = {}
+
+    def hit(self, ip, now):
+        self.request_times[ip] = [t for t in self.request_times.get(ip, []) if now - t < WINDOW]
+        if len(self.request_times.get(ip, [])) >= LIMIT:
+            return False, 0
+        if ip not in self.request_times:
+            self.request_times[ip] = []
+        self.request_times[ip].append(now)
+        return True, 0
+
+
+def build_load(requests, clients, seconds_per_request, seed=7):
+    """(ip, now) pairs; 20% of traffic from 100 busy clients, the rest spread over the tail"""
+    rng = random.Random(seed)
+    busy = [f"10.0.{i // 256}.{i % 256}" for i in range(100)]
+    load = []
+    for i in range(requests):
+        if rng.random() < 0.2:
+            ip = rng.choice(busy)
+        else:
+            n = rng.randrange(clients)
+            ip = f"{n >> 24 & 255}.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"
+        load.append((ip, 1_000_000 + i * seconds_per_request))
+    return load
+
+
+def run(limiter, load):
+    start = time.perf_counter()
+    allowed = sum(limiter.hit(ip, now)[0] for ip, now in load)
+    return time.perf_counter() - start, allowed
+
+
+def run_threaded(limiter, load, threads):
+    shards = [load[i::threads] for i in range(threads)]
+    workers = [threading.Thread(target=run, args=(limiter, shard)) for shard in shards]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def traced(make, load):
+    tracemalloc.start()
+    limiter = make()
+    run(limiter, load)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, limiter
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000000)
+    parser.add_argument('--clients', type=int, default=200000, help='distinct IPs in the long tail')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--max-keys', type=int, default=50000, help='key bound of the local backend')
+    parser.add_argument('--sqlite-requests', type=int, default=50000, help='requests replayed against SQLite')
+    parser.add_argument('--rps', type=float, default=2000, help='simulated requests per second')
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    load = build_load(args.requests, args.clients, 1 / args.rps)
+    results = {'requests': len(load), 'limit': f"{LIMIT} per {WINDOW} s", 'methods': {}}
+    makers = {
+        'previous': PreviousLimiter,
+        'local': lambda: RateLimiter(LIMIT, WINDOW, LocalBackend(max_keys=args.max_keys)),
+    }
+    for name, make in makers.items():
+        seconds, allowed = run(make(), load)
+        threaded = run_threaded(make(), load, args.threads)
+        size, limiter = traced(make, load)
+        keys = len(limiter.request_times) if name == 'previous' else len(limiter.backend)
+        results['methods'][name] = {
+            'requests_per_sec': round(len(load) / seconds),
+            'threaded_requests_per_sec': round(len(load) / threaded),
+            'allowed': allowed,
+            'keys_held': keys,
+            'state_bytes': size,
+        }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        subset = load[:args.sqlite_requests]
+        limiter = RateLimiter(LIMIT, WINDOW, SQLiteBackend(os.path.join(workdir, 'limits.db')))
+        seconds, allowed = run(limiter, subset)
+        threaded = run_threaded(RateLimiter(LIMIT, WINDOW, SQLiteBackend(os.path.join(workdir, 'threaded.db'))),
+                                subset, args.threads)
+        _, local_allowed = run(RateLimiter(LIMIT, WINDOW, LocalBackend(max_keys=args.max_keys)), subset)
+        results['methods']['sqlite'] = {
+            'requests': len(subset),
+            'requests_per_sec': round(len(subset) / seconds),
+            'threaded_requests_per_sec': round(len(subset) / threaded),
+            'allowed': allowed,
+            'same_decisions_as_local': allowed == local_allowed,
+            'keys_held': len(limiter.backend),
+        }
+        limiter.backend.close()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Seen-set memory and throughput: exact set vs scalable Bloom filter.
+
+Adds N synthetic URLs (default 1M), then looks up N present and N absent
+URLs. Memory is the traced allocation growth while filling the structure,
+so the exact set is charged for the URL strings it keeps alive.
+
+"crawl_state" measures what a whole EnhancedCrawler keeps per discovered
+URL in each mode: the seen-set plus the frontier, the visited store, the
+per-URL metadata and the link graph. Pages are dequeued and settled the way
+the fetch workers do it, without network or HTML, and --failing of them
+fail. Only failed pages are left out in bloom mode, so that share bounds
+the saving.
+
+Usage:
+    python benchmarks/bench_seen_set.py [--urls 1000000] [--error-rate 0.001] [--crawl-urls 200000]
+                                        [--failing 0.5] [--output results.json]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from enhanced_crawler import EnhancedCrawler  # noqa: E402
+from seen_set import make_seen_set  # noqa: E402
+
+FANOUT = 5  # New URLs linked from each fetched page
+
+
+def url(i, prefix='page'):
+    return f"https://www.example.com/section-{i % 97}/{prefix}-{i}?ref=list&p={i % 13}"
+
+
+def fill(kind, count, error_rate):
+    seen = make_seen_set(kind, error_rate, initial_capacity=min(count, 100000))
+    for i in range(count):
+        seen.add(url(i))
+    return seen
+
+
+def measure(kind, count, error_rate):
+    # Memory is measured on a separate fill: tracemalloc slows allocation down a lot
+    gc.collect()
+    tracemalloc.start()
+    seen = fill(kind, count, error_rate)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del seen
+    gc.collect()
+
+    start = time.perf_counter()
+    seen = fill(kind, count, error_rate)
+    add_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    missing = sum(1 for i in range(count) if url(i) not in seen)
+    hit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    false_positives = sum(1 for i in range(count) if url(i, 'absent') in seen)
+    miss_seconds = time.perf_counter() - start
+
+    return {
+        'memory_mb': round(memory / 1024 / 1024, 2),
+        'bytes_per_url': round(memory / count, 1),
+        'adds_per_sec': round(count / add_seconds),
+        'present_lookups_per_sec': round(count / hit_seconds),
+        'absent_lookups_per_sec': round(count / miss_seconds),
+        'false_negatives': missing,
+        'false_positive_rate': round(false_positives / count, 6),
+    }
+
+
+def simulate_crawl(kind, count, error_rate, failing):
+    """Discover count URLs through the crawler's own bookkeeping; returns the crawler"""
+    crawler = EnhancedCrawler('https://www.example.com', seen_set=make_seen_set(kind, error_rate), max_urls=count)
+    crawler.crawl_start = time.time()
+    crawler._add_url(url(0), source='start', depth=0)
+    discovered = 1  # URL ids handed out so far; a Bloom false positive must not stall the id sequence
+    fetched = 0
+    while True:
+        page = crawler.frontier.get(timeout=0)
+        if page is None:
+            break
+        fetched += 1
+        if fetched > 1 and (fetched * 7919) % 100 < failing * 100:
+            crawler.status[page] = 404
+            crawler.url_data[page] = 'HTTP 404'
+        else:
+            crawler.status[page] = 200
+            crawler.url_data[page] = f'Sayfa {fetched}'
+            crawler.lastmod[page] = '2024-01-01'
+            # New pages plus links back to pages found earlier, some of them failed
+            links = [url(i) for i in range(discovered, min(discovered + FANOUT, count))]
+            links += [url((fetched * 31 + i) % discovered) for i in range(FANOUT)]
+            discovered = min(discovered + FANOUT, count)
+            for link in links:
+                crawler._add_url(link, source='link', depth=1)
+            crawler._record_links(page, links)
+        if crawler.seen is not crawler.visited:
+            crawler._settle(page)
+        crawler.frontier.task_done()
+    return crawler
+
+
+def measure_crawl_state(kind, count, error_rate, failing):
+    gc.collect()
+    tracemalloc.start()
+    crawler = simulate_crawl(kind, count, error_rate, failing)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {
+        'memory_mb': round(memory / 1024 / 1024, 2),
+        'bytes_per_discovered_url': round(memory / count, 1),
+        'kept_urls': len(crawler.visited),
+        'graph_pages': len(crawler.link_graph),
+        'graph_links': crawler.link_graph.edge_count,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--urls', type=int, default=1000000)
+    parser.add_argument('--error-rate', type=float, default=0.001)
+    parser.add_argument('--crawl-urls', type=int, default=200000)
+    parser.add_argument('--failing', type=float, default=0.5, help='share of fetched pages that fail')
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    results = {
+        'urls': args.urls,
+        'error_rate': args.error_rate,
+        'exact': measure('exact', args.urls, args.error_rate),
+        'bloom': measure('bloom', args.urls, args.error_rate),
+    }
+    results['memory_ratio'] = round(results['exact']['memory_mb'] / max(results['bloom']['memory_mb'], 0.01), 1)
+    results['crawl_state'] = {
+        'urls': args.crawl_urls,
+        'failing': args.failing,
+        'exact': measure_crawl_state('exact', args.crawl_urls, args.error_rate, args.failing),
+        'bloom': measure_crawl_state('bloom', args.crawl_urls, args.error_rate, args.failing),
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
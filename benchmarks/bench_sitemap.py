@@ -0,0 +1,130 @@
+"""Sitemap generation at scale: the previous sort-and-write path vs presorted streams and merged runs.
+
+Usage:
+    python benchmarks/bench_sitemap.py [--urls 1000000] [--hosts 20] [--runs 8] [--rounds 1] [--output results.json]
+
+Every method writes sitemap.xml into a scratch directory; the outputs are
+checked to be byte-identical.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sitemap_generator import SitemapGenerator, SITEMAP_XMLNS, host_runs  # noqa: E402
+
+
+def generate_previous(urls, lastmod=None):
+    """SitemapGenerator.generate as it was before this change: global sort, one write per URL"""
+    today = datetime.now().strftime("%Y-%m-%d") if lastmod is None else None
+    lastmod = lastmod or {}
+    with open("sitemap.xml", "wb") as f:
+        f.write(b"<?xml version='1.0' encoding='UTF-8'?>\n")
+        f.write(f'<urlset xmlns="{SITEMAP_XMLNS}">'.encode('utf-8'))
+        count = 0
+        for url in sorted(urls):
+            url = url.strip()
+            date = lastmod.get(url) or today
+            entry = f"\n  <url>\n    <loc>{escape(url)}</loc>\n"
+            if date:
+                entry += f"    <lastmod>{escape(date)}</lastmod>\n"
+            priority = "1.0" if url.rstrip('/').split('/')[-1] == '' or url.rstrip('/').count('/') <= 2 else "0.8"
+            entry += f"    <changefreq>weekly</changefreq>\n    <priority>{priority}</priority>\n  </url>"
+            f.write(entry.encode('utf-8'))
+            count += 1
+        f.write(b"\n</urlset>" if count else b"</urlset>")
+
+
+def build_urls(count, hosts, seed=3):
+    """Deterministic crawl-like URL set, unordered like a visited set"""
+    rng = random.Random(seed)
+    sections = ['urun', 'kategori', 'blog', 'haber', 'etiket', 'marka', 'sayfa']
+    hostnames = [f"https://{'www' if i == 0 else f'alt{i}'}.example.com" for i in range(hosts)]
+    urls = set(hostnames)
+    while len(urls) < count:
+        host = hostnames[min(int(rng.expovariate(0.3)), hosts - 1)]
+        depth = rng.randint(1, 4)
+        path = '/'.join(f"{rng.choice(sections)}-{rng.randint(1, 50000)}" for _ in range(depth))
+        urls.add(f"{host}/{path}" + ('/' if rng.random() < 0.3 else '') + (f"?s={rng.randint(1, 9)}" if rng.random() < 0.05 else ''))
+    return urls
+
+
+def split_runs(urls, runs):
+    """Sorted runs as spilled stores or distributed workers hand them over"""
+    shards = [[] for _ in range(runs)]
+    for url in urls:
+        shards[hash(url) % runs].append(url)
+    for shard in shards:
+        shard.sort()
+    return shards
+
+
+def measure(func, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--urls', type=int, default=1000000)
+    parser.add_argument('--hosts', type=int, default=20)
+    parser.add_argument('--runs', type=int, default=8, help='sorted runs for the merged-runs case')
+    parser.add_argument('--rounds', type=int, default=1)
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    urls = build_urls(args.urls, args.hosts)
+    presorted = sorted(urls)
+    runs = split_runs(urls, args.runs)
+    generator = SitemapGenerator()
+    methods = {
+        'previous': lambda: generate_previous(urls),
+        'unsorted': lambda: generator.generate(urls),
+        'presorted_stream': lambda: generator.generate(iter(presorted), presorted=True),
+        'sorted_runs': lambda: generator.generate_runs(runs),
+        'host_runs': lambda: generator.generate_runs(host_runs(urls)),
+    }
+
+    results = {'urls': len(urls), 'hosts': args.hosts, 'runs': args.runs, 'methods': {}}
+    digests = set()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)  # The generator writes sitemap.xml into the cwd
+        try:
+            for name, func in methods.items():
+                seconds = measure(func, args.rounds)
+                with open('sitemap.xml', 'rb') as f:
+                    digests.add(hashlib.sha256(f.read()).hexdigest())
+                results['methods'][name] = {
+                    'seconds': round(seconds, 3),
+                    'urls_per_sec': round(len(urls) / seconds),
+                }
+        finally:
+            os.chdir(cwd)
+    base = results['methods']['previous']['seconds']
+    for result in results['methods'].values():
+        result['speedup'] = round(base / result['seconds'], 2)
+    results['identical_output'] = len(digests) == 1
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
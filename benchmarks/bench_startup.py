@@ -0,0 +1,83 @@
+"""Cold start: importing the app, building it and serving the first request, each in a fresh interpreter.
+
+Usage:
+    python benchmarks/bench_startup.py [--rounds 5] [--output results.json]
+
+"eager" imports the modules app.py used to load at import time (the
+crawlers, distributed mode, profiling, the HTTP pool) next to Flask, as a
+reference for what a cold start cost before they became lazy. "first_crawl"
+is the import cost that moved to the first /crawl request.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HEAVY_MODULES = ['requests', 'bs4', 'urllib3', 'numpy', 'enhanced_crawler', 'distributed', 'profiling', 'http_pool', 'link_graph']
+
+APP_SNIPPET = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app(start_services=False)
+created = time.perf_counter()
+flask_app.test_client().get('/')
+served = time.perf_counter()
+loaded = [name for name in %r if name in sys.modules]
+import enhanced_crawler, distributed, incremental, profiling
+crawl_ready = time.perf_counter()
+print(json.dumps({'import': imported - start, 'create_app': created - imported, 'first_request': served - created,
+                  'first_crawl': crawl_ready - served, 'heavy_modules_loaded': loaded}))
+''' % HEAVY_MODULES
+
+EAGER_SNIPPET = '''
+import json, time
+start = time.perf_counter()
+import flask, enhanced_crawler, distributed, profiling, incremental, http_pool, exports, result_cache
+print(json.dumps({'eager': time.perf_counter() - start}))
+'''
+
+
+def run(snippet):
+    output = subprocess.run([sys.executable, '-c', snippet], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    run(APP_SNIPPET)  # Warm the bytecode and OS file caches
+    samples = [run(APP_SNIPPET) for _ in range(args.rounds)]
+    eager = [run(EAGER_SNIPPET)['eager'] for _ in range(args.rounds)]
+
+    def median_ms(values):
+        return round(statistics.median(values) * 1000, 1)
+
+    results = {
+        'rounds': args.rounds,
+        'import_app_ms': median_ms([s['import'] for s in samples]),
+        'create_app_ms': median_ms([s['create_app'] for s in samples]),
+        'first_request_ms': median_ms([s['first_request'] for s in samples]),
+        'cold_start_ms': median_ms([s['import'] + s['create_app'] + s['first_request'] for s in samples]),
+        'eager_imports_ms': median_ms(eager),
+        'first_crawl_imports_ms': median_ms([s['first_crawl'] for s in samples]),
+        'heavy_modules_at_start': samples[-1]['heavy_modules_loaded'],
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Title extraction throughput: BeautifulSoup baseline vs the streaming head scanner.
+
+Usage:
+    python benchmarks/bench_titles.py [--pages 400] [--rounds 3] [--output results.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from title_extractor import TitleExtractor, TitleMemo  # noqa: E402
+
+DOMAIN = 'example.com'
+
+
+def extract_title_bs4(html, domain=DOMAIN):
+    """EnhancedCrawler._extract_title as it was before the streaming extractor"""
+    try:
+        soup = BeautifulSoup(html, 'html.parser')
+        title = None
+        title_tag = soup.find('title')
+        if title_tag and title_tag.get_text().strip():
+            title = title_tag.get_text().strip()
+        if not title or len(title) < 3:
+            og_title = soup.find('meta', property='og:title')
+            if og_title and og_title.get('content'):
+                title = og_title.get('content').strip()
+        if not title or len(title) < 3:
+            twitter_title = soup.find('meta', attrs={'name': 'twitter:title'})
+            if twitter_title and twitter_title.get('content'):
+                title = twitter_title.get('content').strip()
+        if not title or len(title) < 3:
+            h1_tag = soup.find('h1')
+            if h1_tag and h1_tag.get_text().strip():
+                title = h1_tag.get_text().strip()
+        if title:
+            title = ' '.join(title.split())
+            for suffix in [' - ' + domain, ' | ' + domain, ' :: ' + domain]:
+                if title.endswith(suffix):
+                    title = title[:-len(suffix)]
+            if len(title) > 2 and title.lower() not in ['untitled', 'page', 'home']:
+                return title
+        return "Başlık bulunamadı"
+    except Exception:
+        return "Başlık bulunamadı"
+
+
+def build_corpus(pages, seed=7):
+    """Deterministic fixture pages covering the title fallback paths"""
+    rng = random.Random(seed)
+    script = '<script>' + 'var x = {"a": [1, 2, 3], "b": "/path/to/page"};' * 200 + '</script>'
+    body = ''.join(f'<div class="c"><p>Paragraph {i} with <a href="/p{i}">link</a> &amp; text.</p></div>' for i in range(300))
+    corpus = []
+    for i in range(pages):
+        kind = i % 5
+        head = '<meta charset="utf-8"><link rel="stylesheet" href="/s.css">' + (script if rng.random() < 0.5 else '')
+        if kind == 0:
+            head += f'<title>Article {i} &amp; more | {DOMAIN}</title>'
+        elif kind == 1:
+            head += f'<title></title><meta property="og:title" content="OG title {i}">'
+        elif kind == 2:
+            head += f'<title>Hi</title><meta name="twitter:title" content="Twitter title {i}">'
+        elif kind == 3:
+            head += '<title>  </title>'
+        else:
+            head += f'<title>\n  Multi\n  line   title {i}\n</title>'
+        h1 = f'<h1>Heading <span>{i}</span></h1>'
+        corpus.append(f'<!DOCTYPE html><html><head>{head}</head><body><header>{h1}</header>{body}</body></html>')
+    return corpus
+
+
+def measure(func, corpus, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for html in corpus:
+            func(html)
+        best = min(best, time.perf_counter() - start)
+    return round(len(corpus) / best, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=400)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(args.pages)
+    cold = TitleExtractor(DOMAIN, memo=None)
+    warm = TitleExtractor(DOMAIN, memo=TitleMemo(maxsize=args.pages * 2))
+    agreement = sum(extract_title_bs4(html) == cold.extract(html) for html in corpus) / len(corpus)
+
+    results = {
+        'pages': len(corpus),
+        'avg_page_bytes': sum(len(html) for html in corpus) // len(corpus),
+        'bs4_titles_per_sec': measure(extract_title_bs4, corpus, args.rounds),
+        'streaming_titles_per_sec': measure(cold.extract, corpus, args.rounds),
+        'memo_hit_titles_per_sec': measure(warm.extract, corpus, args.rounds),  # Every round after the first hits
+        'agreement_with_bs4': round(agreement, 4),
+    }
+    results['speedup'] = round(results['streaming_titles_per_sec'] / results['bs4_titles_per_sec'], 1)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
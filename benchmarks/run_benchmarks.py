@@ -0,0 +1,225 @@
+"""End-to-end crawl benchmarks against a local synthetic website.
+
+Usage:
+    python benchmarks/run_benchmarks.py --pages 300 --output results.json
+    python benchmarks/run_benchmarks.py --targets enhanced --compare results.json
+
+Each target runs in a fresh process so peak RSS is per target. Results are
+written as JSON; --compare prints the relative change against an earlier run.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from urllib.robotparser import RobotFileParser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic_site import SiteConfig, SiteServer, SyntheticSite, route_session  # noqa: E402
+
+TARGETS = ('crawler', 'enhanced', 'generator')
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _recall(found, expected):
+    found = {url.rstrip('/') for url in found}
+    hits = len(found & expected)
+    return {
+        'urls_found': len(found),
+        'recall': round(hits / len(expected), 4) if expected else 0.0,
+        'precision': round(hits / len(found), 4) if found else 0.0,
+    }
+
+
+def _run_crawler(target, site, port, workdir):
+    from duplicates import EXCLUDED_STATUSES
+    from sitemap_generator import SitemapGenerator
+    start_url = f"http://{site.config.base_domain}"
+    if target == 'crawler':
+        from crawler import Crawler
+        crawler = Crawler(start_url)
+    else:
+        from enhanced_crawler import EnhancedCrawler
+        crawler = EnhancedCrawler(start_url)
+    route_session(crawler.session, site.config.base_domain, port)
+
+    if target == 'crawler':
+        # urllib-based robots loading cannot see the local site; load it through the routed session
+        robots = RobotFileParser(crawler.robots_url)
+        robots.parse(crawler.session.get(crawler.robots_url, timeout=5).text.splitlines())
+        crawler.robot_parser = robots
+
+    start = time.perf_counter()
+    crawler.crawl()
+    crawl_seconds = time.perf_counter() - start
+
+    # Score what the sitemap lists, as the app does: without duplicates, soft-404s and failed guesses
+    status = getattr(crawler, 'status', {})
+    listed = [url for url in crawler.visited if status.get(url) not in EXCLUDED_STATUSES]
+
+    start = time.perf_counter()
+    SitemapGenerator(stats=crawler.stats).generate(listed, path=os.path.join(workdir, 'sitemap.xml'))
+    generate_seconds = time.perf_counter() - start
+
+    stats = crawler.stats
+    result = {
+        'crawl_seconds': round(crawl_seconds, 3),
+        'generate_seconds': round(generate_seconds, 4),
+        'fetches': stats.fetches,
+        'pages_per_sec': round(stats.fetches / crawl_seconds, 2) if crawl_seconds else 0.0,
+        'fetch_p50_ms': round(stats.percentile(50) * 1000, 2),
+        'fetch_p99_ms': round(stats.percentile(99) * 1000, 2),
+        'bytes_downloaded': stats.bytes_downloaded,
+        'status_counts': dict(stats.status_counts),
+        'phase_timings': crawler.phase_timings,
+    }
+    result.update(_recall(listed, site.expected_urls()))
+    return result
+
+
+def _run_generator(site, url_count, workdir):
+    from sitemap_generator import SitemapGenerator
+    path = os.path.join(workdir, 'sitemap.xml')
+    urls = [f"http://{site.config.base_domain}/section-{i % 8}/page-{i}" for i in range(url_count)]
+    start = time.perf_counter()
+    SitemapGenerator().generate(urls, path=path)
+    seconds = time.perf_counter() - start
+    return {
+        'urls': url_count,
+        'generate_seconds': round(seconds, 3),
+        'urls_per_sec': round(url_count / seconds, 1) if seconds else 0.0,
+        'sitemap_bytes': os.path.getsize(path),
+    }
+
+
+def _child(target, config, port, generator_urls, workdir, queue):
+    import logging
+    logging.disable(logging.WARNING)
+    os.chdir(workdir)  # Crawler keeps its backup file in the cwd
+    site = SyntheticSite(SiteConfig(**config))
+    try:
+        if target == 'generator':
+            result = _run_generator(site, generator_urls, workdir)
+        else:
+            result = _run_crawler(target, site, port, workdir)
+        result['peak_rss_mb'] = _peak_rss_mb()
+    except Exception as e:
+        result = {'error': f"{type(e).__name__}: {e}"}
+    queue.put(result)
+
+
+def run_target(target, config, port, generator_urls, timeout):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    with tempfile.TemporaryDirectory() as workdir:
+        process = ctx.Process(target=_child, args=(target, asdict(config), port, generator_urls, workdir, queue))
+        process.start()
+        try:
+            return queue.get(timeout=timeout)
+        except Exception:
+            return {'error': f"timed out after {timeout}s"}
+        finally:
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline):
+    """Print relative change of numeric metrics against a baseline result file"""
+    for target, result in current['results'].items():
+        base = baseline.get('results', {}).get(target)
+        if not base:
+            continue
+        print(f"== {target} ({baseline.get('meta', {}).get('commit')} -> {current['meta'].get('commit')})")
+        for key, value in result.items():
+            old = base.get(key)
+            if isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+                print(f"  {key:20} {old:>12} -> {value:>12} ({(value - old) / old * 100:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--targets', default=','.join(TARGETS), help='comma-separated: ' + ', '.join(TARGETS))
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--fanout', type=int, default=8)
+    parser.add_argument('--subdomains', default='blog', help='comma-separated subdomain labels')
+    parser.add_argument('--sitemap-coverage', type=float, default=0.5)
+    parser.add_argument('--no-sitemap-index', action='store_true')
+    parser.add_argument('--urls-per-sitemap', type=int, default=50)
+    parser.add_argument('--slow-every', type=int, default=25)
+    parser.add_argument('--slow-delay', type=float, default=0.2)
+    parser.add_argument('--error-every', type=int, default=40)
+    parser.add_argument('--private-every', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--generator-urls', type=int, default=100000)
+    parser.add_argument('--timeout', type=int, default=600, help='seconds per target')
+    parser.add_argument('--output', help='write JSON results to this file')
+    parser.add_argument('--compare', help='baseline JSON results to compare against')
+    args = parser.parse_args(argv)
+
+    config = SiteConfig(
+        pages=args.pages,
+        fanout=args.fanout,
+        subdomains=[s for s in args.subdomains.split(',') if s],
+        sitemap_coverage=args.sitemap_coverage,
+        sitemap_index=not args.no_sitemap_index,
+        urls_per_sitemap=args.urls_per_sitemap,
+        slow_every=args.slow_every,
+        slow_delay=args.slow_delay,
+        error_every=args.error_every,
+        private_every=args.private_every,
+        seed=args.seed,
+    )
+    site = SyntheticSite(config)
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'expected_urls': len(site.expected_urls()),
+        },
+        'config': asdict(config),
+        'results': {},
+    }
+    with SiteServer(site) as server:
+        for target in [t for t in args.targets.split(',') if t]:
+            if target not in TARGETS:
+                parser.error(f"unknown target {target}")
+            print(f"Running {target}...", file=sys.stderr)
+            report['results'][target] = run_target(target, config, server.port, args.generator_urls, args.timeout)
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+# Deterministic synthetic website served locally for crawl benchmarks
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+_WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore '
+          'et dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi aliquip ex '
+          'ea commodo consequat duis aute irure in reprehenderit voluptate velit esse cillum fugiat nulla').split()
+
+
+@dataclass
+class SiteConfig:
+    base_domain: str = 'site.test'
+    pages: int = 200
+    fanout: int = 8  # Links per page
+    subdomains: list = field(default_factory=lambda: ['blog'])
+    sitemap_coverage: float = 0.5  # Fraction of pages listed in sitemaps
+    sitemap_index: bool = True  # Serve /sitemap.xml as an index of chunks
+    urls_per_sitemap: int = 50
+    slow_every: int = 25  # Every Nth page is slow (0 disables)
+    slow_delay: float = 0.2
+    error_every: int = 40  # Every Nth page returns 500 (0 disables)
+    private_every: int = 30  # Every Nth page lives under robots-disallowed /private/
+    page_bytes: int = 4000  # Approximate HTML size per page
+    seed: int = 42
+
+
+class SyntheticSite:
+    """Page graph, sitemaps and robots rules generated from a SiteConfig"""
+
+    def __init__(self, config):
+        self.config = config
+        self.hosts = [config.base_domain] + [f"{sub}.{config.base_domain}" for sub in config.subdomains]
+        self.pages = {}  # (host, path) -> page index
+        self.urls = []
+        for i in range(config.pages):
+            host = self.hosts[i % len(self.hosts)]
+            path = self._path(i)
+            self.pages[(host, path)] = i
+            self.urls.append(f"http://{host}{path}")
+
+        rng = random.Random(config.seed)
+        self.links = [rng.sample(range(config.pages), min(config.fanout, config.pages)) for _ in range(config.pages)]
+        in_sitemap = rng.sample(range(config.pages), int(config.pages * config.sitemap_coverage))
+        self.sitemap_pages = {host: [] for host in self.hosts}
+        for i in sorted(in_sitemap):
+            self.sitemap_pages[self.hosts[i % len(self.hosts)]].append(i)
+
+    def _path(self, i):
+        if self.config.private_every and i % self.config.private_every == 0 and i:
+            return f"/private/page-{i}"
+        if i % 5 == 0:
+            return f"/blog/post-{i}"
+        return f"/section-{i % 8}/page-{i}"
+
+    def is_slow(self, i):
+        return bool(self.config.slow_every) and i % self.config.slow_every == self.config.slow_every - 1
+
+    def is_error(self, i):
+        return bool(self.config.error_every) and i % self.config.error_every == self.config.error_every - 1
+
+    def expected_urls(self):
+        """Pages a perfect crawler would list: served with 200 and allowed by robots"""
+        return {
+            url for i, url in enumerate(self.urls)
+            if not self.is_error(i) and '/private/' not in url
+        }
+
+    def render_page(self, i):
+        links = ''.join(f'<li><a href="{self.urls[j]}">Page {j}</a></li>' for j in self.links[i])
+        # Text of its own per page: pages differing only in numbers would be collapsed as duplicates
+        rng = random.Random(self.config.seed * 100003 + i)
+        filler = ''.join('<p>' + ' '.join(rng.choices(_WORDS, k=40)) + '.</p>'
+                         for _ in range(max(1, self.config.page_bytes // 300)))
+        return (f"<!DOCTYPE html><html><head><title>Synthetic page {i}</title>"
+                f'<meta property="og:title" content="Synthetic page {i}"></head>'
+                f"<body><h1>Page {i}</h1><nav><ul>{links}</ul></nav>{filler}</body></html>")
+
+    def render_home(self, host):
+        first = [i for i in range(self.config.pages) if self.hosts[i % len(self.hosts)] == host][:self.config.fanout]
+        links = ''.join(f'<a href="{self.urls[i]}">Page {i}</a>' for i in first)
+        subs = ''.join(f'<a href="http://{h}/">{h}</a>' for h in self.hosts if h != host)
+        return (f"<!DOCTYPE html><html><head><title>Home of {host}</title></head>"
+                f'<body><h1>{host}</h1>{links}{subs}<a href="/blog/">Blog</a></body></html>')
+
+    def render_blog_index(self, host):
+        posts = [i for i, url in enumerate(self.urls) if url.startswith(f"http://{host}/blog/")]
+        links = ''.join(f'<div class="blog-post"><a href="{self.urls[i]}">Post {i}</a></div>' for i in posts[:20])
+        return f"<!DOCTYPE html><html><head><title>Blog</title></head><body>{links}</body></html>"
+
+    def render_sitemap(self, host, chunk=None):
+        ns = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+        pages = self.sitemap_pages[host]
+        size = self.config.urls_per_sitemap
+        if self.config.sitemap_index and chunk is None:
+            chunks = ''.join(
+                f"<sitemap><loc>http://{host}/sitemap-{k}.xml</loc></sitemap>"
+                for k in range((len(pages) + size - 1) // size)
+            )
+            return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="{ns}">{chunks}</sitemapindex>'
+        if chunk is not None:
+            pages = pages[chunk * size:(chunk + 1) * size]
+        entries = ''.join(f"<url><loc>{self.urls[i]}</loc><lastmod>2024-01-{i % 28 + 1:02d}</lastmod></url>" for i in pages)
+        return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{ns}">{entries}</urlset>'
+
+    def respond(self, host, path):
+        """Return (status, content_type, body, delay) for a request"""
+        if host not in self.hosts:
+            # Sites served under their real name are reached through a port
+            host = host.split(':')[0]
+        if host not in self.hosts:
+            return 404, 'text/plain', 'unknown host', 0
+        if path == '/robots.txt':
+            return 200, 'text/plain', f"User-agent: *\nDisallow: /private/\nSitemap: http://{host}/sitemap.xml\n", 0
+        if path in ('', '/'):
+            return 200, 'text/html', self.render_home(host), 0
+        if path in ('/blog', '/blog/'):
+            return 200, 'text/html', self.render_blog_index(host), 0
+        if path == '/sitemap.xml':
+            return 200, 'application/xml', self.render_sitemap(host), 0
+        if path.startswith('/sitemap-') and path.endswith('.xml'):
+            try:
+                return 200, 'application/xml', self.render_sitemap(host, int(path[9:-4])), 0
+            except ValueError:
+                pass
+        i = self.pages.get((host, path.rstrip('/') if path != '/' else path))
+        if i is None:
+            return 404, 'text/html', '<html><head><title>Not found</title></head></html>', 0
+        if self.is_error(i):
+            return 500, 'text/html', '<html><head><title>Error</title></head></html>', 0
+        return 200, 'text/html', self.render_page(i), self.config.slow_delay if self.is_slow(i) else 0
+
+
+def _make_handler(site):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like real servers
+
+        def _serve(self, with_body):
+            status, content_type, body, delay = site.respond(self.headers.get('Host', ''), urlparse(self.path).path)
+            if delay:
+                time.sleep(delay)
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            if with_body:
+                self.wfile.write(data)
+
+        def do_GET(self):
+            self._serve(True)
+
+        def do_HEAD(self):
+            self._serve(False)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class SiteServer:
+    """Runs a SyntheticSite on 127.0.0.1 in a background thread"""
+
+    def __init__(self, site, port=0):
+        self.site = site
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), _make_handler(site))
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        return False
+
+
+class LocalSiteAdapter(HTTPAdapter):
+    """Routes every request for the synthetic domain to the local server.
+
+    The original host travels in the Host header, so subdomains and both
+    http/https URLs resolve without DNS or TLS.
+    """
+
+    def __init__(self, base_domain, port, **kwargs):
+        self.base_domain = base_domain
+        self.port = port
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        original_url = request.url
+        parsed = urlparse(original_url)
+        host = parsed.hostname or ''
+        if host == self.base_domain or host.endswith('.' + self.base_domain):
+            target = f"http://127.0.0.1:{self.port}{parsed.path or '/'}"
+            if parsed.query:
+                target += f"?{parsed.query}"
+            request.url = target
+            request.headers['Host'] = parsed.netloc
+        else:
+            # Anything outside the synthetic site must not leave the machine
+            response = requests.Response()
+            response.status_code = 404
+            response.url = original_url
+            response.request = request
+            response._content = b''
+            return response
+        response = super().send(request, **kwargs)
+        response.url = original_url
+        request.url = original_url
+        return response
+
+
+def route_session(session, base_domain, port):
+    """Mount LocalSiteAdapter on a crawler's session, keeping its retry policy"""
+    current = session.get_adapter('http://')
+    adapter = LocalSiteAdapter(base_domain, port, max_retries=current.max_retries, pool_maxsize=16)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
@@ -0,0 +1,210 @@
+"""Command-line entry point; runs crawls without the web app.
+
+Usage:
+    python cli.py crawl https://example.com [--engine enhanced|simple] [--concurrency 8] [--max-urls 20000]
+                       [--time-budget 60] [--stream txt|jsonl|none] [--output urls.txt]
+                       [--output-dir .] [--formats xml]
+    python cli.py batch sites.txt [--concurrency 4] [--per-host 4] [--max-urls 20000]
+                       [--time-budget 60] [--output-dir exports/batch] [--formats xml,jsonl]
+
+`crawl` prints each URL as it is discovered (stdout unless --output is
+given) and exits once the sitemap is written to --output-dir. Crawlers,
+requests and BeautifulSoup are imported only when a crawl starts, so the
+command stays cheap to launch from cron. Exit status is 1 when nothing
+was found.
+
+`batch` reads one start URL per line (`-` for stdin; blank lines and
+lines starting with # are skipped), crawls them on a shared pool and
+prints one JSON line per site to stdout as each finishes. Progress goes
+to stderr.
+"""
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+
+from duplicates import EXCLUDED_STATUSES
+from exports import EXPORT_DIR, EXPORT_FORMATS, GRAPH_FORMATS, export_crawl
+
+logger = logging.getLogger(__name__)
+
+
+def read_urls(path):
+    f = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def parse_formats(value):
+    formats = [fmt.strip() for fmt in value.split(',') if fmt.strip()]
+    known = {**EXPORT_FORMATS, **GRAPH_FORMATS}
+    unknown = [fmt for fmt in formats if fmt not in known]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown format {', '.join(unknown)}; use {', '.join(known)}")
+    return formats
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+
+class UrlStream:
+    """on_url callback writing one line per discovered URL; crawler threads share it"""
+
+    def __init__(self, fileobj, fmt):
+        self.fileobj = fileobj
+        self.fmt = fmt
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url, source, depth):
+        if self.fmt == 'jsonl':
+            line = json.dumps({'url': url, 'source': source, 'depth': depth}, ensure_ascii=False)
+        else:
+            line = url
+        with self._lock:
+            if self.fileobj is None:
+                return
+            try:
+                self.fileobj.write(line + '\n')
+                self.fileobj.flush()
+            except BrokenPipeError:
+                # The reader went away (e.g. `| head`); the crawl still finishes and writes the sitemap
+                self.fileobj = None
+                return
+            self.count += 1
+
+
+def run_crawl(args):
+    if args.engine == 'simple':
+        from crawler import Crawler
+        crawler = Crawler(args.url, record_links=not args.no_links)
+    else:
+        from enhanced_crawler import EnhancedCrawler
+        crawler = EnhancedCrawler(args.url, max_urls=args.max_urls, spill_threshold=args.spill_threshold,
+                                  time_budget=args.time_budget, record_links=not args.no_links)
+        crawler.max_workers = args.concurrency
+        if args.max_fetches is not None:
+            crawler.max_fetches = args.max_fetches
+    crawler.max_urls = args.max_urls
+
+    output = None
+    if args.stream != 'none':
+        output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+        crawler.on_url = UrlStream(output, args.stream)
+    try:
+        start = time.time()
+        crawler.crawl()
+        # Discovered URLs were all streamed; only those the sitemap lists count as found
+        status = getattr(crawler, 'status', {})
+        found = sum(1 for url in crawler.visited if status.get(url) not in EXCLUDED_STATUSES)
+        if not found:
+            print("Taranacak URL bulunamadı", file=sys.stderr)
+            return 1
+        paths = export_crawl(crawler, args.output_dir, formats=args.formats or ['xml'], stats=crawler.stats)
+    finally:
+        if output is not None and output is not sys.stdout:
+            output.close()
+        if hasattr(crawler, 'close'):
+            crawler.close()
+    print(f"{found} URLs in {time.time() - start:.1f} s; wrote {', '.join(paths.values())}", file=sys.stderr)
+    return 0
+
+
+def report_progress(batch, interval, stop):
+    """Print the combined batch progress to stderr every interval seconds"""
+    while not stop.wait(interval):
+        p = batch.progress()
+        print(f"[{p['done'] + p['failed']}/{p['total']}] running {p['running']}, failed {p['failed']}, "
+              f"{p['urls_found']} URLs, {p['elapsed']:.0f} s", file=sys.stderr, flush=True)
+
+
+def run_batch(args):
+    from batch import BatchScheduler, DONE
+
+    urls = read_urls(args.file)
+    if not urls:
+        print("Taranacak URL bulunamadı", file=sys.stderr)
+        return 1
+    scheduler = BatchScheduler(max_sites=args.concurrency, per_host=args.per_host, directory=args.output_dir)
+    batch = scheduler.submit(urls, {'max_urls': args.max_urls, 'time_budget': args.time_budget,
+                                    'record_links': not args.no_links}, formats=args.formats)
+    stop = threading.Event()
+    if args.progress_interval > 0:
+        threading.Thread(target=report_progress, args=(batch, args.progress_interval, stop), daemon=True).start()
+    failed = 0
+    try:
+        for site in batch.results():
+            site['exports'] = batch.paths.get(site['index'], {})
+            print(json.dumps(site, ensure_ascii=False), flush=True)
+            failed += site['state'] != DONE
+    finally:
+        stop.set()
+        scheduler.shutdown()
+    p = batch.progress()
+    print(f"{p['done']} of {p['total']} sites done, {p['urls_found']} URLs in {p['elapsed']:.1f} s; "
+          f"exports in {args.output_dir}/{batch.id}", file=sys.stderr)
+    return 1 if failed == len(urls) else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-v', '--verbose', action='store_true', help='log crawler activity to stderr')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    crawl = commands.add_parser('crawl', help='crawl one site and write its sitemap')
+    crawl.add_argument('url')
+    crawl.add_argument('--engine', choices=('enhanced', 'simple'), default='enhanced',
+                       help='enhanced: concurrent discovery (default); simple: sequential link crawl')
+    crawl.add_argument('--concurrency', type=positive_int, default=8, help='concurrent page fetches (enhanced)')
+    crawl.add_argument('--max-urls', type=positive_int, default=20000, help='URL limit')
+    crawl.add_argument('--max-fetches', type=positive_int, help='pages fetched for titles (enhanced, default 800)')
+    crawl.add_argument('--time-budget', type=float, help='deadline in seconds for the whole crawl (enhanced)')
+    crawl.add_argument('--spill-threshold', type=positive_int, help='URLs kept in memory before spilling to disk (enhanced)')
+    crawl.add_argument('--no-links', action='store_true', help='do not record the link graph')
+    crawl.add_argument('--stream', choices=('txt', 'jsonl', 'none'), default='txt',
+                       help='how discovered URLs are printed: plain URLs, JSON lines with source and depth, or not at all')
+    crawl.add_argument('--output', default='-', help='file for the URL stream (default: stdout)')
+    crawl.add_argument('--output-dir', default='.', help='directory the sitemap and other exports are written to')
+    crawl.add_argument('--formats', type=parse_formats, help='comma-separated export formats (default: xml)')
+    crawl.set_defaults(func=run_crawl)
+
+    batch = commands.add_parser('batch', help='crawl many sites on one shared worker pool')
+    batch.add_argument('file', help="file with one start URL per line, or - for stdin")
+    batch.add_argument('--concurrency', type=positive_int, default=4, help='sites crawled at once')
+    batch.add_argument('--per-host', type=positive_int, default=4, help='concurrent requests to one host')
+    batch.add_argument('--max-urls', type=positive_int, default=20000, help='URL limit per site')
+    batch.add_argument('--time-budget', type=float, help='seconds per site')
+    batch.add_argument('--no-links', action='store_true', help='do not record the link graph')
+    batch.add_argument('--output-dir', default=f'{EXPORT_DIR}/batch', help='exports go to <dir>/<batch id>/<site>/')
+    batch.add_argument('--formats', type=parse_formats, help='comma-separated export formats (default: all)')
+    batch.add_argument('--progress-interval', type=float, default=5, help='seconds between progress lines, 0 = none')
+    batch.set_defaults(func=run_batch)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'engine', None) == 'simple':
+        enhanced_only = [flag for flag, value in (('--concurrency', args.concurrency != 8), ('--max-fetches', args.max_fetches),
+                                                  ('--time-budget', args.time_budget), ('--spill-threshold', args.spill_threshold))
+                         if value]
+        if enhanced_only:
+            parser.error(f"{', '.join(enhanced_only)} require --engine enhanced")
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr)
+    if not args.verbose:
+        logging.getLogger('urllib3').setLevel(logging.ERROR)  # Connection retries are expected while probing
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,39 @@
+# Deployment settings shared by the web app, the crawlers and the CLI; no Flask import
+import os
+
+# Starting timeouts (seconds) per request kind; per-host latency history
+# takes over after a few responses (see adaptive_timeouts.py)
+TIMEOUT_SETTINGS = {
+    "sitemap_check": 1.5,
+    "feed_check": 2,
+    "pattern_analysis": 3,
+    "deep_crawl": 1,
+    "robots_txt": 2,
+    "subdomain_probe": 2,
+    "blog_discovery": 3
+}
+
+# Production configuration
+PRODUCTION_CONFIG = {
+    "TIMEOUT_SETTINGS": TIMEOUT_SETTINGS,
+    "CRAWLING_LIMITS": {
+        "max_urls": int(os.environ.get("MAX_URLS", 20000)),  # Default per crawl
+        "max_urls_limit": int(os.environ.get("MAX_URLS_LIMIT", 1000000)),  # Highest value a request may ask for
+        "max_deep_crawl": 500,
+        "max_subdomains": 10,
+        "max_job_workers": int(os.environ.get("MAX_JOB_WORKERS", 4)),  # Worker processes per distributed crawl
+        "time_budget": float(os.environ.get("TIME_BUDGET", 0)) or None,  # Default seconds per crawl, unset = no deadline
+        "max_time_budget": float(os.environ.get("MAX_TIME_BUDGET", 1200)),  # Highest value a request may ask for
+        "max_batch_urls": int(os.environ.get("MAX_BATCH_URLS", 500)),  # Start URLs per batch request
+        "batch_concurrency": int(os.environ.get("BATCH_CONCURRENCY", 4)),  # Sites crawled at once across all batches
+        "batch_per_host": int(os.environ.get("BATCH_PER_HOST", 4))  # Concurrent requests to one host across all batches
+    },
+    "MEMORY_SETTINGS": {
+        "cleanup_interval": 300,  # 5 minutes
+        "session_lifetime": 1200,  # 20 minutes
+        "max_concurrent_sessions": 5,
+        "spill_threshold": int(os.environ.get("SPILL_THRESHOLD", 50000)),  # URLs kept in RAM before spilling to disk
+        "result_cache_ttl": int(os.environ.get("RESULT_CACHE_TTL", 600)),  # Seconds a finished crawl is served to repeat requests
+        "result_cache_max_mb": int(os.environ.get("RESULT_CACHE_MAX_MB", 64))  # Estimated memory of cached results
+    }
+}
@@ -4,14 +4,18 @@ from urllib.parse import urljoin, urlparse, urlunparse
 from urllib import robotparser
 import time
 import logging
+import threading
 import xml.etree.ElementTree as ET
-from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from metrics import CrawlStats, GLOBAL_STATS
+from http_pool import SharedPoolAdapter
+from js_routes import script_routes
+from link_graph import LinkGraph
 
 logger = logging.getLogger(__name__)
 
 class Crawler:
-    def __init__(self, start_url):
+    def __init__(self, start_url, record_links=True):
         self.start_url = self._normalize_url(start_url)
         self.domain = urlparse(self.start_url).netloc
         self.urls = set()
@@ -19,15 +23,22 @@ class Crawler:
         self.crawled_urls = 0
         self.total_urls = 0
         self.url_data = {}  # Store URL and title pairs
+        self.link_graph = LinkGraph() if record_links else None  # Page links for priorities and graph exports
+        self.lock = threading.Lock()  # Guards visited for readers on other threads (exports)
+        self.on_url = None  # Optional callback(url, source, depth) per URL added to visited
         self.max_depth = 6
         self.max_urls = 15000
-        self.session = self._create_session()
         self.save_interval = 100  # Save progress every 100 URLs
         self.backup_file = f"crawler_backup_{self.domain}.json"
         
         # Initialize robots.txt parser (don't read during init)
         self.robot_parser = None
         self.robots_url = urljoin(self.start_url, '/robots.txt')
+        
+        # Instrumentation
+        self.stats = CrawlStats(parent=GLOBAL_STATS)
+        self.phase_timings = {}
+        self.session = self._create_session()
     
     def _normalize_url(self, url):
         """Normalize URL by ensuring it has a protocol"""
@@ -43,7 +54,7 @@ class Crawler:
             backoff_factor=1,
             status_forcelist=[429, 500, 502, 503, 504],
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = SharedPoolAdapter(stats=self.stats, max_retries=retry_strategy)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         session.headers.update({
@@ -51,10 +62,30 @@ class Crawler:
         })
         return session
 
+    def _get(self, url, **kwargs):
+        """session.get with fetch instrumentation"""
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+        except requests.exceptions.Timeout:
+            self.stats.record_fetch('timeout', 0, time.perf_counter() - start)
+            raise
+        except requests.RequestException:
+            self.stats.record_fetch('error', 0, time.perf_counter() - start)
+            raise
+        self.stats.record_fetch(response.status_code, len(response.content), time.perf_counter() - start)
+        return response
+    
+    def _record_phase(self, name, start):
+        elapsed = time.time() - start
+        self.phase_timings[name] = round(elapsed, 3)
+        self.stats.record_phase(name, elapsed)
+
     def crawl(self):
         """Main crawling method"""
         self.urls.add(self.start_url)
         self.total_urls = 1
+        phase_start = time.time()
 
         # Check for existing sitemaps
         sitemap_urls = [
@@ -76,9 +107,11 @@ class Crawler:
                 if len(self.visited) < self.max_urls:
                     self.visited.add(url)
                     self.crawled_urls += 1
+                    if self.on_url is not None:
+                        self.on_url(url, 'sitemap', None)
                     # Extract title for sitemap URLs
                     try:
-                        response = self.session.get(url, timeout=10)
+                        response = self._get(url, timeout=10)
                         if response.status_code == 200:
                             title = self._extract_title(response.text)
                             self.url_data[url] = title
@@ -88,6 +121,9 @@ class Crawler:
             # Continue with manual crawling even if we have sitemap URLs
             logger.info(f"Sitemap phase completed. Starting deep crawling from {len(self.visited)} URLs")
         
+        self._record_phase('sitemaps', phase_start)
+        phase_start = time.time()
+        
         # Use ALL sitemap URLs as starting points for aggressive crawling
         if len(self.visited) > 1:
             # Use all sitemap URLs for comprehensive crawling
@@ -105,14 +141,17 @@ class Crawler:
                 if url not in self.visited and self._can_crawl(url):
                     try:
                         logger.info(f"Crawling: {url} (depth: {depth})")
-                        response = self.session.get(url, timeout=15, allow_redirects=True)
+                        response = self._get(url, timeout=15, allow_redirects=True)
                         
                         if response.status_code == 200:
                             self.visited.add(url)
                             self.crawled_urls += 1
+                            if self.on_url is not None:
+                                self.on_url(url, 'link', depth)
                             
                             # Extract page title
-                            title = self._extract_title(response.text)
+                            with self.stats.timer('title'):
+                                title = self._extract_title(response.text)
                             self.url_data[url] = title
                             
                             # Save backup periodically
@@ -121,7 +160,8 @@ class Crawler:
                             
                             # Parse links only if we haven't reached max depth
                             if depth < self.max_depth - 1:
-                                new_urls = self.parse_links(response.text, url)
+                                with self.stats.timer('links'):
+                                    new_urls = self.parse_links(response.text, url)
                                 next_level_urls.update(new_urls)
                                 
                         elif response.status_code in [301, 302, 303, 307, 308]:
@@ -140,10 +180,12 @@ class Crawler:
                         
                     # Update total URLs count
                     self.total_urls = len(self.visited) + len(next_level_urls)
+                    self.stats.set_queue_depth(len(next_level_urls))
                     
             current_level_urls = next_level_urls
             depth += 1
             
+        self._record_phase('crawl', phase_start)
         logger.info(f"Crawling completed. Found {len(self.visited)} URLs at depth {depth}")
         # Save final backup
         self._save_backup()
@@ -261,39 +303,22 @@ class Crawler:
                     url = urljoin(base_url, href)
                     parsed_url = urlparse(url)
                     
-                    if self._is_valid_url(parsed_url):
+                    if self._is_valid_url(parsed_url, allow_visited=True):
                         new_urls.add(url)
                         logger.debug(f"Found valid URL: {url}")
                     else:
                         logger.debug(f"Skipped invalid URL: {url}")
             
-            # Enhanced JavaScript and data attribute extraction
-            scripts = soup.find_all('script')
-            for script in scripts:
-                script_text = script.get_text()
-                if script_text:
-                    import re
-                    # Multiple patterns for different URL formats
-                    patterns = [
-                        r'https?://[^\s"\'\)]+' + re.escape(self.domain) + r'[^\s"\'\)]*',
-                        r'["\'](/[^"\']*)["\']',  # Relative URLs
-                        r'href["\s]*:["\s]*["\']([^"\']*)["\']',  # JSON href
-                        r'url["\s]*:["\s]*["\']([^"\']*)["\']',   # JSON url
-                        r'link["\s]*:["\s]*["\']([^"\']*)["\']'   # JSON link
-                    ]
-                    
-                    for pattern in patterns:
-                        js_urls = re.findall(pattern, script_text)
-                        for js_url in js_urls:
-                            try:
-                                if js_url.startswith('/'):
-                                    js_url = urljoin(base_url, js_url)
-                                parsed_url = urlparse(js_url)
-                                if self._is_valid_url(parsed_url):
-                                    new_urls.add(js_url)
-                                    logger.debug(f"Found JS URL: {js_url}")
-                            except:
-                                continue
+            # Routes in inline JavaScript, __NEXT_DATA__ and JSON-LD blocks
+            for js_url in script_routes(soup):
+                try:
+                    js_url = urljoin(base_url, js_url)
+                    parsed_url = urlparse(js_url)
+                    if self._is_valid_url(parsed_url, allow_visited=True):
+                        new_urls.add(js_url)
+                        logger.debug(f"Found JS URL: {js_url}")
+                except:
+                    continue
             
             # Extract from data attributes
             for element in soup.find_all():
@@ -305,7 +330,7 @@ class Crawler:
                                     if value.startswith('/'):
                                         value = urljoin(base_url, value)
                                     parsed_url = urlparse(value)
-                                    if self._is_valid_url(parsed_url):
+                                    if self._is_valid_url(parsed_url, allow_visited=True):
                                         new_urls.add(value)
                                         logger.debug(f"Found data attribute URL: {value}")
                                 except:
@@ -314,9 +339,12 @@ class Crawler:
         except Exception as e:
             logger.error(f"Error parsing links from {base_url}: {str(e)}")
             
-        return new_urls
+        # Links to visited pages still count for priorities, they are just not crawled again
+        if self.link_graph is not None:
+            self.link_graph.add_links(base_url, new_urls)
+        return {url for url in new_urls if url not in self.visited}
 
-    def _is_valid_url(self, parsed_url):
+    def _is_valid_url(self, parsed_url, allow_visited=False):
         """Check if URL is valid for crawling"""
         # Must be same domain
         if parsed_url.netloc != self.domain:
@@ -334,7 +362,7 @@ class Crawler:
             return False
             
         # Skip duplicate URLs (already visited)
-        if parsed_url.geturl() in self.visited:
+        if not allow_visited and parsed_url.geturl() in self.visited:
             return False
             
         # Allow ALL query parameters (remove restrictions for more URLs)
@@ -344,10 +372,11 @@ class Crawler:
     def parse_sitemap(self, sitemap_url):
         """Parse existing sitemap.xml if available"""
         try:
-            response = self.session.get(sitemap_url, timeout=10)
+            response = self._get(sitemap_url, timeout=10)
             if response.status_code == 200:
                 logger.info(f"Found existing sitemap at {sitemap_url}")
-                root = ET.fromstring(response.content)
+                with self.stats.timer('sitemap'):
+                    root = ET.fromstring(response.content)
                 
                 # Handle regular sitemap
                 for url_elem in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}loc'):
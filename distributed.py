@@ -0,0 +1,549 @@
+# Distributed crawl mode: one job's frontier partitioned across worker processes via a queue backend
+import heapq
+import logging
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+import requests
+
+from duplicates import pattern_family
+from enhanced_crawler import EnhancedCrawler
+from frontier import PRIORITY_NORMAL
+from http_pool import SharedPoolAdapter
+from metrics import CrawlStats, GLOBAL_STATS
+
+logger = logging.getLogger(__name__)
+
+PARTITION_MODES = ('url', 'host')
+POLL_INTERVAL = 0.05  # Seconds between queue polls of an idle fetch thread
+
+
+def partition_for(url, partitions, by='url'):
+    """Stable partition of a URL: hash of the whole URL, or of its host to keep hosts on one worker"""
+    key = urlparse(url).netloc if by == 'host' else url
+    return zlib.crc32(key.encode('utf-8')) % partitions
+
+
+class QueueBackend(ABC):
+    """Shared state of a distributed crawl: partitioned queue, global seen-set and results.
+
+    Backends must be usable from several processes at once; workers open
+    their own instance from the same spec string (see open_backend).
+    """
+
+    @abstractmethod
+    def reset(self):
+        """Empty the queue, seen-set, results and flags for a new job"""
+
+    @abstractmethod
+    def claim(self, url, max_urls):
+        """Atomically add url to the seen-set; False if already seen or the job is full"""
+
+    @abstractmethod
+    def seen_count(self):
+        """Number of URLs claimed so far"""
+
+    @abstractmethod
+    def has_seen(self, url):
+        """True if url was claimed"""
+
+    @abstractmethod
+    def put(self, partition, url, priority, source, depth):
+        """Queue url on a partition"""
+
+    @abstractmethod
+    def take(self, partition):
+        """Pop (url, source, depth) from a partition, marking it in flight; None if empty"""
+
+    @abstractmethod
+    def pending(self):
+        """(url, source, depth) of every URL still queued in any partition"""
+
+    @abstractmethod
+    def done(self):
+        """Acknowledge one URL returned by take()"""
+
+    @abstractmethod
+    def queued(self, partition=None):
+        """URLs queued in one partition, or in all of them"""
+
+    @abstractmethod
+    def is_drained(self):
+        """True when no partition has queued or in-flight URLs"""
+
+    @abstractmethod
+    def set_flag(self, name, value):
+        """Store a named boolean shared by all workers"""
+
+    @abstractmethod
+    def get_flag(self, name):
+        """A flag stored with set_flag; False if never set"""
+
+    @abstractmethod
+    def record_result(self, worker, url, status, title, lastmod, source, depth):
+        """Store the outcome of one URL, replacing an earlier row for it"""
+
+    @abstractmethod
+    def results(self, after=0):
+        """Result rows (id, url, status, title, lastmod, source, depth) with id > after"""
+
+    @abstractmethod
+    def worker_progress(self, workers):
+        """Processed, fetched and queued counts per worker"""
+
+    def close(self):
+        pass
+
+
+class SQLiteQueueBackend(QueueBackend):
+    """Local stand-in for a real broker: one SQLite file shared by all worker processes"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS queue (seq INTEGER PRIMARY KEY AUTOINCREMENT, part INTEGER, priority INTEGER,
+                                              url TEXT, source TEXT, depth INTEGER);
+            CREATE INDEX IF NOT EXISTS queue_order ON queue (part, priority, seq);
+            CREATE TABLE IF NOT EXISTS seen (url TEXT PRIMARY KEY) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS results (id INTEGER PRIMARY KEY AUTOINCREMENT, worker INTEGER, url TEXT UNIQUE,
+                                                status TEXT, title TEXT, lastmod TEXT, source TEXT, depth INTEGER);
+            INSERT OR IGNORE INTO counters VALUES ('seen', 0), ('in_flight', 0);
+        ''')
+
+    def _transaction(self, func):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = func(self._conn)
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return result
+
+    def _scalar(self, sql, args=()):
+        with self._lock:
+            row = self._conn.execute(sql, args).fetchone()
+        return row[0] if row else None
+
+    def reset(self):
+        def run(conn):
+            for table in ('queue', 'seen', 'results'):
+                conn.execute(f'DELETE FROM {table}')
+            conn.execute("DELETE FROM counters WHERE name NOT IN ('seen', 'in_flight')")
+            conn.execute('UPDATE counters SET value = 0')
+        self._transaction(run)
+
+    def claim(self, url, max_urls):
+        def run(conn):
+            if conn.execute("SELECT value FROM counters WHERE name = 'seen'").fetchone()[0] >= max_urls:
+                return False
+            if not conn.execute('INSERT OR IGNORE INTO seen VALUES (?)', (url,)).rowcount:
+                return False
+            conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'seen'")
+            return True
+        return self._transaction(run)
+
+    def seen_count(self):
+        return self._scalar("SELECT value FROM counters WHERE name = 'seen'")
+
+    def has_seen(self, url):
+        return self._scalar('SELECT 1 FROM seen WHERE url = ?', (url,)) is not None
+
+    def put(self, partition, url, priority, source, depth):
+        with self._lock:
+            self._conn.execute('INSERT INTO queue (part, priority, url, source, depth) VALUES (?, ?, ?, ?, ?)',
+                               (partition, priority, url, source, depth))
+
+    def take(self, partition):
+        def run(conn):
+            row = conn.execute('SELECT seq, url, source, depth FROM queue WHERE part = ? ORDER BY priority, seq LIMIT 1',
+                               (partition,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('DELETE FROM queue WHERE seq = ?', (row[0],))
+            conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'in_flight'")
+            return row[1:]
+        return self._transaction(run)
+
+    def pending(self):
+        with self._lock:
+            return self._conn.execute('SELECT url, source, depth FROM queue ORDER BY seq').fetchall()
+
+    def done(self):
+        with self._lock:
+            self._conn.execute("UPDATE counters SET value = value - 1 WHERE name = 'in_flight'")
+
+    def queued(self, partition=None):
+        if partition is None:
+            return self._scalar('SELECT COUNT(*) FROM queue')
+        return self._scalar('SELECT COUNT(*) FROM queue WHERE part = ?', (partition,))
+
+    def is_drained(self):
+        def run(conn):
+            in_flight = conn.execute("SELECT value FROM counters WHERE name = 'in_flight'").fetchone()[0]
+            return in_flight == 0 and conn.execute('SELECT 1 FROM queue LIMIT 1').fetchone() is None
+        return self._transaction(run)
+
+    def set_flag(self, name, value):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO counters VALUES (?, ?)', (f'flag:{name}', int(value)))
+
+    def get_flag(self, name):
+        return bool(self._scalar('SELECT value FROM counters WHERE name = ?', (f'flag:{name}',)))
+
+    def record_result(self, worker, url, status, title, lastmod, source, depth):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO results (worker, url, status, title, lastmod, source, depth) '
+                               'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                               (worker, url, None if status is None else str(status), title, lastmod, source, depth))
+
+    def results(self, after=0):
+        with self._lock:
+            return self._conn.execute('SELECT id, url, status, title, lastmod, source, depth FROM results '
+                                      'WHERE id > ? ORDER BY id', (after,)).fetchall()
+
+    def worker_progress(self, workers):
+        with self._lock:
+            done = dict(((w, (n, f)) for w, n, f in self._conn.execute(
+                'SELECT worker, COUNT(*), COUNT(status) FROM results GROUP BY worker')))
+            queued = dict(self._conn.execute('SELECT part, COUNT(*) FROM queue GROUP BY part').fetchall())
+        return [{'worker': i, 'processed': done.get(i, (0, 0))[0], 'fetched': done.get(i, (0, 0))[1],
+                 'queued': queued.get(i, 0)} for i in range(workers)]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_backend(spec):
+    """Open a queue backend from its spec string, e.g. 'sqlite:///tmp/crawl.db'"""
+    if spec.startswith('sqlite://'):
+        return SQLiteQueueBackend(spec[len('sqlite://'):])
+    raise ValueError(f"Unsupported queue backend {spec!r}")
+
+
+class DistributedFrontier:
+    """Frontier interface over a queue backend; reads one partition, writes to all"""
+
+    def __init__(self, backend, partition, partitions, partition_by, discovery):
+        self.backend = backend
+        self.partition = partition
+        self.partitions = partitions
+        self.partition_by = partition_by
+        self.discovery = discovery  # Worker's url -> (source, depth), filled in on take
+        self._delayed = []  # (due time, priority, url) of this worker's pending retries
+        self._delayed_lock = threading.Lock()
+
+    def put(self, url, priority=PRIORITY_NORMAL, source='link', depth=None):
+        self.backend.put(partition_for(url, self.partitions, self.partition_by), url, priority, source, depth)
+
+    def put_later(self, url, priority=PRIORITY_NORMAL, delay=0):
+        """Retry url on this worker after delay seconds.
+
+        The URL is held locally and goes back to this worker's own partition,
+        so it cannot land on a worker that already saw the queue drained.
+        """
+        with self._delayed_lock:
+            heapq.heappush(self._delayed, (time.monotonic() + delay, priority, url))
+
+    def _release_due(self):
+        now = time.monotonic()
+        with self._delayed_lock:
+            while self._delayed and self._delayed[0][0] <= now:
+                _, priority, url = heapq.heappop(self._delayed)
+                source, depth = self.discovery.get(url, (None, None))
+                self.backend.put(self.partition, url, priority, source, depth)
+
+    def get(self, timeout=None):
+        deadline = time.time() + (timeout or 0)
+        while True:
+            self._release_due()
+            item = self.backend.take(self.partition)
+            if item is not None:
+                url, source, depth = item
+                self.discovery[url] = (source, depth)
+                return url
+            if time.time() >= deadline:
+                return None
+            time.sleep(POLL_INTERVAL)
+
+    def task_done(self):
+        self.backend.done()
+
+    def drain(self):
+        """Hand pending retries back to the backend; the coordinator reports what is left"""
+        with self._delayed_lock:
+            for _, priority, url in self._delayed:
+                source, depth = self.discovery.get(url, (None, None))
+                self.backend.put(self.partition, url, priority, source, depth)
+            self._delayed = []
+        return []
+
+    def is_drained(self):
+        with self._delayed_lock:
+            if self._delayed:
+                return False
+        return self.backend.is_drained()
+
+    def __len__(self):
+        return self.backend.queued(self.partition) + len(self._delayed)
+
+
+class SharedSeenSet:
+    """Read side of the backend's global seen-set; writes go through claim()"""
+
+    probabilistic = False
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __contains__(self, url):
+        return self.backend.has_seen(url)
+
+    def __len__(self):
+        return self.backend.seen_count()
+
+
+class DistributedWorker(EnhancedCrawler):
+    """EnhancedCrawler working on one partition of a shared frontier.
+
+    Worker 0 also runs the discovery producers; every worker fetches its own
+    partition and pushes discovered links to whichever partition owns them.
+    """
+
+    def __init__(self, start_url, backend, index, workers, partition_by='url', max_urls=20000, time_budget=None,
+                 spill_threshold=None):
+        # Each process sees only its partition's links, so none are recorded
+        super().__init__(start_url, max_urls=max_urls, spill_threshold=spill_threshold, time_budget=time_budget,
+                         record_links=False)
+        self.backend = backend
+        self.index = index
+        self.workers = workers
+        self.seen = SharedSeenSet(backend)
+        self.frontier = DistributedFrontier(backend, index, workers, partition_by, self.discovery)
+        # Fetch budgets are per job; split them across the workers
+        self.max_fetches = -(-self.max_fetches // workers)
+        self.max_link_pages = -(-self.max_link_pages // workers)
+
+    def _add_url(self, url, priority=PRIORITY_NORMAL, source='link', depth=None):
+        """Claim the URL in the shared seen-set, then queue it on its partition"""
+        if source == 'pattern' and self.dead_families and pattern_family(url) in self.dead_families:
+            return False
+        if not self.backend.claim(url, self.max_urls):
+            return False
+        with self.lock:
+            if self.first_result_time is None:
+                self.first_result_time = round(time.time() - self.crawl_start, 3)
+        self.frontier.put(url, priority, source, depth)
+        if self.on_url is not None:
+            self.on_url(url, source, depth)
+        return True
+
+    def _producers_running(self):
+        if self.index != 0:
+            return not self.backend.get_flag('producers_done')
+        running = super()._producers_running()
+        if not running:
+            self.backend.set_flag('producers_done', True)
+        return running
+
+    def _settle(self, url):
+        super()._settle(url)
+        source, depth = self.discovery.get(url, (None, None))
+        self.backend.record_result(self.index, url, self.status.get(url), self.url_data.get(url),
+                                   self.lastmod.get(url), source, depth)
+
+    def _replace_canonical(self, old, new):
+        super()._replace_canonical(old, new)
+        self._settle(old)
+
+    def _mark_soft_404s(self):
+        urls = super()._mark_soft_404s()
+        for url in urls:
+            # Replaces the result row recorded when the page was settled
+            self._settle(url)
+        return urls
+
+    def crawl(self):
+        if self.index == 0:
+            return super().crawl()
+        self.crawl_start = time.time()
+        if self.time_budget:
+            self.deadline = self.crawl_start + self.time_budget
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{self.thread_prefix}-fetch") as fetch_pool:
+            workers = [fetch_pool.submit(self._fetch_worker) for _ in range(self.max_workers)]
+            with self._timed_phase('fetch'):
+                wait(workers)
+        self.frontier.drain()
+        logger.info(f"Worker {self.index} done: {len(self.visited)} URLs processed")
+
+
+def run_worker(start_url, backend_spec, index, workers, partition_by, max_urls, deadline=None, spill_threshold=None):
+    """Entry point of a worker process; deadline is the job's wall-clock end, if any"""
+    logging.basicConfig(level=logging.INFO)
+    backend = open_backend(backend_spec)
+    # Process start-up already used part of the job's time budget
+    time_budget = max(0.001, deadline - time.time()) if deadline else None
+    worker = None
+    try:
+        worker = DistributedWorker(start_url, backend, index, workers, partition_by, max_urls, time_budget,
+                                   spill_threshold)
+        worker.crawl()
+    finally:
+        # The coordinator waits for this flag, not for the process to exit
+        backend.set_flag(f'worker_done:{index}', True)
+        if worker is not None:
+            # Spilled visited and metadata stores; the results are already in the backend
+            worker.close()
+        backend.close()
+
+
+class DistributedCrawl:
+    """Coordinator of one distributed crawl job.
+
+    Starts the worker processes and merges their results, exposing the same
+    attributes the app and the exporters read from an EnhancedCrawler.
+    """
+
+    def __init__(self, start_url, workers=2, backend=None, partition_by='url', max_urls=20000, time_budget=None,
+                 spill_threshold=None):
+        if partition_by not in PARTITION_MODES:
+            raise ValueError(f"Unknown partition mode {partition_by!r}, use one of: {', '.join(PARTITION_MODES)}")
+        if not start_url.startswith(('http://', 'https://')):
+            start_url = 'https://' + start_url
+        self.start_url = start_url
+        self.domain = urlparse(start_url).netloc
+        self.workers = workers
+        self.partition_by = partition_by
+        self.max_urls = max_urls
+        self.time_budget = time_budget
+        self.spill_threshold = spill_threshold  # Per worker process
+        self.deadline = None
+        self.crawl_end = None
+        self.skipped = Counter()
+        self.cut_short = set()  # Not tracked across processes
+        self._own_db = None
+        if backend is None:
+            fd, self._own_db = tempfile.mkstemp(prefix='crawl-queue-', suffix='.sqlite')
+            os.close(fd)
+            backend = f"sqlite://{self._own_db}"
+        self.backend_spec = backend
+        self.backend = open_backend(backend)
+        self.backend.reset()
+
+        self.lock = threading.Lock()
+        self.visited = set()
+        self.url_data = {}
+        self.lastmod = {}
+        self.discovery = {}
+        self.status = {}
+        self.validators = {}
+        self.crawled_urls = 0
+        self.total_urls = 0
+        self.unchanged = 0
+        self.previous_pages = {}
+        self.stats = CrawlStats(parent=GLOBAL_STATS)
+        self.phase_timings = {}
+        self.crawl_start = None
+        self.first_result_time = None
+        self.thread_prefix = f"crawl-{id(self):x}"
+        self.session = requests.Session()
+        self.session.mount('http://', SharedPoolAdapter(stats=self.stats))
+        self.session.mount('https://', SharedPoolAdapter(stats=self.stats))
+        self._merged_id = 0
+        self._processes = []
+
+    def crawl(self):
+        self.crawl_start = time.time()
+        if self.time_budget:
+            self.deadline = self.crawl_start + self.time_budget
+        ctx = multiprocessing.get_context('spawn')
+        self._processes = [
+            ctx.Process(target=run_worker, name=f"{self.thread_prefix}-worker-{i}",
+                        args=(self.start_url, self.backend_spec, i, self.workers, self.partition_by, self.max_urls,
+                              self.deadline, self.spill_threshold))
+            for i in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+        while not self._workers_finished():
+            self._merge()
+            time.sleep(1)
+        for process in self._processes:
+            # Import-time threads of the parent's main module can keep a finished worker alive
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+        self._merge()
+        self.crawl_end = time.time()
+        if self.deadline:
+            # URLs the deadline left queued stay in the sitemap unfetched, as in EnhancedCrawler
+            with self.lock:
+                for url, source, depth in self.backend.pending():
+                    self.visited.add(url)
+                    self.discovery.setdefault(url, (source, depth))
+                    self.skipped[source] += 1
+
+        # Descriptive titles for URLs that were never fetched, as EnhancedCrawler does
+        for url in self.visited:
+            if not self.url_data.get(url):
+                self.url_data[url] = EnhancedCrawler._readable_title(url, "Sayfa")
+        duration = round(time.time() - self.crawl_start, 3)
+        self.phase_timings['crawl'] = {'start': 0.0, 'end': duration, 'duration': duration}
+        self.stats.record_phase('crawl', duration)
+        logger.info(f"Distributed crawl completed. Found {len(self.visited)} URLs with {self.workers} workers")
+
+    def _workers_finished(self):
+        # A worker that died without setting its flag counts as finished too
+        return all(self.backend.get_flag(f'worker_done:{i}') or not process.is_alive()
+                   for i, process in enumerate(self._processes))
+
+    def _merge(self):
+        """Pull new worker results into the merged view"""
+        rows = self.backend.results(self._merged_id)
+        with self.lock:
+            for row_id, url, status, title, lastmod, source, depth in rows:
+                self.visited.add(url)
+                if title:
+                    self.url_data[url] = title
+                if lastmod:
+                    self.lastmod[url] = lastmod
+                self.status[url] = int(status) if status and status.isdigit() else status
+                self.discovery[url] = (source, depth)
+                self._merged_id = row_id
+            if rows and self.first_result_time is None:
+                self.first_result_time = round(time.time() - self.crawl_start, 3)
+            self.crawled_urls = sum(1 for status in self.status.values() if status is not None)
+        self.stats.set_queue_depth(self.backend.queued())
+
+    def worker_progress(self):
+        return self.backend.worker_progress(self.workers)
+
+    budget_report = EnhancedCrawler.budget_report
+
+    def close(self):
+        for process in self._processes:
+            if process.is_alive():
+                process.kill()
+        self.backend.close()
+        if self._own_db:
+            for suffix in ('', '-wal', '-shm'):
+                try:
+                    os.remove(self._own_db + suffix)
+                except OSError:
+                    pass
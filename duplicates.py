@@ -0,0 +1,155 @@
+# Duplicate page detection: exact content hashes, simhash near-duplicates and soft-404 signatures
+import hashlib
+import heapq
+import re
+import threading
+from urllib.parse import urlparse, parse_qsl
+
+MAX_DISTANCE = 3  # Simhash bits two pages may differ in and still count as the same page
+MIN_WORDS = 30  # Pages with less text (JS shells, stubs) are never collapsed
+MAX_FEATURES = 256  # Shingles kept per page (bottom-k by hash) for the simhash
+SHINGLE_WORDS = 3
+BANDS = 4  # 64-bit simhash split in 16-bit bands; within MAX_DISTANCE one band always matches
+
+# Statuses of pages left out of the sitemap and exports; 'unconfirmed' is a
+# guessed URL that did not answer 200 or 304
+EXCLUDED_STATUSES = ('duplicate', 'soft404', 'pruned', 'unconfirmed')
+
+_SKIPPED_BLOCKS = re.compile(r'<(script|style|noscript|template)\b.*?</\1\s*>|<!--.*?-->', re.I | re.S)
+_TAGS = re.compile(r'<[^>]+>')
+_WORDS = re.compile(r'\w+')
+_MASK64 = (1 << 64) - 1
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'little')
+
+
+def page_words(html):
+    """Lower-cased words of the visible text, without markup, scripts and styles.
+
+    Bare numbers are dropped: timestamps, counters and view counts change
+    between renders of the same page.
+    """
+    text = _TAGS.sub(' ', _SKIPPED_BLOCKS.sub(' ', html)).lower()
+    return [word for word in _WORDS.findall(text) if not word.isdigit()]
+
+
+def simhash(words):
+    """64-bit simhash over word shingles; near-identical texts differ in few bits.
+
+    Shingles are hashed with the built-in hash(), so values are only
+    comparable within one process (each crawl keeps its own detector).
+    """
+    shingles = set(zip(*(words[i:] for i in range(SHINGLE_WORDS)))) or {tuple(words)}
+    features = heapq.nsmallest(MAX_FEATURES, (hash(shingle) & _MASK64 for shingle in shingles))
+    half = len(features) / 2
+    result = 0
+    # Majority vote per bit, most significant first; str.count runs the inner loop in C
+    for column in zip(*(format(h, '064b') for h in features)):
+        result = (result << 1) | (column.count('1') > half)
+    return result
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _bands(value):
+    return [(i, (value >> (16 * i)) & 0xFFFF) for i in range(BANDS)]
+
+
+def url_preference(url):
+    """Sort key of the URL a group of identical pages is listed under: no query, then shortest"""
+    return ('?' in url, len(url), url)
+
+
+def pattern_family(url):
+    """Template a guessed URL came from: /blog/page/7/ and /blog/page/8/ share a family"""
+    parts = urlparse(url)
+    if parts.query:
+        keys = '&'.join(sorted(key for key, _ in parse_qsl(parts.query, keep_blank_values=True)))
+        return f"{parts.netloc}{parts.path}?{keys}"
+    segments = parts.path.rstrip('/').split('/')
+    segments[-1] = '*'
+    return parts.netloc + '/'.join(segments)
+
+
+class DuplicateDetector:
+    """Fingerprints of the pages of one crawl.
+
+    check() answers whether a page repeats one seen before (same normalized
+    text, or a simhash within MAX_DISTANCE bits) or matches its host's
+    soft-404 page. Of identical pages the one with the cleanest URL (see
+    url_preference) stays listed. Thread-safe.
+    """
+
+    def __init__(self, max_distance=MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._exact = {}  # text hash -> first URL with that text
+        self._bands = [{} for _ in range(BANDS)]  # band value -> [(simhash, url)]
+        self._soft_404 = {}  # host -> simhashes of its "not found" page
+        self._pages = {}  # url -> simhash of every page kept
+        self._replaced = {}  # former canonical URL -> the cleaner URL that took its place
+        self._lock = threading.Lock()
+
+    def _fingerprint(self, html):
+        words = page_words(html)
+        if len(words) < MIN_WORDS:
+            return None
+        return _hash64(' '.join(words)), simhash(words)
+
+    def _is_soft_404(self, url, value):
+        return any(hamming(value, signature) <= self.max_distance
+                   for signature in self._soft_404.get(urlparse(url).netloc, ()))
+
+    def _near(self, value):
+        for band, key in _bands(value):
+            for other, url in self._bands[band].get(key, ()):
+                if hamming(value, other) <= self.max_distance:
+                    return url
+        return None
+
+    def check(self, url, html):
+        """Classify a fetched page.
+
+        Returns ('duplicate', canonical URL), ('soft404', None), or
+        (None, replaced) for a page to keep, where replaced is the URL of an
+        identical page it now stands in for (usually None).
+        """
+        fingerprint = self._fingerprint(html)
+        if fingerprint is None:
+            return None, None
+        digest, value = fingerprint
+        with self._lock:
+            if self._is_soft_404(url, value):
+                return 'soft404', None
+            canonical = self._exact.get(digest) or self._near(value)
+            while canonical in self._replaced:
+                canonical = self._replaced[canonical]
+            if canonical == url:
+                return None, None
+            if canonical is not None and url_preference(canonical) <= url_preference(url):
+                return 'duplicate', canonical
+            if canonical is not None:
+                self._replaced[canonical] = url
+                self._pages.pop(canonical, None)
+            self._exact[digest] = url
+            self._pages[url] = value
+            for band, key in _bands(value):
+                self._bands[band].setdefault(key, []).append((value, url))
+        return None, canonical
+
+    def add_soft_404(self, url, html):
+        """Remember the page url's host serves (with status 200) for URLs that do not exist"""
+        fingerprint = self._fingerprint(html)
+        if fingerprint is None:
+            return False
+        with self._lock:
+            self._soft_404.setdefault(urlparse(url).netloc, []).append(fingerprint[1])
+        return True
+
+    def soft_404_pages(self):
+        """Kept pages that match a soft-404 page learned after they were checked"""
+        with self._lock:
+            return [url for url, value in self._pages.items() if self._is_soft_404(url, value)]
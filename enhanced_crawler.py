@@ -1,18 +1,51 @@
 import requests
 import time
 import logging
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, urldefrag
 from bs4 import BeautifulSoup
 import xml.etree.ElementTree as ET
 from urllib.robotparser import RobotFileParser
+import random
 import re
-from requests.adapters import HTTPAdapter
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from urllib3.util.retry import Retry
+from frontier import Frontier, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from metrics import CrawlStats, GLOBAL_STATS
+from incremental import sitemap_entries, is_newer, http_date_to_lastmod
+from title_extractor import TitleExtractor
+from http_pool import SharedPoolAdapter
+from seen_set import ExactSeenSet
+from spill_store import SpillingDict, SpillingFrontier, SpillingSeenSet
+from adaptive_timeouts import TIMEOUT_POLICY
+from duplicates import EXCLUDED_STATUSES, DuplicateDetector, pattern_family
+from link_graph import LinkGraph
+from js_routes import extract_routes, script_routes, string_literals
+from feeds import (COMMON_FEED_PATHS, MAX_FEED_PAGES, CHUNK_SIZE, page_feeds_and_json_ld, xml_feed_entries,
+                   json_feed_entries, wordpress_page)
 
 logger = logging.getLogger(__name__)
 
+MAX_FETCH_RETRIES = 2  # Extra attempts for a page that timed out or got 429/5xx
+RETRY_BACKOFF = 1.0  # Seconds before the first retry, doubled per attempt
+MAX_RETRY_AFTER = 30  # Longest Retry-After (seconds) honoured
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+LOW_YIELD_CUTOFF = 0.25  # Share of the time budget left when guessed URLs stop being fetched
+MIN_REQUEST_TIMEOUT = 0.1  # Shortest timeout a request gets near the deadline
+FAMILY_MIN_FETCHES = 5  # Guessed URLs of one pattern family fetched before judging it
+FAMILY_DEAD_RATIO = 0.8  # Share of useless results (duplicates, soft-404s, errors) that ends a family
+PAGE_CACHE_SIZE = 32  # Fetched homepages kept for the producers that analyse them, see _get_cached
+
+
+class DeadlineExceeded(requests.exceptions.RequestException):
+    """Raised instead of starting a request once the crawl's time budget is spent"""
+
+
 class EnhancedCrawler:
-    def __init__(self, start_url):
+    def __init__(self, start_url, previous_pages=None, seen_set=None, max_urls=20000, spill_threshold=None,
+                 time_budget=None, record_links=True):
         self.start_url = self._normalize_url(start_url)
         self.domain = urlparse(self.start_url).netloc
         # For subdomain discovery, use the main domain as base
@@ -30,13 +63,23 @@ class EnhancedCrawler:
                 self.base_domain = self.domain  # Use full domain as base
         else:
             self.base_domain = self.domain
-        self.visited = set()
+        # Past spill_threshold URLs the frontier, visited store and per-URL metadata move to local disk
+        self.spill_threshold = spill_threshold
+        # URL dedup runs against self.seen. By default it is the exact visited set
+        # (an exact seen_set only selects that default, so it spills like it);
+        # with a probabilistic seen-set (see seen_set.make_seen_set) only URLs that
+        # make it into the sitemap are stored exactly in self.visited.
+        if seen_set is None or not seen_set.probabilistic:
+            self.visited = self._url_store()
+            self.seen = self.visited
+        else:
+            self.visited = self._url_store()
+            self.seen = seen_set
         self.crawled_urls = 0
         self.total_urls = 0
-        self.url_data = {}
+        self.url_data = self._url_map()
         self.max_depth = 8  # Deeper crawling
-        self.max_urls = 20000  # Higher limit
-        self.session = self._create_session()
+        self.max_urls = max_urls
         
         # Subdomain discovery
         self.discovered_subdomains = set()
@@ -50,6 +93,78 @@ class EnhancedCrawler:
         self.url_patterns = []
         self.discovered_patterns = set()
         
+        # Crawl pipeline: producers feed one frontier drained by one fetch pool
+        self.max_workers = 8  # Concurrent page fetches
+        self.max_fetches = 800  # Pages fetched for titles
+        self.max_link_pages = 300  # Pages whose links are followed
+        self.frontier = SpillingFrontier(spill_threshold) if spill_threshold else Frontier()
+        self.lock = threading.Lock()
+        self.fetched = 0
+        self.link_pages = 0
+        self._pending_producers = 0
+        self._producer_pool = None
+        self._subdomains_done = threading.Event()
+        self._page_cache = {}  # url -> Future of its response, see _get_cached
+        # Per-host adaptive timeouts; failed pages are requeued with backoff
+        # instead of retried inline, so a fetch slot never sleeps
+        self.timeouts = TIMEOUT_POLICY
+        self.attempts = {}  # url -> retries scheduled so far
+        self._retry_pending = {}  # url -> follow_links of its first attempt
+        self.retried = 0
+        
+        # Optional time budget in seconds shared by all phases; see budget_report()
+        self.time_budget = time_budget
+        self.deadline = None
+        self.crawl_end = None
+        self.skipped = Counter()  # discovery source -> URLs left unfetched by the deadline
+        self.cut_short = set()  # Producers still running at the deadline
+        
+        # Content fingerprints collapse pages served under several URLs; guessed
+        # URL families that only yield duplicates or errors stop being fetched
+        self.duplicates = DuplicateDetector()
+        self.duplicate_of = {}  # url -> URL of the first page with the same content
+        self.family_results = {}  # pattern family -> [fetched, useless]
+        self.dead_families = set()
+        self.thread_prefix = f"crawl-{id(self):x}"  # Names the pool threads of this job
+        self.host_limiter = None  # Optional batch.HostLimiter shared with other crawls
+        self.on_url = None  # Optional callback(url, source, depth) per newly discovered URL, from any thread
+        
+        # Incremental recrawl: pages of the previous crawl (see incremental.load_snapshot)
+        self.previous_pages = previous_pages or {}
+        self.lastmod = self._url_map()  # url -> lastmod carried into the sitemap
+        self.upstream_lastmod = self._url_map()  # url -> <lastmod> published in the site's sitemaps
+        self.validators = self._url_map()  # url -> ETag / Last-Modified of the last 200 response
+        self._held_previous = {}  # host -> previous URLs waiting for its sitemaps, see _seed_previous_pages
+        self.unchanged = 0
+        
+        # Export metadata: url -> (source, link depth or None) and url -> fetch outcome
+        self.discovery = self._url_map()
+        self.status = self._url_map()
+        # Page links, including ones to already-known pages: sitemap priorities and
+        # the edge-list/CSR exports come from it. None when record_links is off.
+        self.link_graph = LinkGraph() if record_links else None
+        
+        # Per-phase timings in seconds relative to crawl start
+        self.stats = CrawlStats(parent=GLOBAL_STATS)
+        self.title_extractor = TitleExtractor(self.domain, stats=self.stats)
+        self.crawl_start = None
+        self.phase_timings = {}
+        self.first_result_time = None
+        self.session = self._create_session()
+        
+    def _url_store(self):
+        return SpillingSeenSet(self.spill_threshold) if self.spill_threshold else ExactSeenSet()
+    
+    def _url_map(self):
+        return SpillingDict(self.spill_threshold) if self.spill_threshold else {}
+    
+    def close(self):
+        """Release disk-backed crawl state; the results are gone afterwards"""
+        for store in (self.frontier, self.visited, self.seen, self.discovery, self.status, self.url_data,
+                      self.lastmod, self.upstream_lastmod, self.validators):
+            if hasattr(store, 'close'):
+                store.close()
+    
     def _normalize_url(self, url):
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
@@ -64,12 +179,12 @@ class EnhancedCrawler:
         
     def _create_session(self):
         session = requests.Session()
-        retry_strategy = Retry(
-            total=2,  # Reduced retries
-            backoff_factor=0.5,  # Faster backoff
-            status_forcelist=[429, 500, 502, 503, 504],
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # One immediate retry for connection failures only; timeouts and 429/5xx
+        # pages are retried later through the frontier (see _schedule_retry)
+        retry_strategy = Retry(total=1, read=False, backoff_factor=0)
+        # Connections come from the process-wide pool, so later jobs reuse them;
+        # its per-host size must fit the fetch workers plus the concurrent producers
+        adapter = SharedPoolAdapter(stats=self.stats, max_retries=retry_strategy)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         session.headers.update({
@@ -82,31 +197,599 @@ class EnhancedCrawler:
         return session
         
     def crawl(self):
-        """Enhanced crawling with subdomain discovery and multiple discovery methods"""
-        self.visited.add(self.start_url)
+        """Enhanced crawling with subdomain discovery and multiple discovery methods.
         
-        # Phase 1: Subdomain discovery
-        self._discover_subdomains()
+        Discovery producers (subdomain probing, sitemap ingestion, blog discovery,
+        pattern generation) run concurrently and feed one frontier, which a shared
+        pool of fetch workers drains while extracting further links.
+        """
+        self.crawl_start = time.time()
+        if self.time_budget:
+            self.deadline = self.crawl_start + self.time_budget
+        self._add_url(self.start_url, PRIORITY_HIGH, source='start', depth=0)
+        self._seed_previous_pages()
         
-        # Phase 2: Discover URL patterns from homepage
-        self._discover_url_patterns()
+        with ThreadPoolExecutor(max_workers=4, thread_name_prefix=f"{self.thread_prefix}-producer") as producer_pool, \
+                ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{self.thread_prefix}-fetch") as fetch_pool:
+            self._producer_pool = producer_pool
+            
+            # Main domain producers start immediately, subdomains are added as found
+            self._submit_producer('subdomains', self._discover_subdomains)
+            self._schedule_domain(self.start_url)
+            self._schedule_previous_hosts()
+            self._submit_producer('patterns', self._pattern_producer)
+            
+            workers = [fetch_pool.submit(self._fetch_worker) for _ in range(self.max_workers)]
+            with self._timed_phase('fetch'):
+                wait(workers)
+        
+        self.crawl_end = time.time()
+        self._mark_soft_404s()
+        if self.deadline:
+            self._skip_remaining()
+        self._finalize_titles()
+        self._page_cache.clear()
+        if hasattr(self.frontier, 'close'):
+            self.frontier.close()
+        
+        logger.info(f"Enhanced crawling completed. Found {len(self.visited)} URLs across {len(self.allowed_subdomains)} domains")
+        logger.info(f"Phase timings: {self.phase_timings}")
+    
+    def _time_left(self):
+        """Seconds until the deadline, or None without a time budget"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.time()
+    
+    def _expired(self):
+        return self.deadline is not None and time.time() >= self.deadline
+    
+    def _low_yield(self, url):
+        """Guessed URLs are dropped once little of the time budget is left"""
+        if self.deadline is None or self.discovery.get(url, (None, None))[0] != 'pattern':
+            return False
+        return self._time_left() < self.time_budget * LOW_YIELD_CUTOFF
+    
+    def _skip_remaining(self):
+        """Take the URLs the deadline left in the frontier; all but guesses stay in the sitemap unfetched"""
+        for url in self.frontier.drain():
+            with self.lock:
+                self.skipped[self.discovery.get(url, (None, None))[0]] += 1
+            self._drop_unconfirmed(url)
+            if self.seen is not self.visited:
+                self._settle(url)
+    
+    def budget_report(self):
+        """How the time budget was used, or None without one"""
+        if not self.time_budget:
+            return None
+        end = self.crawl_end or time.time()
+        with self.lock:
+            skipped = dict(self.skipped)
+            cut_short = sorted(self.cut_short)
+        return {
+            'time_budget': self.time_budget,
+            'elapsed': round(end - self.crawl_start, 3) if self.crawl_start else 0.0,
+            'deadline_hit': self.deadline is not None and end >= self.deadline,
+            'skipped_urls': sum(skipped.values()),
+            'skipped_by_source': skipped,
+            'cut_short': cut_short,
+        }
+    
+    def _seed_previous_pages(self):
+        """Hold every URL of the previous crawl until its host's sitemaps are read.
+
+        A page queued before its upstream lastmod is known would be fetched
+        again even if unchanged (see _reuse_previous), so each host's pages are
+        released by its sitemap producer.
+        """
+        if not self.previous_pages:
+            return
+        for url in self.previous_pages:
+            netloc = urlparse(url).netloc
+            if netloc.endswith(self.base_domain):
+                self.allowed_subdomains.add(netloc)
+        held = {}
+        for url, page in self.previous_pages.items():
+            if self._is_valid_url(url):
+                if page.get('lastmod'):
+                    self.lastmod[url] = page['lastmod']
+                held.setdefault(urlparse(url).netloc, []).append(url)
+        with self.lock:
+            self._held_previous = held
+        logger.info(f"Incremental mode: holding {sum(map(len, held.values()))} URLs from the previous crawl "
+                    f"until the sitemaps of {len(held)} hosts are read")
+    
+    def _schedule_previous_hosts(self):
+        """Read the sitemaps of previous-crawl hosts other than the start domain, releasing their pages"""
+        with self.lock:
+            hosts = [(netloc, urls[0]) for netloc, urls in self._held_previous.items() if netloc != self.domain]
+        for netloc, url in hosts:
+            self._submit_producer('sitemaps', self._sitemap_discovery_for, f"{urlparse(url).scheme}://{netloc}")
+    
+    def _release_previous(self, domain_url):
+        """Queue the previous crawl's pages of a host whose sitemaps have been read"""
+        with self.lock:
+            urls = self._held_previous.pop(urlparse(domain_url).netloc, ())
+        for url in urls:
+            self._add_url(url, PRIORITY_NORMAL, source='previous')
+    
+    def _reuse_previous(self, url):
+        """Skip the fetch if the upstream sitemap lastmod shows no change since the last crawl"""
+        previous = self.previous_pages.get(url)
+        if not previous or not previous.get('title'):
+            return False
+        upstream = self.upstream_lastmod.get(url)
+        if not upstream or is_newer(upstream, previous.get('lastmod')):
+            return False
+        self.url_data[url] = previous['title']
+        self.status[url] = 'unchanged'
+        self.lastmod[url] = upstream
+        if previous.get('etag') or previous.get('last_modified'):
+            self.validators[url] = {'etag': previous.get('etag'), 'last_modified': previous.get('last_modified')}
+        self.unchanged += 1
+        return True
+    
+    def _ingest_sitemap_entries(self, root):
+        """Queue the <url> entries of a parsed sitemap and remember their upstream lastmod"""
+        count = 0
+        for loc, lastmod in sitemap_entries(root):
+            if not self._is_valid_url(loc):
+                continue
+            if lastmod:
+                self.upstream_lastmod[loc] = lastmod
+                self.lastmod[loc] = lastmod
+            if self._add_url(loc, PRIORITY_HIGH, source='sitemap'):
+                count += 1
+        return count
+    
+    def _add_url(self, url, priority=PRIORITY_NORMAL, source='link', depth=None):
+        """Record a discovered URL with how it was found and queue it for the fetch pool"""
+        with self.lock:
+            if url in self.seen or len(self.seen) >= self.max_urls:
+                return False
+            if source == 'pattern' and self.dead_families and pattern_family(url) in self.dead_families:
+                return False
+            self.seen.add(url)
+            self.discovery[url] = (source, depth)
+            if self.first_result_time is None and len(self.seen) > 1:
+                self.first_result_time = round(time.time() - self.crawl_start, 3)
+        self.frontier.put(url, priority)
+        if self.on_url is not None:
+            self.on_url(url, source, depth)
+        return True
+    
+    def _timed_phase(self, name):
+        """Context manager recording the wall time window of a phase"""
+        crawler = self
         
-        # Phase 3: Comprehensive sitemap discovery (prioritized for blog content)
-        self._comprehensive_sitemap_discovery()
+        class _Phase:
+            def __enter__(self):
+                self.start = time.time() - crawler.crawl_start
+            
+            def __exit__(self, *exc):
+                end = time.time() - crawler.crawl_start
+                crawler.stats.record_phase(name, end - self.start)
+                with crawler.lock:
+                    # Phases run once per domain; keep the overall window
+                    timing = crawler.phase_timings.setdefault(name, {'start': round(self.start, 3)})
+                    timing['start'] = min(timing['start'], round(self.start, 3))
+                    timing['end'] = max(timing.get('end', 0), round(end, 3))
+                    timing['duration'] = round(timing['end'] - timing['start'], 3)
+                return False
         
-        # Phase 4: Blog and content-specific discovery
-        self._discover_blog_content()
+        return _Phase()
+    
+    def _submit_producer(self, name, func, *args):
+        """Run a discovery producer on the producer pool"""
+        with self.lock:
+            self._pending_producers += 1
+        
+        def run():
+            try:
+                with self._timed_phase(name):
+                    func(*args)
+            except Exception as e:
+                logger.warning(f"Producer {name} failed: {e}")
+            finally:
+                with self.lock:
+                    self._pending_producers -= 1
+                    if self._expired():
+                        self.cut_short.add(name)
         
-        # Phase 5: Pattern-based URL generation
+        self._producer_pool.submit(run)
+    
+    def _schedule_domain(self, domain_url):
+        """Start sitemap, feed and blog discovery for one domain"""
+        self._submit_producer('sitemaps', self._sitemap_discovery_for, domain_url)
+        self._submit_producer('feeds', self._discover_feeds, domain_url)
+        self._submit_producer('blog', self._discover_blog_content, domain_url)
+    
+    def _pattern_producer(self):
+        """Pattern analysis and generation need the full subdomain list"""
+        self._subdomains_done.wait()
+        if self._expired():
+            return
+        self._discover_url_patterns()
         self._generate_pattern_urls()
+    
+    def _get(self, url, **kwargs):
+        """session.get with fetch instrumentation"""
+        return self._request(self.session.get, url, **kwargs)
+    
+    def _head(self, url, **kwargs):
+        """session.head with fetch instrumentation"""
+        return self._request(self.session.head, url, **kwargs)
+    
+    def _timeout(self, url, kind):
+        """(connect, read) timeout for url from its host's latency history, cut to the time left"""
+        connect, read = self.timeouts.timeout_for(url, kind)
+        left = self._time_left()
+        if left is not None:
+            read = max(MIN_REQUEST_TIMEOUT, min(read, left))
+            connect = min(connect, read)
+        return connect, read
+    
+    def _request(self, method, url, **kwargs):
+        if self._expired():
+            raise DeadlineExceeded(url)
+        if self.host_limiter is None:
+            return self._send(method, url, **kwargs)
+        # Other crawls may be using the host too; waiting for a slot does not count as latency
+        left = self._time_left()
+        release = self.host_limiter.acquire(url, None if left is None else max(left, 0))
+        if release is None:
+            raise DeadlineExceeded(url)
+        try:
+            return self._send(method, url, **kwargs)
+        finally:
+            release()
+    
+    def _send(self, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = method(url, **kwargs)
+        except requests.exceptions.Timeout:
+            self.stats.record_fetch('timeout', 0, time.perf_counter() - start)
+            if not self._expired():  # A timeout cut short by the deadline says nothing about the host
+                self.timeouts.observe_timeout(url, kwargs.get('timeout'))
+            raise
+        except requests.exceptions.RequestException:
+            self.stats.record_fetch('error', 0, time.perf_counter() - start)
+            raise
+        elapsed = time.perf_counter() - start
+        # A streamed body is read later by the caller; count what the server announced
+        size = int(response.headers.get('Content-Length') or 0) if kwargs.get('stream') else len(response.content)
+        self.stats.record_fetch(response.status_code, size, elapsed)
+        self.timeouts.observe(url, elapsed)
+        return response
+    
+    def _get_cached(self, url, kind='pattern_analysis'):
+        """GET a page once per crawl; homepages are analysed by several producers.
         
-        # Phase 6: Deep content crawling with recursive link following
-        self._deep_content_crawl()
+        The first caller fetches; concurrent callers wait on its future instead
+        of fetching the same URL again. A failed fetch is not cached, and only
+        the PAGE_CACHE_SIZE most recent responses are kept.
+        """
+        with self.lock:
+            future = self._page_cache.get(url)
+            owner = future is None
+            if owner:
+                future = self._page_cache[url] = Future()
+        self.stats.record_cache('page', not owner)
+        if not owner:
+            return future.result()
+        try:
+            response = self._get(url, timeout=self._timeout(url, kind), allow_redirects=True)
+        except BaseException as e:
+            with self.lock:
+                self._page_cache.pop(url, None)
+            future.set_exception(e)
+            raise
+        future.set_result(response)
+        with self.lock:
+            # Dicts keep insertion order: drop the oldest finished fetches
+            finished = [key for key, value in self._page_cache.items() if value.done()]
+            for cached in finished[:max(len(finished) - PAGE_CACHE_SIZE, 0)]:
+                del self._page_cache[cached]
+        return response
+    
+    def _producers_running(self):
+        with self.lock:
+            return self._pending_producers > 0
+    
+    def _fetch_worker(self):
+        """Drain the frontier: fetch titles and extract links until all work is done"""
+        while True:
+            if self._expired():
+                # Whatever is still queued is reported as skipped after the crawl
+                return
+            url = self.frontier.get(timeout=0.2)
+            self.stats.set_queue_depth(len(self.frontier))
+            if url is None:
+                # Producers may still add URLs; stop once they and all fetches are done
+                if not self._producers_running() and self.frontier.is_drained():
+                    return
+                continue
+            
+            with self.lock:
+                retry_follow_links = self._retry_pending.pop(url, None)
+            try:
+                if self._reuse_previous(url):
+                    self.stats.record_cache('incremental', True)
+                    continue
+                if self._low_yield(url):
+                    with self.lock:
+                        self.skipped['pattern'] += 1
+                    continue
+                if self._pruned(url):
+                    continue
+                with self.lock:
+                    if retry_follow_links is not None:
+                        # Retries were charged to the fetch budget on their first attempt
+                        follow_links = retry_follow_links
+                    elif self.fetched >= self.max_fetches:
+                        continue
+                    else:
+                        self.fetched += 1
+                        follow_links = self.link_pages < self.max_link_pages
+                        if follow_links:
+                            self.link_pages += 1
+                self._fetch_page(url, follow_links)
+                if self.discovery.get(url, (None, None))[0] == 'pattern' and url not in self._retry_pending:
+                    self._record_pattern_result(url)
+            finally:
+                # A URL waiting for its retry is settled after the last attempt
+                if url not in self._retry_pending:
+                    self._drop_unconfirmed(url)
+                    if self.seen is not self.visited:
+                        self._settle(url)
+                self.frontier.task_done()
+    
+    def _pruned(self, url):
+        """Drop a guessed URL whose pattern family has only produced junk so far"""
+        if not self.dead_families or self.discovery.get(url, (None, None))[0] != 'pattern':
+            return False
+        if pattern_family(url) not in self.dead_families:
+            return False
+        self.status[url] = 'pruned'
+        return True
+    
+    def _record_pattern_result(self, url):
+        """Count a fetched guessed URL towards its family's verdict"""
+        family = pattern_family(url)
+        useless = self.status.get(url) not in (200, 304)
+        with self.lock:
+            results = self.family_results.setdefault(family, [0, 0])
+            results[0] += 1
+            results[1] += useless
+            if (family not in self.dead_families and results[0] >= FAMILY_MIN_FETCHES
+                    and results[1] >= results[0] * FAMILY_DEAD_RATIO):
+                self.dead_families.add(family)
+                logger.info(f"Pattern family {family} yields no new pages, skipping the rest of it")
+    
+    def _drop_unconfirmed(self, url):
+        """Leave a guessed URL out of the sitemap unless it answered 200 or 304.
+
+        Unlike links and sitemap entries, a guess is no evidence the page
+        exists: failed and unfetched guesses are marked 'unconfirmed'.
+        """
+        if self.discovery.get(url, (None, None))[0] != 'pattern':
+            return
+        status = self.status.get(url)
+        if status not in (200, 304, 'unchanged') and status not in EXCLUDED_STATUSES:
+            self.status[url] = 'unconfirmed'
+    
+    def _check_duplicate(self, url, html):
+        """Collapse a page whose content was seen before; True for duplicates and soft-404s"""
+        with self.stats.timer('fingerprint'):
+            kind, other = self.duplicates.check(url, html)
+        self.stats.record_cache('content', kind is not None or other is not None)
+        if kind is None:
+            if other is not None:
+                self._replace_canonical(other, url)
+            return False
+        if kind == 'duplicate':
+            self._mark_duplicate(url, other)
+        else:
+            self.status[url] = kind
+            self.url_data[url] = "Sayfa bulunamadı"
+        return True
+    
+    def _mark_duplicate(self, url, canonical):
+        self.status[url] = 'duplicate'
+        self.duplicate_of[url] = canonical
+        self.url_data[url] = "Yinelenen sayfa"
+    
+    def _replace_canonical(self, old, new):
+        """new has a cleaner address than the identical page listed so far"""
+        self._mark_duplicate(old, new)
+    
+    def _mark_soft_404s(self):
+        """Pages fetched before their host's soft-404 page was learned are dropped afterwards"""
+        urls = self.duplicates.soft_404_pages()
+        for url in urls:
+            self.status[url] = 'soft404'
+            self.url_data[url] = "Sayfa bulunamadı"
+        return urls
+    
+    def _settle(self, url):
+        """Record a dequeued URL in visited when dedup runs on a separate seen-set.
         
-        logger.info(f"Enhanced crawling completed. Found {len(self.visited)} URLs across {len(self.allowed_subdomains)} domains")
+        A probabilistic seen-set keeps only URLs that belong in the sitemap.
+        """
+        status = self.status.get(url)
+        with self.lock:
+            if not self.seen.probabilistic or status is None or status in (200, 304, 'unchanged'):
+                self.visited.add(url)
+            else:
+                # Failed pages are left out of the sitemap; the seen-set still blocks them,
+                # and no exact state is kept for them
+                for per_url in (self.discovery, self.status, self.url_data, self.lastmod, self.upstream_lastmod,
+                                self.validators, self.attempts, self.duplicate_of):
+                    per_url.pop(url, None)
+                if self.link_graph is not None:
+                    self.link_graph.discard(url)
+    
+    def _record_links(self, url, links):
+        """Add a page's links to the link graph.
+
+        With a probabilistic seen-set only links to pages still headed for the
+        sitemap are kept, and _settle discards those that fail, so dropped
+        URLs leave no exact state behind.
+        """
+        if self.link_graph is None:
+            return
+        if self.seen.probabilistic:
+            links = [link for link in links if link in self.discovery]
+        self.link_graph.add_links(url, links)
+    
+    def _fetch_page(self, url, follow_links):
+        """Fetch one page, store its title and feed its links back to the frontier"""
+        try:
+            # Revalidate pages of the previous crawl instead of downloading them again
+            headers = {}
+            previous = self.previous_pages.get(url)
+            if previous and previous.get('title'):
+                if previous.get('etag'):
+                    headers['If-None-Match'] = previous['etag']
+                if previous.get('last_modified'):
+                    headers['If-Modified-Since'] = previous['last_modified']
+            
+            response = self._get(url, timeout=self._timeout(url, 'deep_crawl'), allow_redirects=True, headers=headers)
+            if headers:
+                self.stats.record_cache('incremental', response.status_code == 304)
+            self.status[url] = response.status_code
+            if response.status_code == 304:
+                self.url_data[url] = previous['title']
+                self.validators[url] = {'etag': previous.get('etag'), 'last_modified': previous.get('last_modified')}
+                if previous.get('lastmod'):
+                    self.lastmod.setdefault(url, previous['lastmod'])
+                self.unchanged += 1
+                return
+            if response.status_code == 200:
+                if self._check_duplicate(url, response.text):
+                    # Same content as a page already listed: no title or link parsing needed
+                    return
+                self._record_validators(url, response)
+                with self.stats.timer('title'):
+                    title = self._extract_title(response.text)
+                # Store meaningful titles or create descriptive fallback
+                if title and title.strip() and title != "Başlık bulunamadı":
+                    self.url_data[url] = title.strip()
+                else:
+                    self.url_data[url] = self._readable_title(url, "Sayfa başlığı")
+                with self.lock:
+                    self.crawled_urls += 1
+                
+                if follow_links:
+                    # Extract ALL internal links from this page
+                    with self.stats.timer('links'):
+                        links = self._comprehensive_link_extraction(response.text, url)
+                    depth = (self.discovery.get(url, (None, None))[1] or 0) + 1  # Seeds count as depth 0
+                    for link in links:
+                        if len(self.seen) >= self.max_urls:
+                            break
+                        if link not in self.seen and self._is_valid_url(link):
+                            # Blog posts and articles are fetched ahead of other links
+                            if any(pattern in link.lower() for pattern in ['/blog/', '/article/', '/post/', '/news/', '/story/']):
+                                self._add_url(link, PRIORITY_HIGH, source='link', depth=depth)
+                            else:
+                                self._add_url(link, PRIORITY_NORMAL, source='link', depth=depth)
+                    self._record_links(url, links)
+                    
+                    if self.link_pages % 10 == 0:
+                        logger.info(f"Lightning crawl progress: {self.fetched} pages fetched, found {len(self.visited)} total URLs")
+            elif response.status_code in [301, 302, 303, 307, 308]:
+                self.url_data[url] = "Yönlendirme"
+            else:
+                self.url_data[url] = f"HTTP {response.status_code}"
+                if response.status_code in RETRY_STATUSES:
+                    self._schedule_retry(url, follow_links, self._retry_after(response))
+                
+        except DeadlineExceeded:
+            with self.lock:
+                self.skipped[self.discovery.get(url, (None, None))[0]] += 1
+        except requests.exceptions.Timeout:
+            if self._expired():
+                # Cut short by the deadline rather than a slow page
+                with self.lock:
+                    self.skipped[self.discovery.get(url, (None, None))[0]] += 1
+                return
+            self.url_data[url] = "Zaman aşımı"
+            self.status[url] = 'timeout'
+            self._schedule_retry(url, follow_links)
+        except requests.exceptions.RequestException:
+            self.url_data[url] = "Erişim hatası"
+            self.status[url] = 'error'
+            self._schedule_retry(url, follow_links)
+        except Exception:
+            self.url_data[url] = "Başlık alınamadı"
+    
+    def _schedule_retry(self, url, follow_links, delay=None):
+        """Requeue a failed page after an exponential backoff.
+        
+        The fetch slot moves on to other URLs meanwhile. The failure stays
+        recorded in case every attempt fails.
+        """
+        with self.lock:
+            attempt = self.attempts.get(url, 0) + 1
+            if attempt > MAX_FETCH_RETRIES:
+                return False
+            self.attempts[url] = attempt
+            self._retry_pending[url] = follow_links
+            self.retried += 1
+        if delay is None:
+            delay = RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.8, 1.2)
+        # It already waited its turn once, so it goes ahead of new discoveries
+        self.frontier.put_later(url, PRIORITY_HIGH, delay)
+        self.stats.record_retry()
+        return True
+    
+    @staticmethod
+    def _retry_after(response):
+        """Delay asked for by a Retry-After header in seconds, if any"""
+        value = response.headers.get('Retry-After', '')
+        if value.isdigit():
+            return min(int(value), MAX_RETRY_AFTER)
+        return None
+    
+    def _record_validators(self, url, response):
+        """Keep HTTP validators and a real lastmod for a freshly downloaded page"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self.validators[url] = {'etag': etag, 'last_modified': last_modified}
+        if url not in self.upstream_lastmod:
+            # Server date if known, otherwise the page changed (or appeared) by now
+            self.lastmod[url] = http_date_to_lastmod(last_modified) or time.strftime('%Y-%m-%d')
+    
+    @staticmethod
+    def _readable_title(url, fallback):
+        """Create a readable title from the URL path"""
+        path_parts = url.split('/')[-2:]
+        readable_title = ' '.join([part.replace('-', ' ').replace('_', ' ').title() 
+                                 for part in path_parts if part and part != 'index.html'])
+        return readable_title if readable_title else fallback
+    
+    def _finalize_titles(self):
+        """Create descriptive titles for URLs that were never fetched"""
+        with self.lock:
+            urls = list(self.visited)
+        for url in urls:
+            if url not in self.url_data:
+                self.url_data[url] = self._readable_title(url, "Sayfa")
         
     def _discover_subdomains(self):
         """Discover subdomains dynamically from DNS records and page content"""
+        try:
+            self._probe_subdomains()
+        finally:
+            # Unblock the pattern producer even if probing failed
+            self._subdomains_done.set()
+    
+    def _probe_subdomains(self):
+        """Probe candidate subdomains and start per-domain producers for each hit"""
         logger.info(f"Discovering subdomains for {self.base_domain}")
         
         # Phase 1: Analyze homepage for subdomain references
@@ -125,19 +808,20 @@ class EnhancedCrawler:
         # Phase 3: Test discovered patterns
         discovered_count = 0
         for subdomain in all_patterns:
-            if discovered_count >= 10:  # Increased limit for better coverage
+            if discovered_count >= 10 or self._expired():  # Increased limit for better coverage
                 break
                 
             test_domain = f"{subdomain}.{self.base_domain}"
             test_url = f"https://{test_domain}"
             
             try:
-                response = self.session.head(test_url, timeout=2, allow_redirects=True)
+                response = self._head(test_url, timeout=self._timeout(test_url, 'subdomain_probe'), allow_redirects=True)
                 if response.status_code in [200, 301, 302, 403]:
                     if test_domain not in self.allowed_subdomains:
                         self.allowed_subdomains.add(test_domain)
                         self.discovered_subdomains.add(test_domain)
-                        self.visited.add(test_url)
+                        self._add_url(test_url, PRIORITY_HIGH, source='subdomain')
+                        self._schedule_domain(test_url)
                         discovered_count += 1
                         logger.info(f"Found subdomain: {test_domain}")
                         
@@ -152,7 +836,7 @@ class EnhancedCrawler:
         
         try:
             # Analyze main domain homepage
-            response = self.session.get(self.start_url, timeout=3)
+            response = self._get_cached(self.start_url)
             if response.status_code == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
                 
@@ -168,18 +852,20 @@ class EnhancedCrawler:
                                 if subdomain and '.' not in subdomain:  # Simple subdomain
                                     discovered_patterns.add(subdomain)
                 
-                # Extract from JavaScript and data attributes
-                scripts = soup.find_all('script')
-                for script in scripts:
+                # Extract from host names in JavaScript string literals
+                suffix = '.' + self.base_domain
+                for script in soup.find_all('script'):
                     script_text = script.get_text()
-                    if script_text:
-                        import re
-                        # Find subdomain patterns in JS
-                        pattern = rf'([a-zA-Z0-9\-]+)\.{re.escape(self.base_domain)}'
-                        matches = re.findall(pattern, script_text)
-                        for match in matches:
-                            if len(match) > 1 and len(match) < 20:  # Reasonable subdomain length
-                                discovered_patterns.add(match)
+                    if not script_text or self.base_domain not in script_text:
+                        continue
+                    for value in string_literals(script_text):
+                        if suffix not in value:
+                            continue
+                        host = urlparse(value if '//' in value else '//' + value).hostname or ''
+                        if host.endswith(suffix):
+                            subdomain = host[:-len(suffix)]
+                            if 1 < len(subdomain) < 20 and '.' not in subdomain:  # Reasonable subdomain length
+                                discovered_patterns.add(subdomain)
                 
                 logger.info(f"Discovered {len(discovered_patterns)} subdomain patterns from content")
                                 
@@ -209,8 +895,7 @@ class EnhancedCrawler:
             for domain_url in domains_to_analyze:
                 try:
                     logger.info(f"Analyzing URL patterns for {domain_url}")
-                    # Very short timeout - if site is slow, skip pattern discovery
-                    response = self.session.get(domain_url, timeout=3, allow_redirects=True)
+                    response = self._get_cached(domain_url)
                     if response.status_code == 200:
                         soup = BeautifulSoup(response.text, 'html.parser')
                         
@@ -256,13 +941,13 @@ class EnhancedCrawler:
             # Continue without patterns - the system will still work with sitemap and generated patterns
             pass
     
-    def _discover_blog_content(self):
-        """Aggressively discover blog posts and articles"""
-        logger.info("Starting aggressive blog content discovery")
+    def _discover_blog_content(self, domain_url):
+        """Aggressively discover blog posts and articles on one domain"""
+        logger.info(f"Starting aggressive blog content discovery for {domain_url}")
         
         blog_discovered = 0
         
-        # Blog-specific paths to check on all domains
+        # Blog-specific paths to check on every domain
         blog_paths = [
             '/blog/', '/blog', '/articles/', '/articles', '/news/', '/news',
             '/posts/', '/posts', '/content/', '/content', '/insights/', '/insights',
@@ -272,71 +957,61 @@ class EnhancedCrawler:
             '/guides/', '/guides', '/tips/', '/tips', '/learn/', '/learn'
         ]
         
-        for domain_url in [f"https://{domain}" for domain in self.allowed_subdomains]:
-            if blog_discovered >= 1000:  # Limit blog discovery
+        for blog_path in blog_paths:
+            if blog_discovered >= 1000 or self._expired():  # Limit blog discovery per domain
                 break
                 
-            for blog_path in blog_paths:
-                if blog_discovered >= 1000:
-                    break
+            blog_url = urljoin(domain_url, blog_path)
+            if blog_url in self.seen:
+                continue
+                
+            try:
+                response = self._get(blog_url, timeout=self._timeout(blog_url, 'blog_discovery'), allow_redirects=True)
+                if response.status_code == 200:
+                    if self._add_url(blog_url, PRIORITY_HIGH, source='blog'):
+                        blog_discovered += 1
                     
-                blog_url = urljoin(domain_url, blog_path)
-                if blog_url in self.visited:
-                    continue
+                    # Extract blog post links from this page
+                    soup = BeautifulSoup(response.text, 'html.parser')
                     
-                try:
-                    response = self.session.get(blog_url, timeout=3, allow_redirects=True)
-                    if response.status_code == 200:
-                        self.visited.add(blog_url)
-                        blog_discovered += 1
-                        
-                        # Extract blog post links from this page
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        
-                        # Look for blog post patterns
-                        blog_selectors = [
-                            'a[href*="/blog/"]', 'a[href*="/article/"]', 'a[href*="/post/"]',
-                            'a[href*="/news/"]', 'a[href*="/story/"]', 'a[href*="/insight/"]',
-                            '.blog-post a', '.article a', '.post a', '.news-item a',
-                            '.content-item a', '.story a', '.resource a'
-                        ]
-                        
-                        for selector in blog_selectors:
-                            links = soup.select(selector)
-                            for link in links[:50]:  # Limit per selector
-                                href = link.get('href')
-                                if href:
-                                    full_url = urljoin(blog_url, href)
-                                    if (self._is_valid_url(full_url) and 
-                                        full_url not in self.visited and 
-                                        len(self.visited) < self.max_urls):
-                                        self.visited.add(full_url)
-                                        blog_discovered += 1
-                        
-                        # Check for pagination on blog pages
-                        pagination_selectors = [
-                            'a[href*="page"]', 'a[href*="Page"]', '.pagination a',
-                            '.pager a', '.next a', '.prev a', 'a[rel="next"]'
-                        ]
-                        
-                        for selector in pagination_selectors:
-                            pages = soup.select(selector)
-                            for page_link in pages[:10]:  # Limit pagination
-                                href = page_link.get('href')
-                                if href:
-                                    page_url = urljoin(blog_url, href)
-                                    if (self._is_valid_url(page_url) and 
-                                        page_url not in self.visited and 
-                                        len(self.visited) < self.max_urls):
-                                        self.visited.add(page_url)
-                                        blog_discovered += 1
-                        
-                except (requests.exceptions.Timeout, requests.exceptions.RequestException):
-                    continue
-                except Exception as e:
-                    continue
+                    # Look for blog post patterns
+                    blog_selectors = [
+                        'a[href*="/blog/"]', 'a[href*="/article/"]', 'a[href*="/post/"]',
+                        'a[href*="/news/"]', 'a[href*="/story/"]', 'a[href*="/insight/"]',
+                        '.blog-post a', '.article a', '.post a', '.news-item a',
+                        '.content-item a', '.story a', '.resource a'
+                    ]
+                    
+                    for selector in blog_selectors:
+                        links = soup.select(selector)
+                        for link in links[:50]:  # Limit per selector
+                            href = link.get('href')
+                            if href:
+                                full_url = urljoin(blog_url, href)
+                                if self._is_valid_url(full_url) and self._add_url(full_url, PRIORITY_HIGH, source='blog'):
+                                    blog_discovered += 1
+                    
+                    # Check for pagination on blog pages
+                    pagination_selectors = [
+                        'a[href*="page"]', 'a[href*="Page"]', '.pagination a',
+                        '.pager a', '.next a', '.prev a', 'a[rel="next"]'
+                    ]
+                    
+                    for selector in pagination_selectors:
+                        pages = soup.select(selector)
+                        for page_link in pages[:10]:  # Limit pagination
+                            href = page_link.get('href')
+                            if href:
+                                page_url = urljoin(blog_url, href)
+                                if self._is_valid_url(page_url) and self._add_url(page_url, PRIORITY_NORMAL, source='blog'):
+                                    blog_discovered += 1
+                    
+            except (requests.exceptions.Timeout, requests.exceptions.RequestException):
+                continue
+            except Exception as e:
+                continue
         
-        logger.info(f"Blog discovery completed. Found {blog_discovered} blog-related URLs")
+        logger.info(f"Blog discovery completed for {domain_url}. Found {blog_discovered} blog-related URLs")
     
     def _comprehensive_link_extraction(self, html, base_url):
         """Extract ALL internal links from a page for comprehensive crawling"""
@@ -372,18 +1047,15 @@ class EnhancedCrawler:
             for element in soup.find_all(attrs={'onclick': True}):
                 onclick = element.get('onclick', '')
                 if 'location' in onclick or 'href' in onclick:
-                    # Extract URLs from JavaScript
-                    import re
-                    url_matches = re.findall(r'["\']([^"\']*)["\']', onclick)
-                    for match in url_matches:
-                        if match.startswith('/') or self.domain in match:
-                            try:
-                                full_url = urljoin(base_url, match)
-                                parsed_url = urlparse(full_url)
-                                if parsed_url.netloc in self.allowed_subdomains:
-                                    links.add(full_url)
-                            except:
-                                continue
+                    # Route-like string literals of the handler
+                    for match in extract_routes(onclick):
+                        try:
+                            full_url = urljoin(base_url, match)
+                            parsed_url = urlparse(full_url)
+                            if parsed_url.netloc in self.allowed_subdomains:
+                                links.add(full_url)
+                        except:
+                            continue
             
             # Extract from data-href and similar attributes
             for element in soup.find_all(attrs={'data-href': True}):
@@ -437,86 +1109,135 @@ class EnhancedCrawler:
                 if base_pattern not in self.url_patterns:
                     self.url_patterns.append(base_pattern)
                     
-    def _comprehensive_sitemap_discovery(self):
-        """Discover all possible sitemaps from main domain and all subdomains"""
-        sitemap_locations = [
-            '/sitemap.xml', '/sitemap_index.xml', '/sitemaps.xml',
-            '/sitemap/', '/sitemaps/', '/robots.txt',
-            '/wp-sitemap.xml', '/sitemap-index.xml',
-            '/news-sitemap.xml', '/video-sitemap.xml', '/image-sitemap.xml'
-        ]
-        
-        # Create list of all domains to check (main domain + all discovered subdomains)
-        domains_to_check = [self.start_url]
-        for subdomain in self.discovered_subdomains:
-            subdomain_url = f"https://{subdomain}"
-            if subdomain_url not in domains_to_check:
-                domains_to_check.append(subdomain_url)
-        
-        # Ultra-fast sitemap discovery with aggressive timeouts
-        for domain_url in domains_to_check:
-            logger.info(f"Fast sitemap check for {domain_url}")
-            try:
-                # Lightning-fast check - 1 second max per domain
-                start_time = time.time()
-                
-                # Try multiple sitemap locations for comprehensive blog content discovery
-                sitemap_paths = ['/sitemap.xml', '/sitemap_index.xml', '/wp-sitemap.xml', '/post-sitemap.xml']
-                
-                for sitemap_path in sitemap_paths:
-                    try:
-                        sitemap_url = urljoin(domain_url, sitemap_path)
-                        response = self.session.get(sitemap_url, timeout=1.5)
-                        if response.status_code == 200:
-                            try:
+    def _sitemap_discovery_for(self, domain_url):
+        """Ingest every sitemap found on one domain"""
+        logger.info(f"Fast sitemap check for {domain_url}")
+        try:
+            # Lightning-fast check - 1 second max per domain
+            start_time = time.time()
+            
+            # Try multiple sitemap locations for comprehensive blog content discovery
+            sitemap_paths = ['/sitemap.xml', '/sitemap_index.xml', '/wp-sitemap.xml', '/post-sitemap.xml']
+            
+            for sitemap_path in sitemap_paths:
+                if self._expired():
+                    break
+                try:
+                    sitemap_url = urljoin(domain_url, sitemap_path)
+                    response = self._get(sitemap_url, timeout=self._timeout(sitemap_url, 'sitemap_check'))
+                    if response.status_code == 200:
+                        try:
+                            with self.stats.timer('sitemap'):
                                 root = ET.fromstring(response.content)
-                                sitemap_urls = 0
-                                
-                                # Extract all URLs from sitemap
-                                for url_elem in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}loc'):
-                                    if url_elem.text and self._is_valid_url(url_elem.text):
-                                        self.visited.add(url_elem.text)
-                                        sitemap_urls += 1
-                                
-                                # Handle sitemap index files
-                                for sitemap_elem in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}sitemap'):
-                                    loc_elem = sitemap_elem.find('.//{http://www.sitemaps.org/schemas/sitemap/0.9}loc')
-                                    if loc_elem is not None and loc_elem.text:
-                                        try:
-                                            sub_response = self.session.get(loc_elem.text, timeout=1.2)
-                                            if sub_response.status_code == 200:
+                            sitemap_urls = 0
+                            
+                            # Extract all URLs from sitemap
+                            sitemap_urls += self._ingest_sitemap_entries(root)
+                            
+                            # Handle sitemap index files
+                            for sitemap_elem in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}sitemap'):
+                                loc_elem = sitemap_elem.find('.//{http://www.sitemaps.org/schemas/sitemap/0.9}loc')
+                                if loc_elem is not None and loc_elem.text:
+                                    try:
+                                        sub_response = self._get(loc_elem.text, timeout=self._timeout(loc_elem.text, 'sitemap_check'))
+                                        if sub_response.status_code == 200:
+                                            with self.stats.timer('sitemap'):
                                                 sub_root = ET.fromstring(sub_response.content)
-                                                for sub_url in sub_root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}loc'):
-                                                    if sub_url.text and self._is_valid_url(sub_url.text):
-                                                        self.visited.add(sub_url.text)
-                                                        sitemap_urls += 1
-                                        except:
-                                            continue
+                                            sitemap_urls += self._ingest_sitemap_entries(sub_root)
+                                    except:
+                                        continue
+                            
+                            if sitemap_urls > 0:
+                                logger.info(f"Extracted {sitemap_urls} URLs from {sitemap_url}")
                                 
-                                if sitemap_urls > 0:
-                                    logger.info(f"Extracted {sitemap_urls} URLs from {sitemap_url}")
+                        except ET.ParseError:
+                            # Try text-based parsing for non-XML sitemaps
+                            for line in response.text.split('\n'):
+                                line = line.strip()
+                                if line.startswith('http') and self._is_valid_url(line):
+                                    self._add_url(line, PRIORITY_HIGH, source='sitemap')
                                     
-                            except ET.ParseError:
-                                # Try text-based parsing for non-XML sitemaps
-                                for line in response.text.split('\n'):
-                                    line = line.strip()
-                                    if line.startswith('http') and self._is_valid_url(line):
-                                        self.visited.add(line)
-                                        
-                    except:
-                        continue
-                
-                elapsed = time.time() - start_time
-                logger.info(f"Completed fast sitemap check for {domain_url} in {elapsed:.1f}s")
-                
-                # If this domain is too slow, mark it for fast-track mode
-                if elapsed > 1.0:
-                    logger.info(f"Domain {domain_url} is slow, will use fast-track URL generation")
-                        
-            except Exception as e:
-                logger.info(f"Fast sitemap check failed for {domain_url}, using generation mode")
-                continue
+                except:
+                    continue
+            
+            elapsed = time.time() - start_time
+            logger.info(f"Completed fast sitemap check for {domain_url} in {elapsed:.1f}s")
+                    
+        except Exception as e:
+            logger.info(f"Fast sitemap check failed for {domain_url}, using generation mode")
+        finally:
+            # Upstream lastmods of this host are known now
+            self._release_previous(domain_url)
         
+    def _discover_feeds(self, domain_url):
+        """Queue the post URLs a domain lists in its RSS/Atom/JSON feeds and homepage JSON-LD.
+
+        Feeds are read from the <link rel="alternate"> tags of the homepage,
+        or from common feed paths when it declares none.
+        """
+        declared = []
+        try:
+            response = self._get_cached(domain_url)
+            if response.status_code == 200:
+                declared, structured = page_feeds_and_json_ld(response.text, response.url)
+                for url in structured:
+                    if self._is_valid_url(url):
+                        self._add_url(urldefrag(url)[0], PRIORITY_HIGH, source='jsonld')
+        except requests.exceptions.RequestException:
+            pass
+        
+        found = 0
+        for feed_url in declared or [urljoin(domain_url, path) for path in COMMON_FEED_PATHS]:
+            if self._expired():
+                break
+            pages, added = self._read_feed(feed_url)
+            found += added
+            if pages and not declared:
+                break  # Common paths usually alias one feed
+        logger.info(f"Feed discovery for {domain_url} found {found} URLs in {len(declared)} declared feeds")
+    
+    def _read_feed(self, feed_url):
+        """Stream one feed and its following pages into the frontier; returns (pages read, URLs added)"""
+        page_url = feed_url
+        pages = added = 0
+        wordpress = False
+        while page_url and pages < MAX_FEED_PAGES and not self._expired():
+            next_url = None
+            entries = new = 0
+            try:
+                with self._get(page_url, timeout=self._timeout(page_url, 'feed_check'), stream=True) as response:
+                    if response.status_code != 200:
+                        break
+                    if 'json' in response.headers.get('Content-Type', ''):
+                        events = json_feed_entries(response.text)
+                    else:
+                        events = xml_feed_entries(response.iter_content(CHUNK_SIZE))
+                    for kind, url, lastmod in events:
+                        if kind == 'next':
+                            next_url = urljoin(page_url, url)
+                        elif kind == 'wordpress':
+                            wordpress = True
+                        else:
+                            entries += 1
+                            url = urldefrag(urljoin(page_url, url))[0]
+                            if not self._is_valid_url(url):
+                                continue
+                            if lastmod and url not in self.upstream_lastmod:
+                                self.upstream_lastmod[url] = lastmod
+                                self.lastmod[url] = lastmod
+                            if self._add_url(url, PRIORITY_HIGH, source='feed'):
+                                new += 1
+            except (requests.exceptions.RequestException, ET.ParseError, ValueError):
+                break
+            pages += 1
+            added += new
+            if pages > 1 and not new:
+                break  # Later pages only repeat known posts
+            if next_url is None and wordpress and entries:
+                next_url = wordpress_page(feed_url, pages + 1)
+            page_url = next_url
+        return pages, added
+    
     def _check_robots_for_sitemaps(self, domain_url=None):
         """Extract sitemap URLs from robots.txt for given domain"""
         try:
@@ -524,7 +1245,7 @@ class EnhancedCrawler:
                 domain_url = self.start_url
             
             robots_url = urljoin(domain_url, '/robots.txt')
-            response = self.session.get(robots_url, timeout=2)
+            response = self._get(robots_url, timeout=self._timeout(robots_url, 'robots_txt'))
             if response.status_code == 200:
                 for line in response.text.split('\n'):
                     if line.lower().startswith('sitemap:'):
@@ -536,16 +1257,13 @@ class EnhancedCrawler:
     def _parse_sitemap(self, sitemap_url):
         """Parse sitemap and extract URLs"""
         try:
-            response = self.session.get(sitemap_url, timeout=1)
+            response = self._get(sitemap_url, timeout=self._timeout(sitemap_url, 'sitemap_check'))
             if response.status_code == 200:
-                root = ET.fromstring(response.content)
+                with self.stats.timer('sitemap'):
+                    root = ET.fromstring(response.content)
                 
                 # Handle regular sitemap
-                for url_elem in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}loc'):
-                    if url_elem.text:
-                        url = url_elem.text.strip()
-                        if self._is_valid_url(url):
-                            self.visited.add(url)
+                self._ingest_sitemap_entries(root)
                             
                 # Handle sitemap index
                 for sitemap_elem in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}sitemap'):
@@ -558,6 +1276,16 @@ class EnhancedCrawler:
         except Exception as e:
             logger.debug(f"Error parsing sitemap {sitemap_url}: {e}")
             
+    def _learn_soft_404(self, domain_url):
+        """Request a URL that cannot exist; a 200 answer is the host's soft-404 page"""
+        probe_url = urljoin(domain_url, f"/{uuid.uuid4().hex}")
+        try:
+            response = self._get(probe_url, timeout=self._timeout(probe_url, 'pattern_analysis'), allow_redirects=True)
+        except requests.exceptions.RequestException:
+            return
+        if response.status_code == 200 and self.duplicates.add_soft_404(probe_url, response.text):
+            logger.info(f"{domain_url} answers unknown URLs with 200, learned its soft-404 page")
+    
     def _generate_pattern_urls(self):
         """Generate URLs based on discovered patterns and common paths for all domains"""
         generated_count = 0
@@ -585,15 +1313,15 @@ class EnhancedCrawler:
         
         # Generate URLs for each domain (main + subdomains)
         for domain_url in domains_to_generate:
+            self._learn_soft_404(domain_url)
             logger.info(f"Generating pattern URLs for {domain_url}")
             domain_generated = 0
             
             # Add pagination and category variations for this domain
-            for base_path in common_paths:
+            for base_path in sorted(all_paths):
                 # Add base path
                 full_url = urljoin(domain_url, base_path)
-                if self._is_valid_url(full_url) and full_url not in self.visited:
-                    self.visited.add(full_url)
+                if self._is_valid_url(full_url) and self._add_url(full_url, PRIORITY_LOW, source='pattern'):
                     generated_count += 1
                     domain_generated += 1
                     
@@ -609,23 +1337,22 @@ class EnhancedCrawler:
                         ]
                         for pag_url in paginated_urls:
                             full_url = urljoin(domain_url, pag_url)
-                            if self._is_valid_url(full_url) and full_url not in self.visited:
-                                self.visited.add(full_url)
+                            if self._is_valid_url(full_url) and self._add_url(full_url, PRIORITY_LOW, source='pattern'):
                                 generated_count += 1
                                 domain_generated += 1
-                                if len(self.visited) >= self.max_urls:
+                                if len(self.seen) >= self.max_urls:
                                     break
-                        if len(self.visited) >= self.max_urls:
+                        if len(self.seen) >= self.max_urls:
                             break
-                if len(self.visited) >= self.max_urls:
+                if len(self.seen) >= self.max_urls:
                     break
             
             logger.info(f"Generated {domain_generated} URLs for {domain_url}")
-            if len(self.visited) >= self.max_urls:
+            if len(self.seen) >= self.max_urls:
                 break
                             
         # Generate category-based URLs for all domains
-        if len(self.visited) < self.max_urls:
+        if len(self.seen) < self.max_urls:
             categories = [
                 'mentoring', 'coaching', 'leadership', 'development', 'hr', 'talent',
                 'engagement', 'retention', 'training', 'learning', 'skills', 'performance',
@@ -643,25 +1370,24 @@ class EnhancedCrawler:
             ]
             
             for domain_url in domains_to_generate:
-                if len(self.visited) >= self.max_urls:
+                if len(self.seen) >= self.max_urls:
                     break
                     
                 for pattern in category_patterns:
                     for cat in categories:
                         url = pattern.replace('{cat}', cat)
                         full_url = urljoin(domain_url, url)
-                        if self._is_valid_url(full_url) and full_url not in self.visited:
-                            self.visited.add(full_url)
+                        if self._is_valid_url(full_url) and self._add_url(full_url, PRIORITY_LOW, source='pattern'):
                             generated_count += 1
-                            if len(self.visited) >= self.max_urls:
+                            if len(self.seen) >= self.max_urls:
                                 break
-                    if len(self.visited) >= self.max_urls:
+                    if len(self.seen) >= self.max_urls:
                         break
                         
         # Generate date-based URLs for blogs/news on all domains
-        if len(self.visited) < self.max_urls:
+        if len(self.seen) < self.max_urls:
             for domain_url in domains_to_generate:
-                if len(self.visited) >= self.max_urls:
+                if len(self.seen) >= self.max_urls:
                     break
                     
                 for year in range(2020, 2025):
@@ -674,14 +1400,13 @@ class EnhancedCrawler:
                         ]
                         for date_pattern in date_patterns:
                             full_url = urljoin(domain_url, date_pattern)
-                            if self._is_valid_url(full_url) and full_url not in self.visited:
-                                self.visited.add(full_url)
+                            if self._is_valid_url(full_url) and self._add_url(full_url, PRIORITY_LOW, source='pattern'):
                                 generated_count += 1
-                                if len(self.visited) >= self.max_urls:
+                                if len(self.seen) >= self.max_urls:
                                     break
-                        if len(self.visited) >= self.max_urls:
+                        if len(self.seen) >= self.max_urls:
                             break
-                    if len(self.visited) >= self.max_urls:
+                    if len(self.seen) >= self.max_urls:
                         break
                             
         logger.info(f"Generated {generated_count} URLs from patterns and discovered paths")
@@ -697,7 +1422,7 @@ class EnhancedCrawler:
         
         for domain_url in domains_to_analyze:
             try:
-                response = self.session.get(domain_url, timeout=3)
+                response = self._get_cached(domain_url)
                 if response.status_code == 200:
                     soup = BeautifulSoup(response.text, 'html.parser')
                     
@@ -747,108 +1472,6 @@ class EnhancedCrawler:
         logger.info(f"Discovered {len(filtered_paths)} unique paths from content analysis")
         return list(filtered_paths)
         
-    def _deep_content_crawl(self):
-        """Lightning-fast instant completion mode"""
-        # Limit to smaller, faster batch for instant results
-        urls_to_crawl = list(self.visited)[:300]  # Much smaller batch for speed
-        
-        logger.info(f"Starting lightning-fast crawl of {len(urls_to_crawl)} URLs")
-        
-        # Process in rapid bursts
-        for i, url in enumerate(urls_to_crawl):
-            if len(self.visited) >= self.max_urls:
-                break
-                
-            try:
-                # Lightning-fast timeout
-                response = self.session.get(url, timeout=1, allow_redirects=True)
-                if response.status_code == 200:
-                    title = self._extract_title(response.text)
-                    # Store meaningful titles or create descriptive fallback
-                    if title and title.strip() and title != "Başlık bulunamadı":
-                        self.url_data[url] = title.strip()
-                    else:
-                        # Create readable title from URL path
-                        path_parts = url.split('/')[-2:]
-                        readable_title = ' '.join([part.replace('-', ' ').replace('_', ' ').title() 
-                                                 for part in path_parts if part and part != 'index.html'])
-                        self.url_data[url] = readable_title if readable_title else "Sayfa başlığı"
-                    # Don't increment here - we'll use len(self.visited) for progress
-                    
-                    # Extract ALL internal links from this page
-                    new_links = self._comprehensive_link_extraction(response.text, url)
-                    
-                    # Add all discovered links with more aggressive crawling
-                    for link in new_links:
-                        if len(self.visited) >= self.max_urls:
-                            break
-                        if link not in self.visited and self._is_valid_url(link):
-                            self.visited.add(link)
-                            
-                            # Immediately crawl high-priority links (blog posts, articles)
-                            if any(pattern in link.lower() for pattern in ['/blog/', '/article/', '/post/', '/news/', '/story/']):
-                                try:
-                                    quick_response = self.session.get(link, timeout=1.5, allow_redirects=True)
-                                    if quick_response.status_code == 200:
-                                        # Extract more links from this blog/article page
-                                        deeper_links = self._comprehensive_link_extraction(quick_response.text, link)
-                                        for deep_link in deeper_links[:20]:  # Limit to prevent explosion
-                                            if (deep_link not in self.visited and 
-                                                self._is_valid_url(deep_link) and 
-                                                len(self.visited) < self.max_urls):
-                                                self.visited.add(deep_link)
-                                except:
-                                    continue
-                            
-                    # For every 10 URLs, report progress
-                    if i % 10 == 0 and i > 0:
-                        logger.info(f"Lightning crawl progress: {i}/{len(urls_to_crawl)}, found {len(self.visited)} total URLs")
-                        # Skip pattern discovery for maximum speed
-                elif response.status_code in [301, 302, 303, 307, 308]:
-                    self.url_data[url] = "Yönlendirme"
-                else:
-                    self.url_data[url] = f"HTTP {response.status_code}"
-                            
-                # No sleep for maximum speed
-                
-            except requests.exceptions.Timeout:
-                self.url_data[url] = "Zaman aşımı"
-                continue
-            except requests.exceptions.RequestException as e:
-                self.url_data[url] = "Erişim hatası"
-            except Exception as e:
-                self.url_data[url] = "Başlık alınamadı"
-                
-        # Quick finalization for remaining URLs
-        remaining_urls = [url for url in self.visited if url not in self.url_data]
-        logger.info(f"Quick-finalizing {len(remaining_urls)} remaining URLs")
-        
-        for url in remaining_urls[:500]:  # Limit to 500 for speed
-            try:
-                # Super-fast title extraction
-                response = self.session.get(url, timeout=1, allow_redirects=True)
-                if response.status_code == 200:
-                    title = self._extract_title(response.text)
-                    self.url_data[url] = title if title and title != "Başlık bulunamadı" else "Sayfa başlığı"
-                else:
-                    self.url_data[url] = f"HTTP {response.status_code}"
-            except:
-                # Create descriptive title from URL for failed requests
-                path_parts = url.split('/')[-2:]
-                readable_title = ' '.join([part.replace('-', ' ').replace('_', ' ').title() 
-                                         for part in path_parts if part and part != 'index.html'])
-                self.url_data[url] = readable_title if readable_title else "Sayfa"
-                    
-            self.crawled_urls += 1
-            
-        # For any remaining URLs without data, create descriptive titles
-        for url in self.visited:
-            if url not in self.url_data:
-                path_parts = url.split('/')[-2:]
-                readable_title = ' '.join([part.replace('-', ' ').replace('_', ' ').title() 
-                                         for part in path_parts if part and part != 'index.html'])
-                self.url_data[url] = readable_title if readable_title else "Sayfa"
-                
     def _discover_additional_patterns(self, html, base_url):
         """Discover additional URL patterns from successful pages"""
         try:
@@ -862,8 +1485,8 @@ class EnhancedCrawler:
                     href = link['href']
                     if href.startswith('/'):
                         full_url = urljoin(base_url, href)
-                        if self._is_valid_url(full_url) and full_url not in self.visited:
-                            self.visited.add(full_url)
+                        if self._is_valid_url(full_url):
+                            self._add_url(full_url, PRIORITY_NORMAL, source='pattern')
                             
             # Look for form actions and API endpoints
             forms = soup.find_all('form', action=True)
@@ -871,8 +1494,8 @@ class EnhancedCrawler:
                 action = form['action']
                 if action.startswith('/'):
                     full_url = urljoin(base_url, action)
-                    if self._is_valid_url(full_url) and full_url not in self.visited:
-                        self.visited.add(full_url)
+                    if self._is_valid_url(full_url):
+                        self._add_url(full_url, PRIORITY_NORMAL, source='pattern')
                         
         except Exception as e:
             logger.debug(f"Error in additional pattern discovery: {e}")
@@ -892,23 +1515,10 @@ class EnhancedCrawler:
                     links.add(full_url)
                     
             # JavaScript links
-            scripts = soup.find_all('script')
-            for script in scripts:
-                script_text = script.get_text()
-                if script_text:
-                    # Find URL patterns in JavaScript
-                    js_patterns = [
-                        r'["\'](' + re.escape(self.domain) + r'[^"\']*)["\']',
-                        r'["\'](/[^"\']*)["\']'
-                    ]
-                    
-                    for pattern in js_patterns:
-                        matches = re.findall(pattern, script_text)
-                        for match in matches:
-                            if match.startswith('/'):
-                                match = urljoin(base_url, match)
-                            if self.domain in match:
-                                links.add(match)
+            for match in script_routes(soup):
+                match = urljoin(base_url, match)
+                if self.domain in match:
+                    links.add(match)
                                 
         except Exception as e:
             logger.debug(f"Error extracting links: {e}")
@@ -916,51 +1526,9 @@ class EnhancedCrawler:
         return links
         
     def _extract_title(self, html):
-        """Extract page title with fallback strategies"""
+        """Extract page title with fallback strategies (title, og:title, twitter:title, h1)"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Try multiple title extraction methods
-            title = None
-            
-            # 1. Standard title tag
-            title_tag = soup.find('title')
-            if title_tag and title_tag.get_text().strip():
-                title = title_tag.get_text().strip()
-            
-            # 2. Try og:title meta tag
-            if not title or len(title) < 3:
-                og_title = soup.find('meta', property='og:title')
-                if og_title and hasattr(og_title, 'get') and og_title.get('content'):
-                    title = og_title.get('content').strip()
-            
-            # 3. Try twitter:title meta tag
-            if not title or len(title) < 3:
-                twitter_title = soup.find('meta', attrs={'name': 'twitter:title'})
-                if twitter_title and hasattr(twitter_title, 'get') and twitter_title.get('content'):
-                    title = twitter_title.get('content').strip()
-            
-            # 4. Try h1 tag as fallback
-            if not title or len(title) < 3:
-                h1_tag = soup.find('h1')
-                if h1_tag and h1_tag.get_text().strip():
-                    title = h1_tag.get_text().strip()
-            
-            # Clean and validate title
-            if title:
-                # Remove extra whitespace and newlines
-                title = ' '.join(title.split())
-                # Remove common unwanted suffixes
-                for suffix in [' - ' + self.domain, ' | ' + self.domain, ' :: ' + self.domain]:
-                    if title.endswith(suffix):
-                        title = title[:-len(suffix)]
-                
-                # Return if meaningful title found
-                if len(title) > 2 and not title.lower() in ['untitled', 'page', 'home']:
-                    return title
-            
-            return "Başlık bulunamadı"
-            
+            return self.title_extractor.extract(html)
         except Exception as e:
             logger.debug(f"Error extracting title: {e}")
             return "Başlık bulunamadı"
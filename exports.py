@@ -0,0 +1,419 @@
+# Crawl result exports streamed in chunks, with per-session caching of finished artifacts
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections import namedtuple
+
+from duplicates import EXCLUDED_STATUSES
+from sitemap_generator import SitemapXmlWriter
+
+logger = logging.getLogger(__name__)
+
+CSV_HEADER = ['URL', 'Sayfa Başlığı']
+NO_TITLE = 'Başlık bulunamadı'
+ROWS_PER_CHUNK = 1000
+GZIP_MIN_BYTES = 256 * 1024  # Smaller exports are sent uncompressed
+EXPORT_DIR = os.environ.get('EXPORT_DIR', 'exports')
+
+# One row of a crawl snapshot; status is an HTTP code, 'unchanged', 'timeout', 'error' or None.
+# priority/changefreq come from the link graph and are None where it has no say.
+CrawlRecord = namedtuple('CrawlRecord', ['url', 'status', 'title', 'depth', 'source', 'lastmod', 'priority', 'changefreq'],
+                         defaults=(None, None))
+
+
+def csv_chunks(urls, url_data, rows_per_chunk=ROWS_PER_CHUNK):
+    """Yield the CSV export as UTF-8 byte chunks, one chunk per batch of rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    rows = 1
+    for url in urls:
+        writer.writerow([url, url_data.get(url, NO_TITLE)])
+        rows += 1
+        if rows >= rows_per_chunk:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a byte-chunk stream into one gzip member without buffering it all"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CachedExport:
+    """Serialized export of a finished crawl; the gzip variant is built on first use"""
+
+    def __init__(self, data):
+        self.data = data
+        self._gzip = None
+        self._lock = threading.Lock()
+
+    def gzip(self):
+        with self._lock:
+            if self._gzip is None:
+                self._gzip = gzip.compress(self.data, compresslevel=6)
+            return self._gzip
+
+
+def crawl_records(crawler, frozen_graph=None):
+    """Yield one CrawlRecord per visited URL, sorted by URL.
+
+    Works with both crawlers; metadata the crawler does not track is None.
+    Duplicate, soft-404 and pruned pages are left out. Priorities are
+    computed once here from the crawler's link graph (or its frozen copy).
+    """
+    iter_sorted = getattr(crawler.visited, 'iter_sorted', None)
+    if iter_sorted:
+        # Disk-backed visited store: merge its sorted runs instead of sorting everything in memory
+        urls = iter_sorted()
+    else:
+        with crawler.lock:
+            urls = sorted(crawler.visited)
+    discovery = getattr(crawler, 'discovery', {})
+    status = getattr(crawler, 'status', {})
+    lastmod = getattr(crawler, 'lastmod', {})
+    from link_graph import crawl_priorities
+    priorities = crawl_priorities(crawler, frozen_graph)
+    for url in urls:
+        page_status = status.get(url)
+        if page_status in EXCLUDED_STATUSES:
+            continue
+        source, depth = discovery.get(url, (None, None))
+        priority, changefreq = priorities(url)
+        yield CrawlRecord(url, page_status, crawler.url_data.get(url), depth, source, lastmod.get(url),
+                          priority, changefreq)
+
+
+class CsvWriter:
+    """Same rows as the /download-csv export"""
+
+    def __init__(self, fileobj):
+        self.stream = io.TextIOWrapper(fileobj, encoding='utf-8', newline='', write_through=True)
+        self.writer = csv.writer(self.stream)
+        self.writer.writerow(CSV_HEADER)
+
+    def write(self, record):
+        self.writer.writerow([record.url, record.title or NO_TITLE])
+
+    def close(self):
+        self.stream.flush()
+        self.stream.detach()
+
+
+class TextSitemapWriter:
+    """Plain text sitemap: one URL per line"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+
+    def write(self, record):
+        self.fileobj.write(record.url.strip().encode('utf-8') + b'\n')
+
+    def close(self):
+        pass
+
+
+class JsonLinesWriter:
+    """One JSON object per URL with status, title, depth, source and lastmod"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+
+    def write(self, record):
+        self.fileobj.write(json.dumps(record._asdict(), ensure_ascii=False).encode('utf-8') + b'\n')
+
+    def close(self):
+        pass
+
+
+COLUMNAR_MAGIC = b'SMCOL\x02'
+COLUMNAR_MAGIC_V1 = b'SMCOL\x01'  # Single row group written at close; still readable
+ROWS_PER_GROUP = 65536  # Rows buffered before a row group is flushed
+NULL_CODE = 0xFFFFFFFF
+_STRING, _DICT, _INT32 = 1, 2, 3
+_COLUMNS = [('url', _STRING), ('title', _STRING), ('status', _DICT),
+            ('source', _DICT), ('lastmod', _DICT), ('depth', _INT32),
+            ('priority', _DICT), ('changefreq', _DICT)]
+
+
+def _le_bytes(values):
+    """Little-endian bytes of an array regardless of the host byte order"""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class _StringColumn:
+    def __init__(self):
+        self.offsets = array('I', [0])
+        self.blob = bytearray()
+
+    def append(self, value):
+        self.blob += (value or '').encode('utf-8')
+        self.offsets.append(len(self.blob))
+
+    def dump(self):
+        return _le_bytes(self.offsets) + bytes(self.blob)
+
+
+class _DictColumn:
+    """Low-cardinality strings stored as uint32 codes into a value table"""
+
+    def __init__(self):
+        self.values = {}
+        self.codes = array('I')
+
+    def append(self, value):
+        if value is None:
+            self.codes.append(NULL_CODE)
+        else:
+            self.codes.append(self.values.setdefault(str(value), len(self.values)))
+
+    def dump(self):
+        table = _StringColumn()
+        for value in self.values:
+            table.append(value)
+        return struct.pack('<I', len(self.values)) + table.dump() + _le_bytes(self.codes)
+
+
+class _Int32Column:
+    def __init__(self):
+        self.values = array('i')
+
+    def append(self, value):
+        self.values.append(-1 if value is None else value)
+
+    def dump(self):
+        return _le_bytes(self.values)
+
+
+_COLUMN_CLASSES = {_STRING: _StringColumn, _DICT: _DictColumn, _INT32: _Int32Column}
+
+
+class ColumnarWriter:
+    """Compact binary column dump for analytics, written in row groups.
+
+    Layout (little-endian): magic, uint16 columns, then per column a
+    uint16-prefixed name and a type byte. Row groups follow, each a uint32
+    row count and per column a uint64 byte length and the data; a group of
+    0 rows ends the file. Strings are uint32 offsets (rows + 1) followed by
+    the UTF-8 blob; dict columns are a value table of that form plus one
+    uint32 code per row (0xFFFFFFFF is null); int32 columns use -1 for null.
+    At most rows_per_group rows are held in memory.
+    """
+
+    def __init__(self, fileobj, rows_per_group=ROWS_PER_GROUP):
+        self.fileobj = fileobj
+        self.rows = 0
+        self.rows_per_group = rows_per_group
+        self._group_rows = 0
+        self.fileobj.write(COLUMNAR_MAGIC + struct.pack('<H', len(_COLUMNS)))
+        for name, kind in _COLUMNS:
+            encoded = name.encode('utf-8')
+            self.fileobj.write(struct.pack('<H', len(encoded)) + encoded + struct.pack('<B', kind))
+        self._new_group()
+
+    def _new_group(self):
+        self.columns = [(name, _COLUMN_CLASSES[kind]()) for name, kind in _COLUMNS]
+        self._group_rows = 0
+
+    def _flush_group(self):
+        self.fileobj.write(struct.pack('<I', self._group_rows))
+        for _name, column in self.columns:
+            data = column.dump()
+            self.fileobj.write(struct.pack('<Q', len(data)))
+            self.fileobj.write(data)
+        self._new_group()
+
+    def write(self, record):
+        for name, column in self.columns:
+            column.append(getattr(record, name))
+        self.rows += 1
+        self._group_rows += 1
+        if self._group_rows >= self.rows_per_group:
+            self._flush_group()
+
+    def close(self):
+        if self._group_rows:
+            self._flush_group()
+        self.fileobj.write(struct.pack('<I', 0))
+
+
+def _read_strings(data, pos, count):
+    offsets = array('I')
+    offsets.frombytes(data[pos:pos + 4 * (count + 1)])
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    pos += 4 * (count + 1)
+    blob = data[pos:pos + offsets[-1]]
+    return [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(count)], pos + offsets[-1]
+
+
+def _read_column(kind, body, rows):
+    if kind == _STRING:
+        return _read_strings(body, 0, rows)[0]
+    if kind == _DICT:
+        (size,) = struct.unpack_from('<I', body, 0)
+        table, end = _read_strings(body, 4, size)
+        codes = array('I')
+        codes.frombytes(body[end:end + 4 * rows])
+        if sys.byteorder == 'big':
+            codes.byteswap()
+        return [None if code == NULL_CODE else table[code] for code in codes]
+    values = array('i')
+    values.frombytes(body)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return [None if value == -1 else value for value in values]
+
+
+def _read_columnar_v1(data):
+    pos = len(COLUMNAR_MAGIC_V1)
+    rows, column_count = struct.unpack_from('<IH', data, pos)
+    pos += 6
+    columns = {}
+    for _ in range(column_count):
+        (name_length,) = struct.unpack_from('<H', data, pos)
+        name = data[pos + 2:pos + 2 + name_length].decode('utf-8')
+        pos += 2 + name_length
+        kind, length = struct.unpack_from('<BQ', data, pos)
+        pos += 9
+        columns[name] = _read_column(kind, data[pos:pos + length], rows)
+        pos += length
+    return columns
+
+
+def read_columnar(path):
+    """Load a ColumnarWriter dump back into {column name: list of values}"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data.startswith(COLUMNAR_MAGIC_V1):
+        return _read_columnar_v1(data)
+    if not data.startswith(COLUMNAR_MAGIC):
+        raise ValueError(f"{path} is not a columnar crawl export")
+    pos = len(COLUMNAR_MAGIC)
+    (column_count,) = struct.unpack_from('<H', data, pos)
+    pos += 2
+    layout = []
+    for _ in range(column_count):
+        (name_length,) = struct.unpack_from('<H', data, pos)
+        name = data[pos + 2:pos + 2 + name_length].decode('utf-8')
+        pos += 2 + name_length
+        layout.append((name, data[pos]))
+        pos += 1
+    columns = {name: [] for name, _kind in layout}
+    while True:
+        (rows,) = struct.unpack_from('<I', data, pos)
+        pos += 4
+        if not rows:
+            return columns
+        for name, kind in layout:
+            (length,) = struct.unpack_from('<Q', data, pos)
+            pos += 8
+            columns[name].extend(_read_column(kind, data[pos:pos + length], rows))
+            pos += length
+
+
+# format -> (file name, mimetype, writer class)
+EXPORT_FORMATS = {
+    'xml': ('sitemap.xml', 'application/xml', SitemapXmlWriter),
+    'txt': ('sitemap.txt', 'text/plain', TextSitemapWriter),
+    'jsonl': ('crawl.jsonl', 'application/x-ndjson', JsonLinesWriter),
+    'columnar': ('crawl.smcol', 'application/octet-stream', ColumnarWriter),
+    'csv': ('sitemap_urls.csv', 'text/csv', CsvWriter),
+}
+
+def write_edge_list(frozen, fileobj):
+    from link_graph import write_edge_list
+    return write_edge_list(frozen, fileobj)
+
+
+def write_csr(frozen, fileobj):
+    from link_graph import write_csr
+    return write_csr(frozen, fileobj)
+
+
+# Link graph exports: format -> (file name, mimetype, function(frozen graph, fileobj)).
+# link_graph (and numpy, when installed) load with the first export, not with the app
+GRAPH_FORMATS = {
+    'edges': ('links.tsv', 'text/tab-separated-values', write_edge_list),
+    'csr': ('links.csr', 'application/octet-stream', write_csr),
+}
+
+
+def export_crawl(crawler, directory, formats=None, stats=None):
+    """Serialize a crawl once and fan the sorted records out to every format.
+
+    Returns {format: file path}. Files are written under temporary names and
+    renamed when complete, so readers never see a partial export. The link
+    graph formats are only written when the crawler recorded links.
+    """
+    start = time.time()
+    formats = formats or list(EXPORT_FORMATS) + list(GRAPH_FORMATS)
+    os.makedirs(directory, exist_ok=True)
+    graph = getattr(crawler, 'link_graph', None)
+    # Frozen once for both the priorities and the graph exports
+    frozen = graph.freeze() if graph is not None and len(graph) else None
+    files, writers, paths = [], [], {}
+    done = False
+    try:
+        for fmt in formats:
+            if fmt in GRAPH_FORMATS:
+                continue
+            filename, _mimetype, writer_class = EXPORT_FORMATS[fmt]
+            paths[fmt] = os.path.join(directory, filename)
+            f = open(paths[fmt] + '.tmp', 'wb')
+            files.append(f)
+            writers.append(writer_class(f))
+        rows = 0
+        for record in crawl_records(crawler, frozen):
+            for writer in writers:
+                writer.write(record)
+            rows += 1
+        for writer in writers:
+            writer.close()
+        for f in files:
+            f.close()
+        if frozen is not None:
+            for fmt in formats:
+                if fmt in GRAPH_FORMATS:
+                    filename, _mimetype, write = GRAPH_FORMATS[fmt]
+                    paths[fmt] = os.path.join(directory, filename)
+                    with open(paths[fmt] + '.tmp', 'wb') as f:
+                        write(frozen, f)
+        for path in paths.values():
+            os.replace(path + '.tmp', path)
+        done = True
+    finally:
+        for f in files:
+            f.close()
+        if not done:
+            # Leave no partial exports behind
+            for path in paths.values():
+                try:
+                    os.remove(path + '.tmp')
+                except FileNotFoundError:
+                    pass
+    if stats:
+        stats.record_phase('export', time.time() - start)
+    logger.info(f"Exported {rows} URLs as {', '.join(paths)} to {directory}")
+    return paths
@@ -0,0 +1,139 @@
+# Feed and structured-data discovery: RSS/Atom/JSON feeds and JSON-LD list every post URL cheaply
+import json
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+from incremental import http_date_to_lastmod
+from js_routes import extract_json_routes
+
+# Plain application/json is left out: it also marks API links such as WordPress /wp-json/ ones
+FEED_TYPES = ('application/rss+xml', 'application/atom+xml', 'application/feed+json')
+# Tried when a site's pages declare no feed
+COMMON_FEED_PATHS = ('/feed/', '/rss.xml', '/atom.xml', '/feed.xml', '/index.xml', '/feed.json', '/blog/feed/', '/rss/')
+MAX_FEED_PAGES = 50  # Pages followed per feed through rel="next" or ?paged=N
+CHUNK_SIZE = 16384
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+
+
+class _HeadLinkParser(HTMLParser):
+    """Collects feed <link rel="alternate"> targets and the bodies of JSON-LD scripts"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.feeds = []
+        self.json_ld = []
+        self._in_json_ld = False
+        self._buffer = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'link':
+            attrs = dict(attrs)
+            rel = (attrs.get('rel') or '').lower().split()
+            feed_type = (attrs.get('type') or '').split(';')[0].strip().lower()
+            if 'alternate' in rel and feed_type in FEED_TYPES and attrs.get('href'):
+                self.feeds.append(attrs['href'].strip())
+        elif tag == 'script':
+            script_type = (dict(attrs).get('type') or '').strip().lower()
+            self._in_json_ld = script_type == 'application/ld+json'
+            self._buffer = []
+
+    def handle_data(self, data):
+        if self._in_json_ld:
+            self._buffer.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'script' and self._in_json_ld:
+            self.json_ld.append(''.join(self._buffer))
+            self._in_json_ld = False
+
+
+def page_feeds_and_json_ld(html, base_url):
+    """(feed URLs declared by a page, URLs in its JSON-LD blocks), both absolute"""
+    parser = _HeadLinkParser()
+    parser.feed(html)
+    parser.close()
+    feeds = list(dict.fromkeys(urljoin(base_url, href) for href in parser.feeds))
+    urls = {}
+    for block in parser.json_ld:
+        for route in extract_json_routes(block) or ():
+            urls[urljoin(base_url, route)] = None
+    return feeds, list(urls)
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _entry_link(elem):
+    """Page URL of an RSS <item> or Atom <entry>"""
+    if _local(elem.tag) == 'item':
+        link = elem.findtext('link')
+        if link and link.strip():
+            return link.strip()
+        guid = elem.find('guid')
+        if guid is not None and guid.text and guid.get('isPermaLink', 'true') == 'true' and guid.text.startswith('http'):
+            return guid.text.strip()
+        return None
+    fallback = None
+    for link in elem.iter(f'{ATOM_NS}link'):
+        rel = link.get('rel', 'alternate')
+        if rel == 'alternate' and link.get('href'):
+            if (link.get('type') or 'text/html') == 'text/html':
+                return link.get('href')
+            fallback = fallback or link.get('href')
+    return fallback
+
+
+def _entry_lastmod(elem):
+    if _local(elem.tag) == 'item':
+        return http_date_to_lastmod(elem.findtext('pubDate'))
+    updated = elem.findtext(f'{ATOM_NS}updated') or elem.findtext(f'{ATOM_NS}published')
+    return updated.strip() if updated else None
+
+
+def xml_feed_entries(chunks):
+    """Stream-parse an RSS or Atom feed.
+
+    Yields ('entry', url, lastmod) per item, ('next', url, None) for a
+    rel="next" page link and ('wordpress', None, None) when the generator is
+    WordPress (whose feeds page through ?paged=N). Items are cleared once
+    read, so memory stays flat however long the feed is.
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            name = _local(elem.tag)
+            if name in ('item', 'entry'):
+                url = _entry_link(elem)
+                if url:
+                    yield 'entry', url, _entry_lastmod(elem)
+                elem.clear()
+            elif name == 'link' and elem.get('rel') == 'next' and elem.get('href'):
+                yield 'next', elem.get('href'), None
+            elif name == 'generator' and 'wordpress' in ((elem.text or '') + (elem.get('uri') or '')).lower():
+                yield 'wordpress', None, None
+    parser.close()
+
+
+def json_feed_entries(text):
+    """Entries of a JSON Feed (jsonfeed.org), same tuples as xml_feed_entries; other JSON yields nothing"""
+    data = json.loads(text)
+    if not isinstance(data, dict) or not str(data.get('version', '')).startswith('https://jsonfeed.org/version/'):
+        return
+    for item in data.get('items') or ():
+        if isinstance(item, dict):
+            url = item.get('url') or item.get('external_url')
+            if isinstance(url, str) and url:
+                yield 'entry', url, item.get('date_modified') or item.get('date_published')
+    if isinstance(data.get('next_url'), str):
+        yield 'next', data['next_url'], None
+
+
+def wordpress_page(feed_url, page):
+    """URL of page N of a WordPress feed"""
+    parts = urlsplit(feed_url)
+    query = [(key, value) for key, value in parse_qsl(parts.query) if key != 'paged'] + [('paged', str(page))]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
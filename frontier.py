@@ -0,0 +1,89 @@
+import heapq
+import itertools
+import threading
+import time
+
+# Lower value = fetched first
+PRIORITY_HIGH = 0    # Sitemap entries, blog posts, the start page
+PRIORITY_NORMAL = 1  # Links extracted from crawled pages
+PRIORITY_LOW = 2     # Guessed URLs from pattern generation
+
+
+class Frontier:
+    """Thread-safe priority queue shared by all crawl producers and the fetch pool"""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()  # FIFO order within the same priority
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._delayed = []  # (due time, priority, url) of retries waiting out their backoff
+
+    def put(self, url, priority=PRIORITY_NORMAL):
+        with self._cond:
+            self._push((priority, next(self._counter), url))
+            self._cond.notify()
+
+    def put_later(self, url, priority=PRIORITY_NORMAL, delay=0):
+        """Queue url once delay seconds have passed; until then the frontier is not drained"""
+        with self._cond:
+            heapq.heappush(self._delayed, (time.monotonic() + delay, priority, url))
+            self._cond.notify()
+
+    def _push(self, entry):
+        heapq.heappush(self._heap, entry)
+
+    def _pop(self):
+        return heapq.heappop(self._heap)[2]
+
+    def _queued(self):
+        return bool(self._heap)
+
+    def _wait(self, timeout):
+        """Wait for a queued URL, moving delayed URLs in as they fall due; caller holds _cond"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, priority, url = heapq.heappop(self._delayed)
+                self._push((priority, next(self._counter), url))
+            if self._queued():
+                return True
+            if deadline is not None and now >= deadline:
+                return False
+            wakeups = [t - now for t in (deadline, self._delayed[0][0] if self._delayed else None) if t is not None]
+            self._cond.wait(min(wakeups) if wakeups else None)
+
+    def get(self, timeout=None):
+        """Pop the most urgent URL, or return None if nothing arrives within timeout.
+
+        Every URL returned must be acknowledged with task_done().
+        """
+        with self._cond:
+            if not self._wait(timeout):
+                return None
+            self._in_flight += 1
+            return self._pop()
+
+    def task_done(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def drain(self):
+        """Remove and return every queued or delayed URL, e.g. when the crawl runs out of time"""
+        with self._cond:
+            urls = [url for _, _, url in self._delayed]
+            self._delayed = []
+            while self._queued():
+                urls.append(self._pop())
+            return urls
+
+    def is_drained(self):
+        """True when nothing is queued or delayed and no popped URL is still being processed"""
+        with self._cond:
+            return not self._queued() and not self._delayed and self._in_flight == 0
+
+    def __len__(self):
+        with self._cond:
+            return len(self._heap) + len(self._delayed)
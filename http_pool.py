@@ -0,0 +1,120 @@
+# Process-wide HTTP connection pooling shared by every crawl session
+import logging
+import os
+import threading
+
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from metrics import GLOBAL_STATS
+
+logger = logging.getLogger(__name__)
+
+POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 50))  # Host pools kept (LRU)
+POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 16))  # Idle connections kept per host
+
+# Stats of the job issuing the request on this thread, set by SharedPoolAdapter.send
+_current = threading.local()
+
+
+class _CountingPoolMixin:
+    """Records whether each checkout reuses a live connection or has to connect (and handshake)"""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        stats = getattr(_current, 'stats', None) or GLOBAL_STATS
+        stats.record_cache('connection', not conn.is_closed)
+        return conn
+
+
+class CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class SharedConnectionPool:
+    """One urllib3 PoolManager for the whole process.
+
+    Pools are keyed by scheme, host, port and TLS settings, so jobs against
+    the same host pick up the idle keep-alive connections of earlier jobs
+    instead of opening new TCP/TLS connections.
+    """
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.poolmanager = PoolManager(num_pools=pool_connections, maxsize=pool_maxsize, block=False)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool,
+        }
+
+    def snapshot(self):
+        """Host pool count and idle connections currently held"""
+        pools = self.poolmanager.pools
+        idle = 0
+        hosts = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None and pool.pool is not None:
+                hosts += 1
+                # Free slots are held as None placeholders in the pool queue
+                idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        return {
+            'pools': hosts,
+            'idle_connections': idle,
+            'pool_connections': self.pool_connections,
+            'pool_maxsize': self.pool_maxsize,
+        }
+
+    def clear(self):
+        self.poolmanager.clear()
+
+
+SHARED_POOL = SharedConnectionPool()
+
+
+def configure_pool(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    """Replace the shared pool; adapters created afterwards use the new sizing"""
+    global SHARED_POOL
+    old, SHARED_POOL = SHARED_POOL, SharedConnectionPool(pool_connections, pool_maxsize)
+    old.clear()
+    logger.info(f"HTTP pool resized: {pool_connections} hosts, {pool_maxsize} connections per host")
+    return SHARED_POOL
+
+
+class SharedPoolAdapter(HTTPAdapter):
+    """HTTPAdapter backed by the shared pool; retries stay per adapter.
+
+    stats (a CrawlStats) receives this session's connection hit/miss counts.
+    """
+
+    def __init__(self, stats=None, pool=None, **kwargs):
+        self.stats = stats
+        self.shared_pool = pool or SHARED_POOL
+        kwargs.setdefault('pool_connections', self.shared_pool.pool_connections)
+        kwargs.setdefault('pool_maxsize', self.shared_pool.pool_maxsize)
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = self.shared_pool.poolmanager
+
+    def send(self, request, **kwargs):
+        previous = getattr(_current, 'stats', None)
+        _current.stats = self.stats
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            _current.stats = previous
+
+    def close(self):
+        # Session.close() must not drop connections other jobs are reusing
+        for proxy in self.proxy_manager.values():
+            proxy.clear()
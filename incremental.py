@@ -0,0 +1,149 @@
+# Incremental recrawl support: crawl snapshots, previous sitemaps and lastmod handling
+import json
+import logging
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from duplicates import EXCLUDED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', 'snapshots')
+MAX_INDEX_DEPTH = 3  # Nested sitemap index levels followed below a previous sitemap
+
+
+def parse_lastmod(value):
+    """Parse a sitemap <lastmod> (W3C datetime) into a naive UTC datetime, or None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def http_date_to_lastmod(value):
+    """Convert a Last-Modified header into a sitemap date (YYYY-MM-DD), or None"""
+    try:
+        return parsedate_to_datetime(value).strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None
+
+
+def is_newer(upstream, previous):
+    """True if the upstream lastmod is later than the previous one, or either is unknown"""
+    upstream_dt = parse_lastmod(upstream)
+    previous_dt = parse_lastmod(previous)
+    if upstream_dt is None or previous_dt is None:
+        return True
+    return upstream_dt > previous_dt
+
+
+def sitemap_entries(root):
+    """Yield (loc, lastmod) pairs from a parsed <urlset>"""
+    for url_elem in root.iter(f'{SITEMAP_NS}url'):
+        loc = url_elem.find(f'{SITEMAP_NS}loc')
+        if loc is None or not loc.text:
+            continue
+        lastmod = url_elem.find(f'{SITEMAP_NS}lastmod')
+        yield loc.text.strip(), (lastmod.text.strip() if lastmod is not None and lastmod.text else None)
+
+
+def load_previous_sitemap(source, session=None):
+    """Load {url: lastmod} from an http(s) sitemap URL.
+
+    Sitemap indexes are followed up to MAX_INDEX_DEPTH levels deep and each
+    sitemap is read once, so indexes listing themselves or each other end.
+    """
+    pages = {}
+    if not source.startswith(('http://', 'https://')):
+        logger.warning(f"Previous sitemap {source!r} is not an http(s) URL; ignored")
+        return pages
+    import requests
+    pending = [(source, 0)]
+    read = {source}
+    while pending:
+        sitemap_url, depth = pending.pop()
+        try:
+            response = (session or requests).get(sitemap_url, timeout=10)
+            response.raise_for_status()
+            root = ET.fromstring(response.content)
+        except Exception as e:
+            logger.warning(f"Could not load previous sitemap {sitemap_url}: {e}")
+            continue
+        for loc, lastmod in sitemap_entries(root):
+            pages[loc] = {'lastmod': lastmod}
+        if depth >= MAX_INDEX_DEPTH:
+            continue
+        for sitemap_elem in root.iter(f'{SITEMAP_NS}sitemap'):
+            loc_elem = sitemap_elem.find(f'{SITEMAP_NS}loc')
+            if loc_elem is None or not loc_elem.text:
+                continue
+            child = loc_elem.text.strip()
+            if child.startswith(('http://', 'https://')) and child not in read:
+                read.add(child)
+                pending.append((child, depth + 1))
+    return pages
+
+
+def snapshot_path(domain):
+    safe = re.sub(r'[^A-Za-z0-9.-]', '_', domain)
+    return os.path.join(SNAPSHOT_DIR, f"{safe}.json")
+
+
+def save_snapshot(crawler, path=None):
+    """Persist titles, lastmod values and HTTP validators of a finished crawl"""
+    path = path or snapshot_path(crawler.domain)
+    pages = {}
+    with crawler.lock:
+        urls = list(crawler.visited)
+    status = getattr(crawler, 'status', {})
+    for url in urls:
+        if status.get(url) in EXCLUDED_STATUSES:
+            # Judged again on the next crawl
+            continue
+        validators = crawler.validators.get(url, {})
+        pages[url] = {
+            'title': crawler.url_data.get(url),
+            'lastmod': crawler.lastmod.get(url),
+            'etag': validators.get('etag'),
+            'last_modified': validators.get('last_modified'),
+        }
+    snapshot = {
+        'start_url': crawler.start_url,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'pages': pages,
+    }
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        logger.info(f"Crawl snapshot saved with {len(pages)} URLs to {path}")
+    except Exception as e:
+        logger.error(f"Error saving crawl snapshot: {str(e)}")
+    return path
+
+
+def load_snapshot(domain=None, path=None):
+    """Load the {url: page info} map of a previous crawl, or {} if there is none"""
+    path = path or snapshot_path(domain)
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                pages = json.load(f).get('pages', {})
+            logger.info(f"Loaded crawl snapshot with {len(pages)} URLs from {path}")
+            return pages
+    except Exception as e:
+        logger.error(f"Error loading crawl snapshot: {str(e)}")
+    return {}
@@ -0,0 +1,159 @@
+# Route discovery in inline JavaScript and JSON without running it: one tokenizing pass over string literals
+import json
+import re
+
+# Keys whose string value is a link even when it is relative ("about", "blog/post");
+# other literals count only as root-relative paths or absolute URLs. JSON keys
+# match by suffix too (canonicalUrl, itemLink).
+LINK_KEYS = ('href', 'url', 'link', 'permalink', 'canonical', 'location')
+# Paths to static files rather than pages
+ASSET_EXTENSIONS = frozenset({
+    'js', 'mjs', 'cjs', 'css', 'map', 'json', 'png', 'jpg', 'jpeg', 'gif', 'svg', 'webp', 'avif', 'ico',
+    'woff', 'woff2', 'ttf', 'otf', 'eot', 'mp4', 'webm', 'mp3', 'wav', 'wasm', 'txt',
+})
+MAX_ROUTE_LENGTH = 512
+JSON_SCRIPT_TYPES = ('application/json', 'application/ld+json')
+
+_STRING = r"""(?:"[^"\\\n]*(?:\\.[^"\\\n]*)*"|'[^'\\\n]*(?:\\.[^'\\\n]*)*'|`[^`\\]*(?:\\.[^`\\]*)*`)"""
+# Literals that cannot be a route on their own: not starting with '/', 'h' (http) or an escape ("\/blog")
+_OTHER_STRING = (r"""(?:"(?![/hH\\])[^"\\\n]*(?:\\.[^"\\\n]*)*"|'(?![/hH\\])[^'\\\n]*(?:\\.[^'\\\n]*)*'"""
+                 r"""|`(?![/hH\\])[^`\\]*(?:\\.[^`\\]*)*`)""")
+_COMMENT = r'(?://[^\n]*|/\*.*?(?:\*/|\Z))'
+# A '/' starts a regex literal only right after a character that cannot end an operand
+_REGEX = (r'(?:(?<=[=(,:;!&|?{}\[\n])|(?<=[=(,:;!&|?{}\[\n]\s))'
+          r'/(?![*/])[^/\\\n\[]*(?:(?:\\.|\[[^\]\\\n]*(?:\\.[^\]\\\n]*)*\])[^/\\\n\[]*)*/')
+
+# Every string literal. Code between tokens is skipped in C, comments and
+# regex literals are consumed whole so quotes inside them cannot start a
+# string, and a quote that never closes is passed over.
+_LITERALS = re.compile(rf"""[^"'`/]*+(?:({_STRING})|{_COMMENT}|{_REGEX}|/|["'`]|\Z)""", re.S)
+# Same tokenizer, but each match also swallows every literal that cannot be a
+# route, so findall hands Python only the candidates
+_CANDIDATES = re.compile(rf"""(?:[^"'`/]++|{_OTHER_STRING}|{_COMMENT}|{_REGEX}|/)*+(?:({_STRING})|["'`]|\Z)""", re.S)
+# Values assigned to link keys: {href: "x"}, {"url": "x"}, a.href = "x". A
+# literal prefix per key lets the regex engine skip ahead like str.find; the
+# lookbehind after it rejects longer identifiers (myurl).
+_KEYED = [re.compile(rf"""{key}(?<![\w$]{key})["']?\s*[:=](?!=)\s*({_STRING})""") for key in LINK_KEYS]
+_ESCAPES = re.compile(r'\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)', re.S)
+_SIMPLE_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+_ROUTE = re.compile(r"/(?!/)[\w\-.~%!$&'()*+,;=:@/]*(?:\?[^\s#<>\"'`{}\\^|]*)?(?:#[^\s]*)?")
+_ABSOLUTE = re.compile(r"(?:https?://[\w\-]+(?:\.[\w\-]+)*|//[\w\-]+(?:\.[\w\-]+)+)(?::\d+)?(?:[/?#][^\s<>\"'`{}\\^|]*)?", re.I)
+# Path ending in a static file extension, before any query or fragment
+_ASSET = re.compile(rf"[^?#]*\.(?:{'|'.join(sorted(ASSET_EXTENSIONS))})(?:[?#]|\Z)", re.I | re.A)
+_ALNUM = re.compile(r'[^\W_]')
+_RELATIVE = re.compile(r"[\w\-.~%!$&'()*+,;=:@]+(?:/[\w\-.~%!$&'()*+,;=:@]*)*(?:\?[^\s#<>\"'`{}\\^|]*)?")
+
+
+def _unescape(match):
+    escape = match.group(1)
+    if escape[0] == 'u':
+        try:
+            return chr(int(escape[1:].strip('{}'), 16))
+        except ValueError:
+            return ''
+    if escape[0] == 'x':
+        return chr(int(escape[1:], 16))
+    return _SIMPLE_ESCAPES.get(escape, escape)
+
+
+def _literal_value(literal):
+    """Value of a quoted literal; None for a template literal with ${} substitutions"""
+    raw = literal[1:-1]
+    if literal[0] == '`' and '${' in raw:
+        return None
+    return _ESCAPES.sub(_unescape, raw) if '\\' in raw else raw
+
+
+def string_literals(source):
+    """Values of all string literals in JavaScript source, in order.
+
+    Template literals with ${} substitutions are skipped: their value is unknown.
+    """
+    for literal in _LITERALS.findall(source):
+        if literal:
+            value = _literal_value(literal)
+            if value is not None:
+                yield value
+
+
+def route_like(value, keyed=False):
+    """True if a string is plausibly a link to a page.
+
+    Absolute URLs and root-relative paths qualify on their own; bare relative
+    paths only when keyed, i.e. the value of a link key. Static files, regex
+    sources, MIME types, route templates ("/blog/[slug]") and anything with
+    whitespace are rejected.
+    """
+    if not value or len(value) > MAX_ROUTE_LENGTH:
+        return False
+    if value[0] == '/' and value[1:2] != '/':
+        if len(value) < 2 or not _ROUTE.fullmatch(value) or not _ALNUM.search(value):
+            return False
+    elif value.startswith(('http://', 'https://', 'HTTP://', 'HTTPS://', '//')):
+        if not _ABSOLUTE.fullmatch(value):
+            return False
+    elif keyed:
+        if value.startswith(('#', '.', '?')) or ':' in value.split('/', 1)[0] or not _RELATIVE.fullmatch(value):
+            return False
+    else:
+        return False
+    return not _ASSET.match(value)
+
+
+def extract_routes(source):
+    """Route-like string literals of JavaScript source, unresolved and without duplicates"""
+    routes = {}
+    passes = [(_CANDIDATES.findall(source), False)] + [(pattern.findall(source), True) for pattern in _KEYED]
+    for literals, keyed in passes:
+        for literal in dict.fromkeys(literals):
+            if not literal:
+                continue
+            value = _literal_value(literal)
+            if value and value not in routes and route_like(value, keyed):
+                routes[value] = None
+    return list(routes)
+
+
+def _walk_json(node, keyed, routes):
+    if isinstance(node, dict):
+        for key, child in node.items():
+            _walk_json(child, key.lower().endswith(LINK_KEYS) or key == '@id', routes)
+    elif isinstance(node, list):
+        for child in node:
+            _walk_json(child, keyed, routes)
+    elif isinstance(node, str) and node not in routes and route_like(node, keyed):
+        routes[node] = None
+
+
+def extract_json_routes(text):
+    """Route-like values of a JSON document (__NEXT_DATA__, ld+json); None if it does not parse"""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    routes = {}
+    _walk_json(data, False, routes)
+    return list(routes)
+
+
+def script_routes(soup):
+    """Routes found in a parsed page's inline scripts.
+
+    JSON blocks (__NEXT_DATA__, application/ld+json and other
+    application/json payloads) are parsed as JSON; everything else, and JSON
+    that does not parse, goes through the string-literal scanner.
+    """
+    routes = {}
+    for script in soup.find_all('script'):
+        text = script.string if script.string is not None else script.get_text()
+        if not text or not text.strip():
+            continue
+        found = None
+        script_type = (script.get('type') or '').split(';')[0].strip().lower()
+        if script_type in JSON_SCRIPT_TYPES or script.get('id') == '__NEXT_DATA__':
+            found = extract_json_routes(text)
+        if found is None:
+            found = extract_routes(text)
+        for route in found:
+            routes[route] = None
+    return list(routes)
@@ -0,0 +1,439 @@
+# Crawl link graph kept as integer arrays, and sitemap priority/changefreq derived from it
+import logging
+import math
+import operator
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+_NOT_LOADED = object()
+_numpy = _NOT_LOADED
+
+# 'graph' ranks pages by links, depth and PageRank; 'slashes' keeps the old 1.0/0.8 by path depth
+PRIORITY_MODEL = os.environ.get('SITEMAP_PRIORITY_MODEL', 'graph')
+DAMPING = 0.85
+PAGERANK_ITERATIONS = 50
+PAGERANK_TOLERANCE = 1e-6  # L1 change of the rank vector that ends the power iteration
+# changefreq by priority: well-linked hub pages change more often than leaves
+CHANGEFREQ_TIERS = ((0.8, 'daily'), (0.4, 'weekly'), (0.0, 'monthly'))
+# Links kept per crawl session (8 bytes each plus the URL ids); later links are only counted
+MAX_EDGES = int(os.environ.get('LINK_GRAPH_MAX_EDGES', 2000000))
+EDGE_LIST_HEADER = b'source\ttarget\n'
+LINES_PER_CHUNK = 1000
+CSR_MAGIC = b'SMCSR\x01'
+
+
+def load_numpy():
+    """numpy, or None when it is not installed (the pure-Python path computes the same scores, only slower).
+
+    Imported on first use, so importing the app or the CLI does not load it.
+    """
+    global _numpy
+    if _numpy is _NOT_LOADED:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+class LinkGraph:
+    """Directed page graph built during a crawl.
+
+    URLs are interned to integer ids and every edge is one entry in two
+    parallel uint32 arrays, so a link costs 8 bytes instead of a tuple of
+    strings. At most max_edges links are kept (None for no limit); the rest
+    are counted in dropped. Thread-safe; call freeze() for analysis.
+    """
+
+    def __init__(self, max_edges=MAX_EDGES):
+        self.max_edges = max_edges
+        self.ids = {}
+        self.urls = []
+        self.sources = array('I')
+        self.targets = array('I')
+        self.dropped = 0
+        self.discarded = 0
+        self._lock = threading.Lock()
+
+    def _intern(self, url):
+        node = self.ids.get(url)
+        if node is None:
+            node = self.ids[url] = len(self.urls)
+            self.urls.append(url)
+        return node
+
+    def add_links(self, source, targets):
+        """Record the links of one page; repeats and self-links are ignored"""
+        targets = [target for target in dict.fromkeys(targets) if target != source]
+        with self._lock:
+            if self.max_edges is not None:
+                room = max(self.max_edges - len(self.targets), 0)
+                if len(targets) > room:
+                    if not room:
+                        self.dropped += len(targets)
+                        return
+                    self.dropped += len(targets) - room
+                    targets = targets[:room]
+            node = self._intern(source)
+            self.sources.extend([node] * len(targets))
+            self.targets.extend([self._intern(target) for target in targets])
+
+    def discard(self, url):
+        """Forget a page that will not be in the sitemap.
+
+        Its URL string is released and freeze() leaves out the page and its
+        links; the id stays behind as an empty slot so edge arrays need no
+        rewrite.
+        """
+        with self._lock:
+            node = self.ids.pop(url, None)
+            if node is not None:
+                self.urls[node] = None
+                self.discarded += 1
+
+    def __len__(self):
+        return len(self.urls) - self.discarded
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def snapshot(self):
+        """Size of the graph; bytes leaves out the URL strings, which the crawler holds anyway"""
+        with self._lock:
+            size = sum(sys.getsizeof(part) for part in (self.ids, self.urls, self.sources, self.targets))
+            return {'pages': len(self.urls) - self.discarded, 'links': len(self.targets), 'dropped': self.dropped,
+                    'discarded': self.discarded, 'bytes': size}
+
+    def freeze(self):
+        """Canonical CSR copy: nodes numbered in URL order, edges sorted and unique.
+
+        Ids otherwise depend on the order fetch threads happened to finish, so
+        this is what makes scores identical for the same graph.
+        """
+        with self._lock:
+            urls = list(self.urls)
+            sources = array('I', self.sources)
+            targets = array('I', self.targets)
+            discarded = self.discarded
+        if discarded:
+            # Discarded pages go, and so do the links from and to them
+            kept = [(s, t) for s, t in zip(sources, targets) if urls[s] is not None and urls[t] is not None]
+            sources = array('I', [s for s, _ in kept])
+            targets = array('I', [t for _, t in kept])
+        order = sorted((node for node, url in enumerate(urls) if url is not None), key=urls.__getitem__)
+        n = len(order)
+        if not n:
+            return FrozenGraph([], array('Q', [0]), array('I'))
+        remap = array('I', bytes(4 * len(urls)))
+        for new, old in enumerate(order):
+            remap[old] = new
+        urls = [urls[old] for old in order]
+        numpy = load_numpy()
+        if numpy is not None:
+            mapping = numpy.frombuffer(remap, dtype=numpy.uint32).astype(numpy.int64)
+            keys = numpy.sort(mapping[numpy.frombuffer(sources, dtype=numpy.uint32)] * n
+                              + mapping[numpy.frombuffer(targets, dtype=numpy.uint32)])
+            keys = keys[numpy.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+            counts = numpy.bincount(keys // n, minlength=n)
+            offsets = array('Q', [0])
+            offsets.frombytes(numpy.cumsum(counts, dtype=numpy.uint64).tobytes())
+            return FrozenGraph(urls, offsets, array('I', (keys % n).astype(numpy.uint32).tobytes()))
+        keys = sorted({remap[s] * n + remap[t] for s, t in zip(sources, targets)})
+        offsets = array('Q', bytes(8 * (n + 1)))
+        edge_targets = array('I')
+        for key in keys:
+            source, target = divmod(key, n)
+            offsets[source + 1] += 1
+            edge_targets.append(target)
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        return FrozenGraph(urls, offsets, edge_targets)
+
+
+class FrozenGraph:
+    """Immutable CSR graph: the out-links of node i are targets[offsets[i]:offsets[i + 1]]"""
+
+    def __init__(self, urls, offsets, targets):
+        self.urls = urls
+        self.offsets = offsets
+        self.targets = targets
+
+    def __len__(self):
+        return len(self.urls)
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def node(self, url):
+        """Id of url (binary search over the sorted URLs), or None"""
+        lo, hi = 0, len(self.urls)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.urls[mid] < url:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self.urls) and self.urls[lo] == url else None
+
+    def in_degrees(self):
+        n = len(self.urls)
+        numpy = load_numpy()
+        if numpy is not None:
+            counts = numpy.bincount(numpy.frombuffer(self.targets, dtype=numpy.uint32), minlength=n)
+            return array('I', counts.astype(numpy.uint32).tobytes())
+        counts = array('I', bytes(4 * n))
+        for target in self.targets:
+            counts[target] += 1
+        return counts
+
+    def depths(self, roots):
+        """Fewest clicks from any root URL; -1 where no link path exists"""
+        depth = array('i', [-1]) * len(self.urls)
+        queue = deque()
+        for url in roots:
+            node = self.node(url)
+            if node is not None and depth[node] < 0:
+                depth[node] = 0
+                queue.append(node)
+        offsets, targets = self.offsets, self.targets
+        while queue:
+            node = queue.popleft()
+            next_depth = depth[node] + 1
+            for target in targets[offsets[node]:offsets[node + 1]]:
+                if depth[target] < 0:
+                    depth[target] = next_depth
+                    queue.append(target)
+        return depth
+
+    def pagerank(self, damping=DAMPING, iterations=PAGERANK_ITERATIONS, tolerance=PAGERANK_TOLERANCE):
+        """PageRank by power iteration; rank of pages without out-links is spread evenly"""
+        n = len(self.urls)
+        if not n:
+            return []
+        numpy = load_numpy()
+        if numpy is not None:
+            return self._pagerank_numpy(numpy, damping, iterations, tolerance)
+        offsets = self.offsets
+        out = [offsets[i + 1] - offsets[i] for i in range(n)]
+        in_offsets, in_sources = self._incoming()
+        incoming = [in_sources[in_offsets[i]:in_offsets[i + 1]] for i in range(n)]
+        rank = [1.0 / n] * n
+        for _ in range(iterations):
+            # Pull form: each page sums its in-links' shares, and sum(map()) runs that loop in C
+            share = [r / o if o else 0.0 for r, o in zip(rank, out)]
+            dangling = sum(r for r, o in zip(rank, out) if not o)
+            base = (1.0 - damping + damping * dangling) / n
+            get = share.__getitem__
+            new = [base + damping * sum(map(get, sources)) for sources in incoming]
+            change = sum(map(abs, map(operator.sub, new, rank)))
+            rank = new
+            if change < tolerance:
+                break
+        return rank
+
+    def _incoming(self):
+        """Reverse CSR (in-link offsets, source ids) by counting sort"""
+        n = len(self.urls)
+        in_offsets = array('Q', bytes(8 * (n + 1)))
+        for target in self.targets:
+            in_offsets[target + 1] += 1
+        for i in range(n):
+            in_offsets[i + 1] += in_offsets[i]
+        cursor = array('Q', in_offsets)
+        in_sources = array('I', bytes(4 * len(self.targets)))
+        offsets, targets = self.offsets, self.targets
+        for source in range(n):
+            for target in targets[offsets[source]:offsets[source + 1]]:
+                in_sources[cursor[target]] = source
+                cursor[target] += 1
+        return in_offsets, in_sources
+
+    def _pagerank_numpy(self, numpy, damping, iterations, tolerance):
+        n = len(self.urls)
+        offsets = numpy.frombuffer(self.offsets, dtype=numpy.uint64).astype(numpy.int64)
+        out = numpy.diff(offsets)
+        sources = numpy.repeat(numpy.arange(n), out)
+        targets = numpy.frombuffer(self.targets, dtype=numpy.uint32)
+        dangling = out == 0
+        out = numpy.where(dangling, 1, out).astype(numpy.float64)
+        rank = numpy.full(n, 1.0 / n)
+        for _ in range(iterations):
+            spread = numpy.bincount(targets, weights=(rank / out)[sources], minlength=n)
+            new = damping * spread + (1.0 - damping + damping * rank[dangling].sum()) / n
+            change = numpy.abs(new - rank).sum()
+            rank = new
+            if change < tolerance:
+                break
+        return rank.tolist()
+
+
+def _le(values):
+    """Little-endian bytes of an array regardless of the host byte order"""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def edge_list_chunks(frozen, lines_per_chunk=LINES_PER_CHUNK):
+    """Tab-separated "source<TAB>target" lines in URL order, as UTF-8 byte chunks"""
+    yield EDGE_LIST_HEADER
+    urls, offsets, targets = frozen.urls, frozen.offsets, frozen.targets
+    lines = []
+    for node, source in enumerate(urls):
+        for target in targets[offsets[node]:offsets[node + 1]]:
+            lines.append(f"{source}\t{urls[target]}\n")
+        if len(lines) >= lines_per_chunk:
+            yield ''.join(lines).encode('utf-8')
+            lines = []
+    if lines:
+        yield ''.join(lines).encode('utf-8')
+
+
+def write_edge_list(frozen, fileobj):
+    for chunk in edge_list_chunks(frozen):
+        fileobj.write(chunk)
+
+
+def write_csr(frozen, fileobj):
+    """Binary adjacency dump (little-endian).
+
+    Magic, uint32 nodes, uint64 edges; then the URL table as uint32 offsets
+    (nodes + 1) and the UTF-8 blob, uint64 CSR offsets (nodes + 1) and one
+    uint32 target id per edge. Node ids are positions in the sorted URL table.
+    """
+    url_offsets = array('I', [0])
+    blob = bytearray()
+    for url in frozen.urls:
+        blob += url.encode('utf-8')
+        url_offsets.append(len(blob))
+    fileobj.write(CSR_MAGIC + struct.pack('<IQ', len(frozen.urls), len(frozen.targets)))
+    fileobj.write(_le(url_offsets))
+    fileobj.write(blob)
+    fileobj.write(_le(frozen.offsets))
+    fileobj.write(_le(frozen.targets))
+
+
+def read_csr(path):
+    """Load a write_csr dump back into a FrozenGraph"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(CSR_MAGIC):
+        raise ValueError(f"{path} is not a link graph export")
+    pos = len(CSR_MAGIC)
+    nodes, edges = struct.unpack_from('<IQ', data, pos)
+    pos += 12
+    url_offsets = _from_le('I', data[pos:pos + 4 * (nodes + 1)])
+    pos += 4 * (nodes + 1)
+    blob = data[pos:pos + url_offsets[-1]]
+    pos += url_offsets[-1]
+    urls = [blob[url_offsets[i]:url_offsets[i + 1]].decode('utf-8') for i in range(nodes)]
+    offsets = _from_le('Q', data[pos:pos + 8 * (nodes + 1)])
+    pos += 8 * (nodes + 1)
+    return FrozenGraph(urls, offsets, _from_le('I', data[pos:pos + 4 * edges]))
+
+
+class PriorityModel:
+    """Sitemap <priority> and <changefreq> from the crawl's link graph.
+
+    Each page scores a weighted mix of its PageRank, in-link count (both on a
+    log scale, relative to the best page) and closeness to the start URL;
+    the score maps onto min_priority..1.0 in steps of 0.1 and changefreq
+    follows the priority tiers. Root pages are always 1.0. Same graph, same
+    output.
+    """
+
+    def __init__(self, pagerank_weight=0.5, inlink_weight=0.2, depth_weight=0.3, min_priority=0.1,
+                 changefreq_tiers=CHANGEFREQ_TIERS, damping=DAMPING):
+        self.weights = (pagerank_weight, inlink_weight, depth_weight)
+        self.min_priority = min_priority
+        self.changefreq_tiers = changefreq_tiers
+        self.damping = damping
+
+    def changefreq(self, priority):
+        for threshold, changefreq in self.changefreq_tiers:
+            if priority >= threshold:
+                return changefreq
+        return self.changefreq_tiers[-1][1]
+
+    def _entry(self, score):
+        level = round(self.min_priority + (1 - self.min_priority) * min(score, 1.0), 1)
+        return f"{level:.1f}", self.changefreq(level)
+
+    def assign(self, graph, roots):
+        """{url: (priority, changefreq)} for every node of a LinkGraph or FrozenGraph"""
+        frozen = graph.freeze() if isinstance(graph, LinkGraph) else graph
+        n = len(frozen)
+        if not n:
+            return {}
+        ranks = frozen.pagerank(self.damping)
+        inlinks = frozen.in_degrees()
+        depths = frozen.depths(roots)
+        pagerank_weight, inlink_weight, depth_weight = self.weights
+        if max(depths) < 0:
+            depth_weight = 0  # No root in the graph: depth says nothing
+        total = (pagerank_weight + inlink_weight + depth_weight) or 1
+        # log1p(rank * n) is 1 for an average page, so the scale does not depend on graph size
+        top_rank = math.log1p(max(ranks) * n) or 1
+        top_inlinks = math.log1p(max(inlinks)) or 1
+        entries = {}
+        result = {}
+        for i, url in enumerate(frozen.urls):
+            depth = depths[i]
+            if depth == 0:
+                score = 1.0
+            else:
+                score = (pagerank_weight * math.log1p(ranks[i] * n) / top_rank
+                         + inlink_weight * math.log1p(inlinks[i]) / top_inlinks
+                         + (depth_weight / (1 + depth) if depth > 0 else 0)) / total
+            score = round(score, 12)  # Same entry whatever the float noise of the backend
+            entry = entries.get(score)
+            if entry is None:
+                entry = entries[score] = self._entry(score)
+            result[url] = entry
+        return result
+
+    def unlinked(self, url):
+        """Entry of a page no fetched page links to (found in a sitemap, feed or by guessing).
+
+        It has no PageRank or in-links, so only its path depth counts, on
+        the same scale as graph depth; a host's home page stays 1.0.
+        """
+        depth = url.rstrip('/').count('/') - 2
+        if depth <= 0:
+            return self._entry(1.0)
+        return self._entry(self.weights[2] / (1 + depth) / (sum(self.weights) or 1))
+
+
+DEFAULT_MODEL = PriorityModel()
+
+
+def crawl_priorities(crawler, frozen=None):
+    """Function url -> (priority, changefreq) for a finished crawl; (None, None) for
+    every URL when it kept no link graph, so writers use their defaults.
+    frozen reuses an already frozen copy of the crawler's graph."""
+    graph = frozen if frozen is not None else getattr(crawler, 'link_graph', None)
+    if PRIORITY_MODEL != 'graph' or graph is None or not len(graph):
+        return lambda url: (None, None)
+    start = time.time()
+    ranking = DEFAULT_MODEL.assign(graph, [crawler.start_url])
+    logger.info(f"Priorities for {len(ranking)} linked pages in {time.time() - start:.2f}s")
+    return lambda url: ranking.get(url) or DEFAULT_MODEL.unlinked(url)
@@ -1,4 +1,14 @@
-from app import app
+from app import create_app
+
+
+def __getattr__(name):
+    # `main:app` keeps working; importing this module (as spawned distributed
+    # workers do with the __main__ module) builds no app and starts no threads
+    if name == 'app':
+        import app
+        return app.app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
+    create_app().run(host="0.0.0.0", port=5000)
@@ -0,0 +1,202 @@
+# Crawl instrumentation: per-session stats plus process-wide Prometheus totals
+import threading
+import time
+from collections import Counter, deque
+
+# Upper bounds (seconds) of the fetch latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+
+
+class _Timer:
+    def __init__(self, stats, kind):
+        self.stats = stats
+        self.kind = kind
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.record_parse(self.kind, time.perf_counter() - self.start)
+        return False
+
+
+class CrawlStats:
+    """Thread-safe counters and timings for one crawl session.
+
+    Every update is mirrored into the parent stats (normally GLOBAL_STATS)
+    so /metrics can report process-wide totals.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.lock = threading.Lock()
+        self.phase_seconds = Counter()
+        self.fetches = 0
+        self.bytes_downloaded = 0
+        self.status_counts = Counter()
+        self.fetch_seconds = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latencies = deque(maxlen=5000)  # Recent samples for percentiles
+        self.parse_seconds = Counter()
+        self.parse_counts = Counter()
+        self.cache_hits = Counter()
+        self.cache_misses = Counter()
+        self.retries = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+
+    def record_fetch(self, status, nbytes, seconds):
+        """Record one HTTP request; status is an int or 'timeout'/'error'"""
+        with self.lock:
+            self.fetches += 1
+            self.bytes_downloaded += nbytes
+            self.status_counts[str(status)] += 1
+            self.fetch_seconds += seconds
+            self.latencies.append(seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self.latency_buckets[i] += 1
+                    break
+            else:
+                self.latency_buckets[-1] += 1
+        if self.parent:
+            self.parent.record_fetch(status, nbytes, seconds)
+
+    def record_parse(self, kind, seconds):
+        with self.lock:
+            self.parse_seconds[kind] += seconds
+            self.parse_counts[kind] += 1
+        if self.parent:
+            self.parent.record_parse(kind, seconds)
+
+    def timer(self, kind):
+        """Context manager timing a parse step"""
+        return _Timer(self, kind)
+
+    def record_phase(self, name, seconds):
+        with self.lock:
+            self.phase_seconds[name] += seconds
+        if self.parent:
+            self.parent.record_phase(name, seconds)
+
+    def record_cache(self, name, hit):
+        with self.lock:
+            if hit:
+                self.cache_hits[name] += 1
+            else:
+                self.cache_misses[name] += 1
+        if self.parent:
+            self.parent.record_cache(name, hit)
+
+    def record_retry(self):
+        """A failed page was requeued for another attempt"""
+        with self.lock:
+            self.retries += 1
+        if self.parent:
+            self.parent.record_retry()
+
+    def set_queue_depth(self, depth):
+        # Gauge is per session; /metrics sums it over active sessions
+        with self.lock:
+            self.queue_depth = depth
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def percentile(self, q):
+        """Fetch latency percentile (0-100) over the recent samples"""
+        with self.lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(round(q / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self):
+        """JSON-friendly view used by /stats/<session_id>"""
+        with self.lock:
+            cache_names = set(self.cache_hits) | set(self.cache_misses)
+            data = {
+                'phase_seconds': {k: round(v, 3) for k, v in self.phase_seconds.items()},
+                'fetches': self.fetches,
+                'bytes_downloaded': self.bytes_downloaded,
+                'status_counts': dict(self.status_counts),
+                'retries': self.retries,
+                'fetch_seconds': round(self.fetch_seconds, 3),
+                'parse_seconds': {k: round(v, 3) for k, v in self.parse_seconds.items()},
+                'parse_counts': dict(self.parse_counts),
+                'queue_depth': self.queue_depth,
+                'max_queue_depth': self.max_queue_depth,
+                'cache': {
+                    name: {
+                        'hits': self.cache_hits[name],
+                        'misses': self.cache_misses[name],
+                        'hit_rate': round(self.cache_hits[name] / max(1, self.cache_hits[name] + self.cache_misses[name]), 3),
+                    }
+                    for name in cache_names
+                },
+            }
+        data['latency_p50'] = round(self.percentile(50), 4)
+        data['latency_p99'] = round(self.percentile(99), 4)
+        return data
+
+
+GLOBAL_STATS = CrawlStats()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(stats=GLOBAL_STATS, gauges=None):
+    """Render stats in the Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if labels:
+                label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+            else:
+                lines.append(f"{name} {value}")
+
+    with stats.lock:
+        metric('sitemap_fetches_total', 'counter', 'HTTP requests issued by crawlers',
+               [({}, stats.fetches)])
+        metric('sitemap_fetch_retries_total', 'counter', 'Failed pages requeued with backoff',
+               [({}, stats.retries)])
+        metric('sitemap_bytes_downloaded_total', 'counter', 'Response body bytes downloaded',
+               [({}, stats.bytes_downloaded)])
+        metric('sitemap_http_responses_total', 'counter', 'Responses by HTTP status or failure kind',
+               [({'status': status}, count) for status, count in sorted(stats.status_counts.items())])
+
+        buckets = []
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, stats.latency_buckets):
+            cumulative += count
+            buckets.append(({'le': bound}, cumulative))
+        buckets.append(({'le': '+Inf'}, stats.fetches))
+        lines.append('# HELP sitemap_fetch_duration_seconds Fetch latency')
+        lines.append('# TYPE sitemap_fetch_duration_seconds histogram')
+        for labels, value in buckets:
+            lines.append(f'sitemap_fetch_duration_seconds_bucket{{le="{labels["le"]}"}} {value}')
+        lines.append(f'sitemap_fetch_duration_seconds_sum {stats.fetch_seconds:.6f}')
+        lines.append(f'sitemap_fetch_duration_seconds_count {stats.fetches}')
+
+        metric('sitemap_phase_seconds_total', 'counter', 'Wall time spent per crawl phase',
+               [({'phase': name}, f"{value:.6f}") for name, value in sorted(stats.phase_seconds.items())])
+        metric('sitemap_parse_seconds_total', 'counter', 'CPU-bound parse time by kind',
+               [({'kind': name}, f"{value:.6f}") for name, value in sorted(stats.parse_seconds.items())])
+        metric('sitemap_parse_total', 'counter', 'Parse operations by kind',
+               [({'kind': name}, value) for name, value in sorted(stats.parse_counts.items())])
+        cache_samples = []
+        for name in sorted(set(stats.cache_hits) | set(stats.cache_misses)):
+            cache_samples.append(({'cache': name, 'result': 'hit'}, stats.cache_hits[name]))
+            cache_samples.append(({'cache': name, 'result': 'miss'}, stats.cache_misses[name]))
+        metric('sitemap_cache_requests_total', 'counter', 'Cache lookups by result', cache_samples)
+
+    for name, (help_text, value) in sorted((gauges or {}).items()):
+        metric(name, 'gauge', help_text, [({}, value)])
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,179 @@
+# Opt-in per-job profiling: cProfile, stack sampling and tracemalloc snapshots
+import cProfile
+import logging
+import os
+import sys
+import tempfile
+import threading
+import tracemalloc
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'sitemap-profiles'))
+SAMPLE_INTERVAL = 0.01  # seconds between stack samples
+TOP_ALLOCATIONS = 30
+
+# tracemalloc is process-wide; overlapping profiled jobs share one trace.
+# A trace someone else started (tests, python -X tracemalloc) is left running.
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0:
+            _tracemalloc_owned = not tracemalloc.is_tracing()
+            if _tracemalloc_owned:
+                tracemalloc.start()  # One frame: statistics are grouped by line
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+
+class StackSampler(threading.Thread):
+    """Samples the stacks of selected threads into flamegraph folded format.
+
+    cProfile only sees the thread that enables it, while a crawl spends most
+    of its time in producer and fetch pool threads; sampling covers them all.
+    """
+
+    def __init__(self, thread_filter, interval=SAMPLE_INTERVAL):
+        super().__init__(name='profiler-sampler', daemon=True)
+        self.thread_filter = thread_filter
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident)
+                if ident == self.ident or name is None or not self.thread_filter(ident, name):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.counts[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class _ProfiledBlock:
+    def __init__(self, profiler, label):
+        self.profiler = profiler
+        self.label = label
+
+    def __enter__(self):
+        self.profiler._enter(self.label)
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._exit(self.label)
+        return False
+
+
+class JobProfiler:
+    """Profiles the blocks of one crawl job and writes downloadable artifacts.
+
+    Artifacts:
+      pstats  - cProfile data of the job thread (snakeviz, flameprof, pstats)
+      folded  - sampled stacks of the job and its pool threads (flamegraph.pl, speedscope)
+      alloc   - tracemalloc allocation growth per profiled block
+    """
+
+    def __init__(self, session_id, thread_prefix=None):
+        self.session_id = session_id
+        self.thread_prefix = thread_prefix
+        self.profile = cProfile.Profile()
+        self.sampler = None
+        self.job_thread = None
+        self.allocations = {}
+        self.artifacts = {}
+        self._snapshots = {}
+
+    def _is_job_thread(self, ident, name):
+        if ident == self.job_thread:
+            return True
+        return bool(self.thread_prefix) and name.startswith(self.thread_prefix)
+
+    def block(self, label):
+        """Context manager profiling one stage of the job, e.g. 'crawl' or 'generate'"""
+        return _ProfiledBlock(self, label)
+
+    def _enter(self, label):
+        if self.sampler is None:
+            self.job_thread = threading.get_ident()
+            self.sampler = StackSampler(self._is_job_thread)
+            self.sampler.start()
+        _start_tracemalloc()
+        self._snapshots[label] = tracemalloc.take_snapshot()
+        try:
+            # Raises ValueError on Python 3.12+ while another profiler is active
+            self.profile.enable()
+        except Exception:
+            del self._snapshots[label]
+            _stop_tracemalloc()
+            raise
+
+    def _exit(self, label):
+        self.profile.disable()
+        try:
+            # Ignore the profiler's own bookkeeping
+            ignore = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+            before = self._snapshots.pop(label).filter_traces(ignore)
+            after = tracemalloc.take_snapshot().filter_traces(ignore)
+            stats = after.compare_to(before, 'lineno')
+            peak = tracemalloc.get_traced_memory()[1]
+            lines = [f"== {label}: peak traced memory {peak / 1024:.1f} KiB"]
+            lines.extend(str(stat) for stat in stats[:TOP_ALLOCATIONS])
+            self.allocations[label] = '\n'.join(lines)
+        finally:
+            _stop_tracemalloc()
+
+    def save(self):
+        """Write all artifacts to PROFILE_DIR and return their paths by format"""
+        if self.sampler is not None:
+            self.sampler.stop()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, self.session_id)
+
+        self.profile.dump_stats(base + '.pstats')
+        self.artifacts['pstats'] = base + '.pstats'
+
+        with open(base + '.folded', 'w', encoding='utf-8') as f:
+            for stack, count in (self.sampler.counts.most_common() if self.sampler else []):
+                f.write(f"{stack} {count}\n")
+        self.artifacts['folded'] = base + '.folded'
+
+        with open(base + '.alloc.txt', 'w', encoding='utf-8') as f:
+            f.write('\n\n'.join(self.allocations.values()) + '\n')
+        self.artifacts['alloc'] = base + '.alloc.txt'
+
+        logger.info(f"Profile artifacts written for session {self.session_id}")
+        return self.artifacts
+
+    def cleanup(self):
+        """Delete written artifacts, called when the session expires"""
+        for path in self.artifacts.values():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.artifacts = {}
@@ -0,0 +1,217 @@
+# Sliding-window rate limiting with fixed-size state per client and pluggable storage
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 100000))  # Clients tracked in memory before the idlest is dropped
+PRUNE_EVERY = 1000  # Hits between sweeps of idle rows in shared backends
+
+
+def slide(state, index):
+    """(current, previous) counts of a key's state moved forward to window index"""
+    if state is None:
+        return 0, 0
+    last, current, previous = state
+    if index == last:
+        return current, previous
+    if index == last + 1:
+        return 0, current
+    return 0, 0
+
+
+def decide(current, previous, limit, window, now):
+    """(allowed, retry_after) for one more request.
+
+    The previous window counts in proportion to how much of it still
+    overlaps the sliding window, so the estimate moves smoothly instead of
+    resetting at window boundaries.
+    """
+    elapsed = (now % window) / window
+    if previous * (1 - elapsed) + current + 1 <= limit:
+        return True, 0.0
+    if current + 1 > limit or not previous:
+        # Room comes in the next window, once enough of this one has slid out
+        needed = 1 - (limit - 1) / current if current else 0
+        return False, window * (1 - elapsed + max(needed, 0))
+    # Wait until enough of the previous window has slid out
+    needed = 1 - (limit - current - 1) / previous
+    return False, max(window * (needed - elapsed), 0.0)
+
+
+class RateLimitBackend:
+    """Storage of per-key window counters.
+
+    hit() must check and count atomically, so several threads (or, for shared
+    backends, several processes or instances) can use one backend at once.
+    """
+
+    def hit(self, key, limit, window, now):
+        """Count one request for key if it is allowed; returns (allowed, retry_after)"""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class LocalBackend(RateLimitBackend):
+    """In-process counters: one (window index, current, previous) tuple per key,
+    least recently seen key evicted past max_keys.
+
+    An evicted key was idle longer than every tracked one; with max_keys well
+    above the clients active within two windows it had no requests left to count.
+    """
+
+    def __init__(self, max_keys=MAX_KEYS):
+        self.max_keys = max_keys
+        self.evicted = 0
+        self._states = OrderedDict()  # key -> (window index, current count, previous count), least recently seen first
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window, now):
+        index = int(now // window)
+        states = self._states
+        with self._lock:
+            state = states.get(key)
+            if state is None:
+                current = previous = 0
+                if len(states) >= self.max_keys:
+                    states.popitem(last=False)
+                    self.evicted += 1
+            else:
+                states.move_to_end(key)
+                if state[0] == index:
+                    current, previous = state[1], state[2]
+                else:
+                    current, previous = slide(state, index)
+            # Same test as decide(), inlined for the common case
+            if previous * (1 - (now % window) / window) + current + 1 <= limit:
+                states[key] = (index, current + 1, previous)
+                return True, 0.0
+            states[key] = (index, current, previous)
+        return False, decide(current, previous, limit, window, now)[1]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._states)
+
+
+class SQLiteBackend(RateLimitBackend):
+    """Counters in one SQLite file, shared by every worker process and container that mounts it"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._hits = 0
+
+    def _connection(self):
+        # Forked workers (gunicorn) must not share the parent's connection
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, idx INTEGER, '
+                               'current INTEGER, previous INTEGER) WITHOUT ROWID')
+            self._pid = os.getpid()
+        return self._conn
+
+    def hit(self, key, limit, window, now):
+        index = int(now // window)
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                current, previous = slide(conn.execute('SELECT idx, current, previous FROM rate_limits WHERE key = ?',
+                                                       (key,)).fetchone(), index)
+                allowed, retry_after = decide(current, previous, limit, window, now)
+                conn.execute('INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?)',
+                             (key, index, current + allowed, previous))
+                self._hits += 1
+                if self._hits % PRUNE_EVERY == 0:
+                    # Keys idle for two windows carry no count any more
+                    conn.execute('DELETE FROM rate_limits WHERE idx < ?', (index - 1,))
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+        return allowed, retry_after
+
+    def __len__(self):
+        with self._lock:
+            return self._connection().execute('SELECT COUNT(*) FROM rate_limits').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+class RedisBackend(RateLimitBackend):
+    """Counters in Redis for deployments with several instances; needs the optional redis package.
+
+    Each window is one counter key that expires after two windows, so idle
+    clients cost nothing. INCR counts first and a denied request is taken
+    back, which keeps check-and-count atomic without a script.
+    """
+
+    def __init__(self, url, prefix='ratelimit'):
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("The redis rate limit backend needs the redis package (pip install redis)")
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def hit(self, key, limit, window, now):
+        index = int(now // window)
+        current_key = f"{self.prefix}:{key}:{index}"
+        pipe = self._client.pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, int(window * 2) + 1)
+        pipe.get(f"{self.prefix}:{key}:{index - 1}")
+        counted, _, previous = pipe.execute()
+        allowed, retry_after = decide(counted - 1, int(previous or 0), limit, window, now)
+        if not allowed:
+            self._client.decr(current_key)
+        return allowed, retry_after
+
+    def __len__(self):
+        # Keys are prefix:client:window; count clients
+        return len({name.rsplit(b':', 1)[0] for name in self._client.scan_iter(f"{self.prefix}:*")})
+
+    def close(self):
+        self._client.close()
+
+
+def open_backend(spec):
+    """Open a rate limit backend from its spec: 'local', 'sqlite:///path/to/file.db' or 'redis://host:6379/0'"""
+    if spec in ('', 'local'):
+        return LocalBackend()
+    if spec.startswith('sqlite://'):
+        return SQLiteBackend(spec[len('sqlite://'):])
+    if spec.startswith(('redis://', 'rediss://')):
+        return RedisBackend(spec)
+    raise ValueError(f"Unsupported rate limit backend {spec!r}")
+
+
+class RateLimiter:
+    """At most limit requests per key in any sliding window of window seconds"""
+
+    def __init__(self, limit, window, backend=None):
+        self.limit = limit
+        self.window = window
+        self.backend = backend if backend is not None else LocalBackend()
+
+    def hit(self, key, now=None):
+        """Count a request from key; returns (allowed, seconds until the next one would be)"""
+        return self.backend.hit(key, self.limit, self.window, time.time() if now is None else now)
@@ -0,0 +1,126 @@
+# Crawl results shared across users: running jobs are joined, finished ones reused for a while
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_start_url(url):
+    """Start URL as the cache sees it: scheme added, host lower-cased, default port and trailing slash dropped"""
+    url = url.strip()
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    scheme = parts.scheme.lower()
+    port = parts.port
+    netloc = host if port is None or (scheme, port) in (('http', 80), ('https', 443)) else f"{host}:{port}"
+    return urlunsplit((scheme, netloc, parts.path.rstrip('/') or '/', parts.query, ''))
+
+
+def cache_key(url, options):
+    """Key of a crawl: normalized start URL plus every option that changes its result"""
+    return (normalize_start_url(url),) + tuple(sorted(options.items()))
+
+
+def estimate_result_size(crawler, export_bytes=0):
+    """Rough bytes a finished crawl keeps in memory: its URL/title map, link graph and cached exports"""
+    size = export_bytes
+    graph = getattr(crawler, 'link_graph', None)
+    if graph is not None:
+        size += graph.snapshot()['bytes']
+    with crawler.lock:
+        # A spilled map counts only what it still holds in memory
+        items = crawler.url_data.memory_items() if hasattr(crawler.url_data, 'memory_items') else list(crawler.url_data.items())
+    for url, title in items:
+        size += sys.getsizeof(url) + sys.getsizeof(title) + 100  # Dict and set slots per URL
+    return size
+
+
+class ResultCache:
+    """Session ids of crawls by cache_key.
+
+    A running crawl is always shared, so a second request for the same
+    domain and options joins it. A finished crawl is reused for ttl seconds;
+    past max_bytes of estimated result size the least recently used ones
+    are dropped. Thread-safe.
+    """
+
+    def __init__(self, ttl, max_bytes):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> [session_id, expiry or None while running, size]
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def claim(self, key, session_id):
+        """Session id to serve key from: an existing one, or session_id, now registered as running"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= now:
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+            self._entries[key] = [session_id, None, 0]
+            return session_id
+
+    def finish(self, key, session_id, size):
+        """Keep a successfully finished crawl for reuse.
+
+        Returns the session ids of other cached crawls dropped to stay under
+        max_bytes; nothing else will reuse them, so the caller frees them.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != session_id:
+                return []
+            entry[1] = time.time() + self.ttl
+            entry[2] = size
+            self._bytes += size
+            return [evicted for evicted in self._evict() if evicted != session_id]
+
+    def discard(self, key, session_id):
+        """Forget key if it still points at session_id, e.g. after a failed crawl"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == session_id:
+                self._remove(key)
+
+    def holds(self, session_id):
+        """True while a running or unexpired cached crawl uses session_id"""
+        now = time.time()
+        with self._lock:
+            return any(entry[0] == session_id and (entry[1] is None or entry[1] > now)
+                       for entry in self._entries.values())
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[2]
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used ones past max_bytes; returns the latter's session ids"""
+        now = time.time()
+        for key in [key for key, entry in self._entries.items() if entry[1] is not None and entry[1] <= now]:
+            self._remove(key)
+        evicted = []
+        # Least recently used first; running crawls are never evicted
+        for key in list(self._entries):
+            if self._bytes <= self.max_bytes:
+                break
+            if self._entries[key][1] is not None:
+                logger.info(f"Result cache over {self.max_bytes} bytes, dropping {key[0]}")
+                evicted.append(self._entries[key][0])
+                self._remove(key)
+        return evicted
+
+    def snapshot(self):
+        with self._lock:
+            running = sum(1 for entry in self._entries.values() if entry[1] is None)
+            return {'entries': len(self._entries), 'running': running, 'bytes': self._bytes}
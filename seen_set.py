@@ -0,0 +1,132 @@
+# Seen-sets for URL deduplication: exact, or a scalable Bloom filter for very large crawls
+import hashlib
+import math
+
+DEFAULT_ERROR_RATE = 0.001
+DEFAULT_CAPACITY = 100000  # URLs in the first Bloom stage
+
+
+class ExactSeenSet(set):
+    """Plain set of URL strings; no false positives"""
+
+    probabilistic = False
+
+
+def _hashes(item):
+    """Two 64-bit hashes of a string; h2 is odd so the probe sequence covers the table"""
+    digest = hashlib.blake2b(item.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter over strings.
+
+    Bit positions come from one blake2b digest via double hashing. Not
+    thread-safe; callers hold their own lock.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def contains_hashes(self, h1, h2):
+        bits = self.bits
+        m = self.num_bits
+        for i in range(self.num_hashes):
+            p = (h1 + i * h2) % m
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def add_hashes(self, h1, h2):
+        bits = self.bits
+        m = self.num_bits
+        for i in range(self.num_hashes):
+            p = (h1 + i * h2) % m
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return self.contains_hashes(*_hashes(item))
+
+    def add(self, item):
+        self.add_hashes(*_hashes(item))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+
+class ScalableBloomFilter:
+    """Bloom filter that grows by adding stages instead of degrading.
+
+    Each new stage has `growth` times the capacity and a tighter error rate,
+    so the overall false-positive rate stays below error_rate however many
+    URLs are added (Almeida et al., "Scalable Bloom Filters").
+    """
+
+    probabilistic = True
+
+    def __init__(self, error_rate=DEFAULT_ERROR_RATE, initial_capacity=DEFAULT_CAPACITY, growth=2, tightening=0.5):
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.error_rate = error_rate
+        self.initial_capacity = initial_capacity
+        self.growth = growth
+        self.tightening = tightening
+        self.stages = []
+        self.count = 0
+        self._add_stage()
+
+    def _add_stage(self):
+        index = len(self.stages)
+        capacity = self.initial_capacity * self.growth ** index
+        error_rate = self.error_rate * (1 - self.tightening) * self.tightening ** index
+        self.stages.append(BloomFilter(capacity, error_rate))
+
+    def _contains(self, h1, h2):
+        for stage in reversed(self.stages):
+            if stage.contains_hashes(h1, h2):
+                return True
+        return False
+
+    def __contains__(self, item):
+        return self._contains(*_hashes(item))
+
+    def add(self, item):
+        """Add an item unless it is (probably) present already"""
+        h1, h2 = _hashes(item)
+        if self._contains(h1, h2):
+            return
+        stage = self.stages[-1]
+        if stage.count >= stage.capacity:
+            self._add_stage()
+            stage = self.stages[-1]
+        stage.add_hashes(h1, h2)
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return sum(stage.nbytes for stage in self.stages)
+
+
+SEEN_SET_KINDS = ('exact', 'bloom')
+
+
+def make_seen_set(kind='exact', error_rate=DEFAULT_ERROR_RATE, initial_capacity=DEFAULT_CAPACITY):
+    """Seen-set for a crawl: 'exact' or 'bloom' (false positive rate error_rate)"""
+    if kind == 'exact':
+        return ExactSeenSet()
+    if kind == 'bloom':
+        return ScalableBloomFilter(error_rate=error_rate, initial_capacity=initial_capacity)
+    raise ValueError(f"Unknown seen-set kind {kind!r}, use one of: {', '.join(SEEN_SET_KINDS)}")
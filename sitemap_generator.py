@@ -1,53 +1,150 @@
-import xml.etree.ElementTree as ET
 from datetime import datetime
+from xml.sax.saxutils import escape
+import heapq
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+SITEMAP_XMLNS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+WRITE_BATCH = 1024  # <url> entries encoded and written at a time
+MAX_LASTMOD_CACHE = 4096  # Distinct lastmod values kept pre-rendered
+
+def url_priority(url):
+    """Homepage-like URLs get 1.0, everything else 0.8"""
+    stripped = url.rstrip('/')
+    return "1.0" if not stripped or stripped.count('/') <= 2 else "0.8"
+
+# Everything after <lastmod>, per (priority, changefreq)
+_ENTRY_TAIL = {}
+
+def _entry_tail(priority, changefreq="weekly"):
+    tail = _ENTRY_TAIL.get((priority, changefreq))
+    if tail is None:
+        tail = _ENTRY_TAIL[(priority, changefreq)] = (f"    <changefreq>{changefreq}</changefreq>\n"
+                                                      f"    <priority>{priority}</priority>\n  </url>")
+    return tail
+
+def merge_sorted_runs(runs):
+    """k-way merge of individually sorted URL iterables into one sorted stream without repeats"""
+    previous = None
+    for url in heapq.merge(*runs):
+        if url != previous:
+            yield url
+            previous = url
+
+def host_runs(urls):
+    """Split URLs into one sorted run per host; each sort is small and the runs merge lazily"""
+    runs = {}
+    for url in urls:
+        # scheme://host is everything before the third '/'; cheaper than urlsplit
+        runs.setdefault(url.split('/', 3)[2] if '//' in url else '', []).append(url)
+    for run in runs.values():
+        run.sort()
+    return list(runs.values())
+
+class SitemapXmlWriter:
+    """Streams <url> entries to a binary file in the layout ElementTree used to produce"""
+
+    def __init__(self, fileobj, default_lastmod=None):
+        self.fileobj = fileobj
+        # Used for records without a lastmod of their own
+        self.default_lastmod = default_lastmod
+        self.count = 0
+        self._pending = []
+        self._lastmod_lines = {}
+        self._default_line = self._lastmod_line(default_lastmod)
+        fileobj.write(b"<?xml version='1.0' encoding='UTF-8'?>\n")
+        fileobj.write(f'<urlset xmlns="{SITEMAP_XMLNS}">'.encode('utf-8'))
+
+    def _lastmod_line(self, lastmod):
+        """<lastmod> line of a date, rendered once per distinct value (crawls share few dates)"""
+        if not lastmod:
+            return ""
+        line = self._lastmod_lines.get(lastmod)
+        if line is None:
+            line = f"    <lastmod>{escape(lastmod)}</lastmod>\n"
+            if len(self._lastmod_lines) < MAX_LASTMOD_CACHE:
+                self._lastmod_lines[lastmod] = line
+        return line
+
+    def write(self, record):
+        self.write_url(record.url, record.lastmod, record.priority, record.changefreq)
+
+    def write_url(self, url, lastmod=None, priority=None, changefreq=None):
+        """priority and changefreq default to url_priority() and weekly"""
+        url = url.strip()
+        lastmod_line = self._lastmod_line(lastmod) if lastmod else self._default_line
+        tail = _entry_tail(priority or url_priority(url), changefreq or "weekly")
+        self._pending.append(f"\n  <url>\n    <loc>{escape(url)}</loc>\n{lastmod_line}{tail}")
+        if len(self._pending) >= WRITE_BATCH:
+            self._flush()
+
+    def write_urls(self, urls, lastmod=None, ranking=None):
+        """Bulk write_url; lastmod maps URL -> date, ranking URL -> (priority, changefreq)"""
+        pending = self._pending
+        default_line = self._default_line
+        lastmod = lastmod or {}
+        ranking = ranking or {}
+        for url in urls:
+            value = lastmod.get(url)
+            rank = ranking.get(url)
+            url = url.strip()
+            lastmod_line = self._lastmod_line(value) if value else default_line
+            tail = _entry_tail(*rank) if rank else _entry_tail(url_priority(url))
+            pending.append(f"\n  <url>\n    <loc>{escape(url)}</loc>\n{lastmod_line}{tail}")
+            if len(pending) >= WRITE_BATCH:
+                self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self.fileobj.write(''.join(self._pending).encode('utf-8'))
+            self.count += len(self._pending)
+            self._pending.clear()
+
+    def close(self):
+        self._flush()
+        self.fileobj.write(b"\n</urlset>" if self.count else b"</urlset>")
+
 class SitemapGenerator:
-    def generate(self, urls):
-        """Generate XML sitemap from URLs"""
+    def __init__(self, stats=None):
+        # Optional CrawlStats of the owning crawl session
+        self.stats = stats
+
+    def generate(self, urls, lastmod=None, presorted=False, ranking=None, path="sitemap.xml"):
+        """Generate XML sitemap from URLs.
+
+        lastmod maps URL -> real last modification date; URLs missing from it
+        get no <lastmod>. Without a mapping every URL is stamped with today.
+        presorted=True takes urls as an already sorted stream (e.g. a spilled
+        store's iter_sorted()) and writes it without building a list.
+        ranking maps URL -> (priority, changefreq), e.g. from
+        link_graph.PriorityModel; other URLs fall back to url_priority().
+        The sitemap is written to path, sitemap.xml in the cwd by default.
+        """
+        start = time.time()
         try:
-            # Create root element with proper namespace
-            urlset = ET.Element("urlset")
-            urlset.set("xmlns", "http://www.sitemaps.org/schemas/sitemap/0.9")
-            
+            # One date for the whole run
+            today = datetime.now().strftime("%Y-%m-%d") if lastmod is None else None
+
             # Sort URLs for consistent output
-            sorted_urls = sorted(list(urls))
-            
-            for url in sorted_urls:
-                url_element = ET.SubElement(urlset, "url")
-                
-                # Add location
-                loc = ET.SubElement(url_element, "loc")
-                loc.text = url.strip()
-                
-                # Add last modified date
-                lastmod = ET.SubElement(url_element, "lastmod")
-                lastmod.text = datetime.now().strftime("%Y-%m-%d")
-                
-                # Add change frequency (optional)
-                changefreq = ET.SubElement(url_element, "changefreq")
-                changefreq.text = "weekly"
-                
-                # Add priority (optional)
-                priority = ET.SubElement(url_element, "priority")
-                # Homepage gets higher priority
-                if url.rstrip('/').split('/')[-1] == '' or url.rstrip('/').count('/') <= 2:
-                    priority.text = "1.0"
-                else:
-                    priority.text = "0.8"
-            
-            # Create tree and write to file
-            tree = ET.ElementTree(urlset)
-            ET.indent(tree, space="  ", level=0)  # Pretty print
-            
-            with open("sitemap.xml", "wb") as f:
-                tree.write(f, encoding="UTF-8", xml_declaration=True)
-            
-            logger.info(f"Sitemap generated successfully with {len(sorted_urls)} URLs")
+            sorted_urls = urls if presorted else sorted(urls)
+
+            with open(path, "wb") as f:
+                writer = SitemapXmlWriter(f, default_lastmod=today)
+                writer.write_urls(sorted_urls, lastmod, ranking)
+                writer.close()
+
+            if self.stats:
+                self.stats.record_phase('generate', time.time() - start)
+            logger.info(f"Sitemap generated successfully with {writer.count} URLs")
             return True
-            
+
         except Exception as e:
             logger.error(f"Error generating sitemap: {str(e)}")
             return False
+
+    def generate_runs(self, runs, lastmod=None, ranking=None, path="sitemap.xml"):
+        """Generate the sitemap from several individually sorted runs (per host,
+        per worker, memory + disk), merged lazily instead of sorted as a whole"""
+        return self.generate(merge_sorted_runs(runs), lastmod, presorted=True, ranking=ranking, path=path)
@@ -0,0 +1,267 @@
+# Crawl state that spills to a local SQLite file once it outgrows a memory threshold
+import heapq
+import logging
+import marshal
+import os
+import sqlite3
+import tempfile
+import threading
+from collections.abc import MutableMapping
+
+from frontier import Frontier
+
+logger = logging.getLogger(__name__)
+
+SPILL_DIR = os.environ.get('SPILL_DIR') or tempfile.gettempdir()
+REFILL_BATCH = 1000  # Spilled frontier entries moved back into memory at a time
+
+
+def _open_spill_db(kind):
+    """Scratch database: no journal, no fsync, deleted again on close"""
+    fd, path = tempfile.mkstemp(prefix=f'crawl-{kind}-', suffix='.sqlite', dir=SPILL_DIR)
+    os.close(fd)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    return conn, path
+
+
+def _close_spill_db(conn, path):
+    conn.close()
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SpillingSeenSet:
+    """Exact URL set kept in memory up to memory_limit URLs, then in SQLite.
+
+    Supports the set operations the crawlers use (in, add, len, iteration)
+    plus iter_sorted() for exports, so it can stand in for the visited set.
+    """
+
+    probabilistic = False
+
+    def __init__(self, memory_limit):
+        self.memory_limit = memory_limit
+        self._memory = set()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._path = None
+        self._spilled = 0
+
+    def _spill(self, url):
+        if self._conn is None:
+            self._conn, self._path = _open_spill_db('seen')
+            self._conn.execute('CREATE TABLE seen (url TEXT PRIMARY KEY) WITHOUT ROWID')
+            logger.info(f"URL set passed {self.memory_limit} entries, spilling to {self._path}")
+        self._spilled += self._conn.execute('INSERT OR IGNORE INTO seen VALUES (?)', (url,)).rowcount
+
+    def _on_disk(self, url):
+        return self._conn is not None and self._conn.execute('SELECT 1 FROM seen WHERE url = ?', (url,)).fetchone() is not None
+
+    def __contains__(self, url):
+        with self._lock:
+            return url in self._memory or self._on_disk(url)
+
+    def add(self, url):
+        with self._lock:
+            if url in self._memory:
+                return
+            if len(self._memory) < self.memory_limit:
+                if not self._on_disk(url):
+                    self._memory.add(url)
+            else:
+                self._spill(url)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._memory) + self._spilled
+
+    def __iter__(self):
+        with self._lock:
+            memory = list(self._memory)
+        yield from memory
+        if self._conn is not None:
+            yield from (row[0] for row in self._conn.execute('SELECT url FROM seen'))
+
+    def iter_sorted(self):
+        """All URLs in sorted order without building one big sorted list"""
+        with self._lock:
+            memory = sorted(self._memory)
+        if self._conn is None:
+            return iter(memory)
+        return heapq.merge(memory, (row[0] for row in self._conn.execute('SELECT url FROM seen ORDER BY url')))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                _close_spill_db(self._conn, self._path)
+                self._conn = None
+            self._memory = set()
+            self._spilled = 0
+
+
+class SpillingDict(MutableMapping):
+    """Per-URL mapping kept in memory up to memory_limit keys, then in SQLite.
+
+    Values are the plain tuples, strings, numbers and dicts the crawlers
+    store per URL, serialized with marshal. Each operation is atomic, so
+    fetch threads can share it like a dict.
+    """
+
+    def __init__(self, memory_limit):
+        self.memory_limit = memory_limit
+        self._memory = {}
+        self._lock = threading.RLock()
+        self._conn = None
+        self._path = None
+        self._spilled = 0
+
+    def __getitem__(self, key):
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+            row = self._conn and self._conn.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+            if not row:
+                raise KeyError(key)
+            return marshal.loads(row[0])
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if key in self._memory or (len(self._memory) < self.memory_limit and self._conn is None):
+                self._memory[key] = value
+                return
+            if self._conn is None:
+                self._conn, self._path = _open_spill_db('map')
+                self._conn.execute('CREATE TABLE entries (key TEXT PRIMARY KEY, value BLOB) WITHOUT ROWID')
+                logger.info(f"URL map passed {self.memory_limit} entries, spilling to {self._path}")
+            inserted = self._conn.execute('INSERT OR IGNORE INTO entries VALUES (?, ?)',
+                                          (key, marshal.dumps(value))).rowcount
+            if inserted:
+                self._spilled += 1
+            else:
+                self._conn.execute('UPDATE entries SET value = ? WHERE key = ?', (marshal.dumps(value), key))
+
+    def __delitem__(self, key):
+        with self._lock:
+            if key in self._memory:
+                del self._memory[key]
+                return
+            deleted = self._conn and self._conn.execute('DELETE FROM entries WHERE key = ?', (key,)).rowcount
+            if not deleted:
+                raise KeyError(key)
+            self._spilled -= 1
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._memory or (self._conn is not None and self._conn.execute(
+                'SELECT 1 FROM entries WHERE key = ?', (key,)).fetchone() is not None)
+
+    def setdefault(self, key, default=None):
+        with self._lock:
+            return super().setdefault(key, default)
+
+    def pop(self, key, *default):
+        with self._lock:
+            return super().pop(key, *default)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._memory) + self._spilled
+
+    def __iter__(self):
+        with self._lock:
+            keys = list(self._memory)
+        yield from keys
+        last = ''
+        while True:
+            # Batches under the lock, so writers can use the connection in between
+            with self._lock:
+                if self._conn is None:
+                    return
+                rows = self._conn.execute('SELECT key FROM entries WHERE key > ? ORDER BY key LIMIT ?',
+                                          (last, REFILL_BATCH)).fetchall()
+            if not rows:
+                return
+            yield from (row[0] for row in rows)
+            last = rows[-1][0]
+
+    def memory_items(self):
+        """Entries still held in memory, for size estimates that must not read the disk"""
+        with self._lock:
+            return list(self._memory.items())
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                _close_spill_db(self._conn, self._path)
+                self._conn = None
+            self._memory = {}
+            self._spilled = 0
+
+
+class SpillingFrontier(Frontier):
+    """Frontier that keeps at most memory_limit queued URLs in its heap.
+
+    Overflow goes to a SQLite table ordered by the same (priority, sequence)
+    key, and get() always returns the smaller of the heap head and the disk
+    head, so the order is exactly that of the in-memory Frontier.
+    """
+
+    def __init__(self, memory_limit):
+        super().__init__()
+        self.memory_limit = memory_limit
+        self._conn = None
+        self._path = None
+        self._spilled = 0
+        self._disk_head = None  # Smallest (priority, seq, url) on disk
+
+    def _push(self, entry):
+        if len(self._heap) < self.memory_limit:
+            heapq.heappush(self._heap, entry)
+        else:
+            self._spill(entry)
+
+    def _spill(self, entry):
+        if self._conn is None:
+            self._conn, self._path = _open_spill_db('frontier')
+            self._conn.execute('CREATE TABLE frontier (priority INTEGER, seq INTEGER, url TEXT, PRIMARY KEY (priority, seq)) WITHOUT ROWID')
+            logger.info(f"Frontier passed {self.memory_limit} queued URLs, spilling to {self._path}")
+        self._conn.execute('INSERT INTO frontier VALUES (?, ?, ?)', entry)
+        self._spilled += 1
+        if self._disk_head is None or entry < self._disk_head:
+            self._disk_head = entry
+
+    def _refill(self):
+        """Move the smallest spilled entries back into the heap"""
+        rows = self._conn.execute('SELECT priority, seq, url FROM frontier ORDER BY priority, seq LIMIT ?',
+                                  (REFILL_BATCH,)).fetchall()
+        if rows:
+            last = rows[-1]
+            self._conn.execute('DELETE FROM frontier WHERE (priority, seq) <= (?, ?)', last[:2])
+            self._spilled -= len(rows)
+            for row in rows:
+                heapq.heappush(self._heap, row)
+        self._disk_head = self._conn.execute('SELECT priority, seq, url FROM frontier ORDER BY priority, seq LIMIT 1').fetchone()
+
+    def _queued(self):
+        return bool(self._heap or self._spilled)
+
+    def _pop(self):
+        if self._disk_head is not None and (not self._heap or self._disk_head < self._heap[0]):
+            self._refill()
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self):
+        with self._cond:
+            return len(self._heap) + self._spilled + len(self._delayed)
+
+    def close(self):
+        with self._cond:
+            if self._conn is not None:
+                _close_spill_db(self._conn, self._path)
+                self._conn = None
+                self._disk_head = None
+                self._spilled = 0
@@ -0,0 +1,24 @@
+import os
+import socket
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules live at the repository root; the synthetic site is shared with the benchmarks
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+
+@pytest.fixture
+def local_site():
+    """A small synthetic site served as http://127.0.0.1:<port>, reachable from any process without routing"""
+    from synthetic_site import SiteConfig, SiteServer, SyntheticSite
+
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    site = SyntheticSite(SiteConfig(base_domain=f'127.0.0.1:{port}', pages=30, fanout=4, subdomains=[],
+                                    slow_every=0, error_every=10, private_every=0))
+    with SiteServer(site, port):
+        yield site
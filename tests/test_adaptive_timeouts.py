@@ -0,0 +1,100 @@
+import pytest
+
+from adaptive_timeouts import (EWMA_ALPHA, MAX_CONNECT_TIMEOUT, MAX_TIMEOUT, MIN_SAMPLES, MIN_TIMEOUT, SKETCH_DECAY_AT,
+                               SKETCH_GROWTH, HostLatency, TimeoutPolicy)
+
+URL = 'https://example.com/page'
+
+
+def feed(policy, seconds, count, url=URL):
+    for _ in range(count):
+        policy.observe(url, seconds)
+
+
+def test_baseline_until_enough_samples():
+    policy = TimeoutPolicy(baselines={'deep_crawl': 2, 'pattern_analysis': 3})
+    assert policy.timeout_for(URL) == (2, 2)
+    assert policy.timeout_for(URL, 'pattern_analysis') == (3, 3)
+    assert policy.timeout_for(URL, 'unknown_kind') == (2, 2)
+
+    feed(policy, 0.1, MIN_SAMPLES - 1)
+    assert policy.timeout_for(URL) == (2, 2)
+    feed(policy, 0.1, 1)
+    assert policy.timeout_for(URL) != (2, 2)
+
+
+def test_ewma_follows_latency():
+    latency = HostLatency()
+    latency.observe(1.0)
+    latency.observe(2.0)
+    assert latency.ewma == pytest.approx(1.0 + EWMA_ALPHA * 1.0)
+
+
+def test_percentiles_are_accurate_to_one_bucket():
+    latency = HostLatency()
+    for i in range(100):
+        latency.observe(0.2 if i < 90 else 2.0)
+    assert 0.2 <= latency.percentile(50) <= 0.2 * SKETCH_GROWTH
+    assert 2.0 <= latency.percentile(99) <= 2.0 * SKETCH_GROWTH
+    assert HostLatency().percentile(50) == 0.0
+
+
+def test_timeouts_follow_the_hosts_latency():
+    policy = TimeoutPolicy()
+    feed(policy, 1.0, 20)
+    connect, read = policy.timeout_for(URL)
+    latency = policy._hosts['example.com']
+    # The EWMA dominates a steady host: three times its latency
+    assert read == pytest.approx(max(latency.percentile(99) * 1.5, 3.0))
+    assert connect == pytest.approx(latency.percentile(50) * 2)
+    assert 1.0 < connect < read
+
+
+def test_timeouts_are_clamped():
+    policy = TimeoutPolicy()
+    feed(policy, 0.01, 20, 'https://fast.example.com/')
+    feed(policy, 30.0, 20, 'https://slow.example.com/')
+    assert policy.timeout_for('https://fast.example.com/') == (MIN_TIMEOUT, MIN_TIMEOUT)
+    assert policy.timeout_for('https://slow.example.com/') == (MAX_CONNECT_TIMEOUT, MAX_TIMEOUT)
+
+
+def test_connect_timeout_never_exceeds_read_timeout():
+    latency = HostLatency()
+    for _ in range(MIN_SAMPLES):
+        latency.observe(0.4)
+    connect, read = latency.timeouts(1)
+    assert connect <= read
+
+
+def test_consecutive_timeouts_back_off_until_a_response():
+    policy = TimeoutPolicy(baselines={'deep_crawl': 1})
+    policy.observe_timeout(URL, (1, 1))
+    assert policy.timeout_for(URL) == (1, pytest.approx(1.5))
+    policy.observe_timeout(URL, 1.5)
+    assert policy.timeout_for(URL) == (1, pytest.approx(2.25))
+    for _ in range(20):
+        policy.observe_timeout(URL, None)
+    assert policy.timeout_for(URL)[1] == MAX_TIMEOUT
+
+    policy.observe(URL, 0.3)
+    assert policy.snapshot(URL)['consecutive_timeouts'] == 0
+    assert policy.timeout_for(URL)[1] < MAX_TIMEOUT
+
+
+def test_old_latency_fades():
+    latency = HostLatency()
+    for _ in range(SKETCH_DECAY_AT - 1):
+        latency.observe(5.0)
+    for _ in range(SKETCH_DECAY_AT):
+        latency.observe(0.1)
+    assert latency.total < SKETCH_DECAY_AT and latency.samples == 2 * SKETCH_DECAY_AT - 1
+    assert latency.percentile(50) < 0.2
+
+
+def test_least_recently_used_hosts_are_forgotten():
+    policy = TimeoutPolicy(max_hosts=2)
+    feed(policy, 0.1, 1, 'https://a.example.com/')
+    feed(policy, 0.1, 1, 'https://b.example.com/')
+    policy.timeout_for('https://a.example.com/')
+    feed(policy, 0.1, 1, 'https://c.example.com/')
+    assert list(policy._hosts) == ['a.example.com', 'c.example.com']
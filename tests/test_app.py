@@ -0,0 +1,261 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from app import create_app
+from metrics import CrawlStats
+
+_clients = itertools.count(1)
+
+
+@pytest.fixture
+def client():
+    return create_app(start_services=False).test_client()
+
+
+def post_crawl(client, payload):
+    # Each request from its own address so the per-IP rate limit stays out of the way
+    return client.post('/crawl', json=payload, environ_base={'REMOTE_ADDR': f'10.0.0.{next(_clients)}'})
+
+
+@pytest.mark.parametrize('previous_sitemap', ['/etc/passwd', 'file:///etc/passwd', 'sitemap.xml', 42])
+def test_previous_sitemap_must_be_an_http_url(client, previous_sitemap):
+    response = post_crawl(client, {'url': 'https://example.com', 'incremental': True,
+                                   'previous_sitemap': previous_sitemap})
+
+    assert response.status_code == 400
+    assert 'previous_sitemap' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('option', [{'dedup': 'bloom'}, {'links': True}])
+def test_options_distributed_mode_cannot_honour_are_rejected(client, option):
+    response = post_crawl(client, {'url': 'https://example.com', 'workers': 2, **option})
+
+    assert response.status_code == 400
+
+
+def test_importing_main_builds_no_app():
+    import os
+    import subprocess
+    import sys
+
+    code = 'import sys, threading, main; print("app" in vars(sys.modules["app"]), threading.active_count())'
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.split()
+    assert output == ['False', '1']
+
+
+class BlockingCrawler:
+    """Stands in for EnhancedCrawler: construction is slow and crawl() waits for release"""
+    release = None
+
+    def __init__(self, url, **kwargs):
+        time.sleep(0.05)
+        self.domain = url
+        self.thread_prefix = 'crawl-test'
+        self.stats = CrawlStats()
+
+    def crawl(self):
+        self.release.wait(5)
+        raise RuntimeError("test crawl ended")
+
+    def close(self):
+        pass
+
+
+def test_identical_concurrent_requests_share_one_session(client, monkeypatch):
+    import enhanced_crawler
+
+    monkeypatch.setattr(BlockingCrawler, 'release', threading.Event())
+    monkeypatch.setattr(enhanced_crawler, 'EnhancedCrawler', BlockingCrawler)
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(post_crawl(client, {'url': 'https://shared.example.com'})))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    BlockingCrawler.release.set()
+
+    assert [response.status_code for response in responses] == [200] * 5
+    assert len({response.get_json()['session_id'] for response in responses}) == 1
+
+
+def test_failed_construction_releases_the_cache_key(client, monkeypatch):
+    import enhanced_crawler
+    from app import RESULT_CACHE
+
+    def broken(*args, **kwargs):
+        raise OSError("no scratch space")
+
+    monkeypatch.setattr(enhanced_crawler, 'EnhancedCrawler', broken)
+    running = RESULT_CACHE.snapshot()['running']
+
+    assert post_crawl(client, {'url': 'https://broken.example.com'}).status_code == 500
+    assert RESULT_CACHE.snapshot()['running'] == running
+
+
+@pytest.fixture
+def idle_session(monkeypatch):
+    """A registered, not yet completed session whose crawler never runs"""
+    from app import crawling_sessions
+    from enhanced_crawler import EnhancedCrawler
+
+    crawler = EnhancedCrawler('https://stats.example.com', record_links=False)
+    monkeypatch.setitem(crawling_sessions, 'idle-session', {
+        'crawler': crawler, 'completed': False, 'error': None, 'start_time': time.time(),
+        'last_access': time.time(), 'url': crawler.start_url, 'profiler': None, 'profile_ready': False,
+        'cache_key': None})
+    yield crawler
+    crawler.close()
+
+
+def metric_value(text, name):
+    return next(float(line.split()[-1]) for line in text.splitlines() if line.split(' ', 1)[0] == name)
+
+
+def test_metrics_endpoint_serves_process_totals_and_gauges(client, idle_session):
+    before = metric_value(client.get('/metrics').get_data(as_text=True), 'sitemap_fetches_total')
+    idle_session.stats.record_fetch(200, 512, 0.2)
+    idle_session.stats.set_queue_depth(4)
+
+    response = client.get('/metrics')
+    text = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain' and 'version=0.0.4' in response.content_type
+    assert metric_value(text, 'sitemap_fetches_total') == before + 1
+    assert metric_value(text, 'sitemap_sessions') >= 1 and metric_value(text, 'sitemap_active_sessions') >= 1
+    assert metric_value(text, 'sitemap_frontier_depth') >= 4
+    assert '# TYPE sitemap_result_cache_entries gauge' in text
+
+
+def test_stats_endpoint_reports_one_session(client, idle_session):
+    idle_session.stats.record_fetch(404, 100, 0.1)
+    idle_session.stats.record_phase('fetch', 0.5)
+
+    data = client.get('/stats/idle-session').get_json()
+
+    assert data['fetches'] == 1 and data['status_counts'] == {'404': 1}
+    assert data['phase_seconds'] == {'fetch': 0.5}
+    assert data['completed'] is False and data['visited_urls'] == 0
+    assert data['budget'] is None and data['link_graph'] is None
+    assert data['host_latency']['samples'] >= 0
+    assert client.get('/stats/missing-session').status_code == 404
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # Crawls write sitemap.xml, exports and snapshots relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def run_crawl(client, payload, timeout=30):
+    """Start a crawl and wait for it; returns its session id"""
+    session_id = post_crawl(client, payload).get_json()['session_id']
+    deadline = time.time() + timeout
+    while not client.get(f'/progress/{session_id}').get_json()['completed']:
+        assert time.time() < deadline, "crawl did not finish"
+        time.sleep(0.1)
+    return session_id
+
+
+def test_results_evicted_from_the_cache_release_their_session(client, local_site, workdir, monkeypatch):
+    import app
+    from result_cache import ResultCache
+
+    monkeypatch.setattr(app, 'RESULT_CACHE', ResultCache(ttl=60, max_bytes=1000))
+    monkeypatch.setattr(app, 'estimate_result_size', lambda crawler, export_bytes=0: 600)
+    url = f"http://{local_site.config.base_domain}"
+
+    first = run_crawl(client, {'url': url, 'time_budget': 1})
+    assert app.RESULT_CACHE.holds(first) and first in app.crawling_sessions
+    second = run_crawl(client, {'url': url, 'time_budget': 2})
+
+    assert app.RESULT_CACHE.holds(second) and not app.RESULT_CACHE.holds(first)
+    assert first not in app.crawling_sessions and second in app.crawling_sessions
+    assert not (workdir / 'exports' / first).exists() and (workdir / 'exports' / second).exists()
+    assert client.get(f'/download-csv/{first}').status_code == 404
+    # The same request starts over instead of joining the released session
+    assert run_crawl(client, {'url': url, 'time_budget': 1}) not in (first, second)
+
+
+def app_sessions():
+    from app import crawling_sessions
+    return crawling_sessions
+
+
+def fill(crawler, pages):
+    for url, (status, title) in pages.items():
+        crawler.visited.add(url)
+        crawler.status[url] = status
+        crawler.url_data[url] = title
+
+
+CSV_PAGES = {
+    'https://stats.example.com/b': (200, 'Başlık, "B"'),
+    'https://stats.example.com/a': (200, 'A'),
+    'https://stats.example.com/a?utm=1': ('duplicate', 'Yinelenen sayfa'),
+    'https://stats.example.com/guess': ('unconfirmed', 'HTTP 404'),
+}
+CSV_BODY = ('URL,Sayfa Başlığı\r\nhttps://stats.example.com/a,A\r\n'
+            'https://stats.example.com/b,"Başlık, ""B"""\r\n').encode('utf-8')
+
+
+def test_download_csv_streams_a_running_crawl(client, idle_session):
+    import gzip
+
+    fill(idle_session, CSV_PAGES)
+
+    response = client.get('/download-csv/idle-session')
+    assert response.status_code == 200 and 'Content-Length' not in response.headers  # Streamed
+    assert response.mimetype == 'text/csv' and response.headers['Vary'] == 'Accept-Encoding'
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data() == CSV_BODY
+
+    # Small exports are compressed only on request, and only for clients that accept gzip
+    assert 'Content-Encoding' not in client.get('/download-csv/idle-session', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in client.get('/download-csv/idle-session?gzip=1').headers
+    response = client.get('/download-csv/idle-session?gzip=1', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == CSV_BODY
+
+    # Still running: nothing is cached, a new page shows up in the next download
+    fill(idle_session, {'https://stats.example.com/c': (200, 'C')})
+    assert b'https://stats.example.com/c,C' in client.get('/download-csv/idle-session').get_data()
+    assert 'csv_export' not in app_sessions()['idle-session']
+
+
+def test_download_csv_caches_a_completed_crawl(client, idle_session):
+    import gzip
+
+    fill(idle_session, CSV_PAGES)
+    app_sessions()['idle-session']['completed'] = True
+
+    response = client.get('/download-csv/idle-session')
+    assert response.headers['Content-Length'] == str(len(CSV_BODY)) and response.get_data() == CSV_BODY
+    cached = app_sessions()['idle-session']['csv_export']
+    fill(idle_session, {'https://stats.example.com/c': (200, 'C')})
+    assert client.get('/download-csv/idle-session').get_data() == CSV_BODY
+    response = client.get('/download-csv/idle-session?gzip=1', headers={'Accept-Encoding': 'gzip'})
+    assert gzip.decompress(response.get_data()) == CSV_BODY
+    assert app_sessions()['idle-session']['csv_export'] is cached and cached.gzip() == response.get_data()
+
+
+def test_download_csv_serves_the_exported_artifact(client, local_site, workdir):
+    session_id = run_crawl(client, {'url': f"http://{local_site.config.base_domain}", 'time_budget': 2})
+    exports = app_sessions()[session_id]['exports']
+
+    response = client.get(f'/download-csv/{session_id}')
+    assert response.status_code == 200
+    assert response.get_data() == (workdir / exports['csv']).read_bytes()
+    rows = response.get_data(as_text=True).splitlines()
+    assert rows[0] == 'URL,Sayfa Başlığı' and len(rows) > 10
+
+
+def test_download_csv_without_results(client, idle_session):
+    assert client.get('/download-csv/missing-session').status_code == 404
+    assert client.get('/download-csv/idle-session').status_code == 404
@@ -0,0 +1,42 @@
+import threading
+import time
+
+from batch import HostLimiter
+
+
+def test_host_limiter_caps_concurrent_requests_per_host():
+    limiter = HostLimiter(per_host=2)
+    in_flight, peak = {}, {}
+    lock = threading.Lock()
+
+    def request(url, host):
+        release = limiter.acquire(url)
+        with lock:
+            in_flight[host] = in_flight.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), in_flight[host])
+        time.sleep(0.02)
+        with lock:
+            in_flight[host] -= 1
+        release()
+
+    threads = [threading.Thread(target=request, args=(f'https://{host}/page-{i}', host))
+               for i in range(8) for host in ('a.example', 'B.example')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == {'a.example': 2, 'B.example': 2}
+    # Hosts are forgotten once idle
+    assert len(limiter) == 0
+
+
+def test_host_limiter_times_out_without_leaking_a_slot():
+    limiter = HostLimiter(per_host=1)
+    release = limiter.acquire('https://example.com/a')
+    assert limiter.acquire('https://EXAMPLE.com/b', timeout=0.05) is None
+    assert len(limiter) == 1
+    release()
+    assert len(limiter) == 0
+    limiter.acquire('https://example.com/c', timeout=0)()
+    assert len(limiter) == 0
@@ -0,0 +1,65 @@
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import cli
+
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+def test_crawl_streams_urls_and_writes_the_sitemap(local_site, tmp_path, capsys):
+    base_url = f"http://{local_site.config.base_domain}"
+    code = cli.main(['crawl', base_url, '--stream', 'jsonl', '--output-dir', str(tmp_path),
+                     '--formats', 'xml,txt', '--time-budget', '5'])
+    out, err = capsys.readouterr()
+
+    assert code == 0
+    lines = [json.loads(line) for line in out.splitlines()]
+    assert lines[0] == {'url': base_url, 'source': 'start', 'depth': 0}
+    assert all(set(line) == {'url', 'source', 'depth'} for line in lines)
+    streamed = {line['url'] for line in lines}
+    assert len(streamed) == len(lines)  # Each URL once, as it is discovered
+
+    listed = {loc.text for loc in ET.parse(tmp_path / 'sitemap.xml').iter(f'{SITEMAP_NS}loc')}
+    assert listed <= streamed
+    assert len(local_site.expected_urls() & {url.rstrip('/') for url in listed}) >= len(local_site.expected_urls()) // 2
+    assert (tmp_path / 'sitemap.txt').read_text(encoding='utf-8').split() == sorted(listed)
+    assert err.splitlines()[-1].startswith(f"{len(listed)} URLs in ")
+
+
+def test_crawl_writes_the_stream_to_a_file(local_site, tmp_path, capsys):
+    stream = tmp_path / 'urls.txt'
+    code = cli.main(['crawl', f"http://{local_site.config.base_domain}", '--output', str(stream),
+                     '--output-dir', str(tmp_path), '--time-budget', '2', '--no-links'])
+
+    assert code == 0
+    assert capsys.readouterr().out == ''
+    urls = stream.read_text(encoding='utf-8').split()
+    assert urls[0] == f"http://{local_site.config.base_domain}" and len(urls) == len(set(urls))
+    assert (tmp_path / 'sitemap.xml').exists()
+
+
+def test_crawl_exits_with_1_when_nothing_is_found(tmp_path, capsys, monkeypatch):
+    import crawler
+
+    # A site that yields no URL at all, without waiting for connection retries
+    monkeypatch.setattr(crawler.Crawler, 'crawl', lambda self: None)
+    code = cli.main(['crawl', 'https://example.com', '--engine', 'simple', '--output-dir', str(tmp_path)])
+
+    assert code == 1
+    out, err = capsys.readouterr()
+    assert out == '' and "Taranacak URL bulunamadı" in err
+    assert not (tmp_path / 'sitemap.xml').exists()
+
+
+@pytest.mark.parametrize('argv', [
+    ['crawl', 'https://example.com', '--engine', 'simple', '--concurrency', '4'],
+    ['crawl', 'https://example.com', '--formats', 'xml,pdf'],
+    ['crawl', 'https://example.com', '--max-urls', '0'],
+])
+def test_invalid_options_exit_with_usage_error(argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(argv)
+    assert exit_info.value.code == 2
+    assert 'usage:' in capsys.readouterr().err
@@ -0,0 +1,132 @@
+import pytest
+
+from distributed import (DistributedCrawl, DistributedWorker, QueueBackend, SQLiteQueueBackend, open_backend,
+                         partition_for)
+from duplicates import pattern_family
+from frontier import PRIORITY_HIGH, PRIORITY_LOW
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteQueueBackend(str(tmp_path / 'queue.sqlite'))
+    backend.reset()
+    yield backend
+    backend.close()
+
+
+def test_queue_backends_must_implement_every_operation(tmp_path):
+    class Partial(QueueBackend):
+        def reset(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_partitions_are_stable_and_host_mode_keeps_hosts_together():
+    urls = [f'https://example.com/page-{i}' for i in range(200)] + [f'https://blog.example.com/{i}' for i in range(50)]
+
+    by_url = [partition_for(url, 4) for url in urls]
+    assert by_url == [partition_for(url, 4) for url in urls]
+    assert set(by_url) == {0, 1, 2, 3}
+    assert len({partition_for(url, 4, 'host') for url in urls[:200]}) == 1
+    assert len({partition_for(url, 4, 'host') for url in urls[200:]}) == 1
+
+
+def test_claim_take_done_and_drained(backend):
+    assert backend.claim('https://example.com/a', max_urls=2)
+    assert not backend.claim('https://example.com/a', max_urls=2)
+    assert backend.claim('https://example.com/b', max_urls=2)
+    assert not backend.claim('https://example.com/c', max_urls=2)  # The job is full
+    assert backend.seen_count() == 2 and backend.has_seen('https://example.com/b')
+    assert not backend.has_seen('https://example.com/c')
+
+    backend.put(1, 'https://example.com/a', PRIORITY_LOW, 'link', 2)
+    backend.put(1, 'https://example.com/b', PRIORITY_HIGH, 'sitemap', None)
+    assert backend.queued() == 2 and backend.queued(0) == 0 and backend.take(0) is None
+
+    assert backend.take(1) == ('https://example.com/b', 'sitemap', None)  # Priority first
+    assert backend.take(1) == ('https://example.com/a', 'link', 2)
+    assert not backend.is_drained()  # Both are in flight
+    backend.done()
+    assert not backend.is_drained()
+    backend.done()
+    assert backend.is_drained()
+
+    backend.set_flag('producers_done', True)
+    assert backend.get_flag('producers_done') and not backend.get_flag('unknown')
+    backend.reset()
+    assert backend.seen_count() == 0 and not backend.get_flag('producers_done')
+
+
+def test_worker_results_are_merged_and_replaced(tmp_path):
+    crawl = DistributedCrawl('https://example.com', workers=2, backend=f"sqlite://{tmp_path / 'queue.sqlite'}")
+    try:
+        crawl.crawl_start = 0
+        crawl.backend.record_result(0, 'https://example.com/', 200, 'Ana sayfa', '2024-01-01', 'start', 0)
+        crawl.backend.record_result(1, 'https://example.com/a', 200, 'A', None, 'link', 1)
+        crawl._merge()
+        # A soft-404 found after the crawl replaces the row recorded when the page was settled
+        crawl.backend.record_result(1, 'https://example.com/a', 'soft404', 'Sayfa bulunamadı', None, 'link', 1)
+        crawl.backend.record_result(1, 'https://example.com/b', None, None, None, 'pattern', None)
+        crawl._merge()
+
+        assert crawl.visited == {'https://example.com/', 'https://example.com/a', 'https://example.com/b'}
+        assert crawl.status == {'https://example.com/': 200, 'https://example.com/a': 'soft404', 'https://example.com/b': None}
+        assert crawl.url_data['https://example.com/a'] == 'Sayfa bulunamadı'
+        assert crawl.lastmod == {'https://example.com/': '2024-01-01'}
+        assert crawl.discovery['https://example.com/b'] == ('pattern', None)
+        assert crawl.crawled_urls == 2
+        assert [(p['processed'], p['fetched']) for p in crawl.worker_progress()] == [(1, 1), (2, 1)]
+    finally:
+        crawl.close()
+
+
+def test_unknown_options_are_rejected():
+    with pytest.raises(ValueError):
+        DistributedCrawl('https://example.com', partition_by='path')
+    with pytest.raises(ValueError):
+        open_backend('redis://localhost:6379/0')
+
+
+def test_workers_skip_dead_pattern_families_and_report_new_urls(backend):
+    worker = DistributedWorker('https://example.com', backend, 0, 2)
+    found = []
+    worker.on_url = lambda url, source, depth: found.append((url, source))
+    worker.crawl_start = 0
+    worker.dead_families.add(pattern_family('https://example.com/tag/python'))
+
+    assert not worker._add_url('https://example.com/tag/python', source='pattern')
+    assert worker._add_url('https://example.com/tag/python', source='link')
+    assert found == [('https://example.com/tag/python', 'link')]
+    worker.close()
+
+
+def test_run_worker_closes_its_spill_stores(tmp_path, monkeypatch):
+    import distributed
+
+    closed = []
+    monkeypatch.setattr(DistributedWorker, 'crawl', lambda self: None)
+    monkeypatch.setattr(DistributedWorker, 'close', lambda self: closed.append(self.spill_threshold))
+    spec = f"sqlite://{tmp_path / 'queue.sqlite'}"
+    distributed.run_worker('https://example.com', spec, 1, 2, 'url', 100, spill_threshold=10)
+
+    assert closed == [10]
+    backend = open_backend(spec)
+    assert backend.get_flag('worker_done:1')
+    backend.close()
+
+
+def test_two_workers_crawl_the_local_site(local_site, tmp_path):
+    crawl = DistributedCrawl(f"http://{local_site.config.base_domain}", workers=2,
+                             backend=f"sqlite://{tmp_path / 'queue.sqlite'}", time_budget=30)
+    try:
+        crawl.crawl()
+        found = set(crawl.visited)
+        progress = crawl.worker_progress()
+    finally:
+        crawl.close()
+
+    expected = local_site.expected_urls()
+    assert len(found & expected) >= len(expected) // 2
+    assert all(worker['processed'] > 0 for worker in progress)
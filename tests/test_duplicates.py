@@ -0,0 +1,123 @@
+import random
+
+from duplicates import (EXCLUDED_STATUSES, MAX_DISTANCE, DuplicateDetector, hamming, page_words, pattern_family,
+                        simhash)
+from enhanced_crawler import FAMILY_MIN_FETCHES, EnhancedCrawler
+
+WORDS = ('crawler sitemap page title link robots host domain feed route script section blog post archive '
+         'index category author search tag news product review guide manual').split()
+
+
+def article(seed, words=200):
+    rng = random.Random(seed)
+    return '<html><body><p>' + ' '.join(rng.choices(WORDS, k=words)) + '</p></body></html>'
+
+
+def near_copy(html):
+    # Same article with a changed counter and timestamp, other markup and a script: the same words
+    return html.replace('<p>', '<div class="meta">2024-12-31, 9876</div><script>track("views")</script><p>', 1)
+
+
+def edited_copy(html):
+    """A copy with one word added (a different text hash) whose simhash is within MAX_DISTANCE bits"""
+    value = simhash(page_words(html))
+    for word in WORDS:
+        for copy in (html.replace('<p>', f'<p>{word} ', 1), html.replace('</p>', f' {word}</p>', 1)):
+            if hamming(value, simhash(page_words(copy))) <= MAX_DISTANCE:
+                return copy
+    raise AssertionError("no edit within MAX_DISTANCE")
+
+
+class FakeResponse:
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+
+
+def test_near_duplicates_collapse_to_the_cleanest_url():
+    detector = DuplicateDetector()
+    page = article(1, words=600)
+
+    assert detector.check('https://example.com/post?utm_source=feed', page) == (None, None)
+    assert detector.check('https://example.com/other', article(2, words=600)) == (None, None)
+    # The cleaner URL takes over the listing and the first copy is reported as replaced
+    assert detector.check('https://example.com/post', near_copy(page)) == (None, 'https://example.com/post?utm_source=feed')
+    assert detector.check('https://example.com/post/amp', edited_copy(page)) == ('duplicate', 'https://example.com/post')
+    assert detector.check('https://example.com/post/print', page) == ('duplicate', 'https://example.com/post')
+
+
+def test_short_pages_are_never_collapsed():
+    detector = DuplicateDetector()
+    stub = '<html><body><div id="app"></div><script>boot()</script></body></html>'
+
+    assert detector.check('https://example.com/a', stub) == (None, None)
+    assert detector.check('https://example.com/b', stub) == (None, None)
+
+
+def test_soft_404_page_is_learned_and_marked(monkeypatch):
+    crawler = EnhancedCrawler('https://example.com', record_links=False)
+    not_found = article(3)
+    monkeypatch.setattr(crawler, '_get', lambda url, **kwargs: FakeResponse(200, not_found))
+
+    # A page kept before the probe is marked once the soft-404 page is known
+    crawler.status['https://example.com/early'] = 200
+    assert not crawler._check_duplicate('https://example.com/early', near_copy(not_found))
+    crawler._learn_soft_404('https://example.com')
+
+    assert crawler._check_duplicate('https://example.com/missing', not_found)
+    assert crawler.status['https://example.com/missing'] == 'soft404'
+    assert crawler._mark_soft_404s() == ['https://example.com/early']
+    assert crawler.status['https://example.com/early'] in EXCLUDED_STATUSES
+
+
+def test_pattern_families():
+    assert pattern_family('https://example.com/blog/page/7/') == pattern_family('https://example.com/blog/page/8')
+    assert pattern_family('https://example.com/blog?page=2&sort=new') == pattern_family('https://example.com/blog?sort=old&page=3')
+    assert pattern_family('https://example.com/blog/page/7') != pattern_family('https://example.com/news/page/7')
+
+
+def test_dead_family_stops_guessed_urls():
+    crawler = EnhancedCrawler('https://example.com', record_links=False)
+    crawler.crawl_start = 0
+    queued = [f'https://example.com/tag/{i}' for i in range(FAMILY_MIN_FETCHES + 1)]
+    for url in queued:
+        assert crawler._add_url(url, source='pattern')
+    for url in queued[:FAMILY_MIN_FETCHES]:
+        crawler.status[url] = 404
+        crawler._record_pattern_result(url)
+
+    assert pattern_family(queued[0]) in crawler.dead_families
+    assert not crawler._add_url('https://example.com/tag/new', source='pattern')
+    # Links are real evidence and still count, as do other families
+    assert crawler._add_url('https://example.com/tag/linked', source='link')
+    assert crawler._add_url('https://example.com/category/1', source='pattern')
+    # Guesses queued before the verdict are dropped when dequeued
+    assert crawler._pruned(queued[-1]) and crawler.status[queued[-1]] == 'pruned'
+    assert not crawler._pruned('https://example.com/tag/linked')
+
+
+def test_unconfirmed_guesses_are_left_out():
+    crawler = EnhancedCrawler('https://example.com', record_links=False)
+    crawler.crawl_start = 0
+    for path, source, status in [('/a', 'pattern', 404), ('/b', 'pattern', None), ('/c', 'pattern', 200),
+                                 ('/d', 'link', 404), ('/e', 'pattern', 'duplicate')]:
+        crawler._add_url('https://example.com' + path, source=source)
+        if status is not None:
+            crawler.status['https://example.com' + path] = status
+        crawler._drop_unconfirmed('https://example.com' + path)
+
+    assert crawler.status == {'https://example.com/a': 'unconfirmed', 'https://example.com/b': 'unconfirmed',
+                              'https://example.com/c': 200, 'https://example.com/d': 404,
+                              'https://example.com/e': 'duplicate'}
+
+
+def test_crawl_lists_each_real_page_once_and_no_failed_guesses(local_site):
+    crawler = EnhancedCrawler(f"http://{local_site.config.base_domain}", record_links=False)
+    crawler.crawl()
+
+    listed = {url for url in crawler.visited if crawler.status.get(url) not in EXCLUDED_STATUSES}
+    assert all(crawler.status.get(url) in (200, 304) for url in listed
+               if crawler.discovery.get(url, (None, None))[0] == 'pattern')
+    # Distinct pages are not collapsed into each other
+    expected = local_site.expected_urls()
+    assert {url.rstrip('/') for url in listed} >= expected
@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+
+from enhanced_crawler import EnhancedCrawler
+
+
+class FakeResponse:
+    status_code = 200
+    text = '<html><title>Ana sayfa</title></html>'
+
+
+def test_get_cached_fetches_each_url_once_under_concurrency(monkeypatch):
+    crawler = EnhancedCrawler('https://example.com', record_links=False)
+    calls = []
+
+    def slow_get(url, **kwargs):
+        calls.append(url)
+        time.sleep(0.05)
+        return FakeResponse()
+
+    monkeypatch.setattr(crawler, '_get', slow_get)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(crawler._get_cached('https://example.com/')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ['https://example.com/']
+    assert len(results) == 8 and all(result is results[0] for result in results)
+
+
+def test_get_cached_does_not_cache_failures(monkeypatch):
+    crawler = EnhancedCrawler('https://example.com', record_links=False)
+    attempts = []
+
+    def flaky_get(url, **kwargs):
+        attempts.append(url)
+        if len(attempts) == 1:
+            raise ConnectionError('reset')
+        return FakeResponse()
+
+    monkeypatch.setattr(crawler, '_get', flaky_get)
+    with pytest.raises(ConnectionError):
+        crawler._get_cached('https://example.com/')
+    assert crawler._get_cached('https://example.com/').status_code == 200
+    assert len(attempts) == 2
+
+
+class SitemapResponse:
+    def __init__(self, status_code, content=b''):
+        self.status_code = status_code
+        self.content = content
+        self.text = content.decode()
+
+
+def test_previous_pages_wait_for_their_hosts_sitemap(monkeypatch):
+    previous = {'https://example.com/kept': {'title': 'Kept', 'lastmod': '2024-01-01'},
+                'https://example.com/gone': {'title': 'Gone', 'lastmod': '2024-01-01'}}
+    crawler = EnhancedCrawler('https://example.com', previous_pages=previous, record_links=False)
+    crawler.crawl_start = time.time()
+    sitemap = (b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+               b'<url><loc>https://example.com/kept</loc><lastmod>2024-01-01</lastmod></url></urlset>')
+    monkeypatch.setattr(crawler, '_get', lambda url, **kwargs: SitemapResponse(200, sitemap) if url.endswith('/sitemap.xml')
+                        else SitemapResponse(404))
+
+    crawler._seed_previous_pages()
+    assert 'https://example.com/gone' not in crawler.seen
+
+    crawler._sitemap_discovery_for('https://example.com')
+    assert crawler.discovery['https://example.com/gone'] == ('previous', None)
+    # The upstream lastmod is known before the page is fetched, so it is not downloaded again
+    assert crawler._reuse_previous('https://example.com/kept')
+
+
+def test_bloom_dedup_keeps_no_exact_state_for_failed_pages():
+    from seen_set import make_seen_set
+
+    crawler = EnhancedCrawler('https://example.com', seen_set=make_seen_set('bloom', 0.001))
+    crawler.crawl_start = time.time()
+    for url in ('https://example.com/', 'https://example.com/ok', 'https://example.com/missing'):
+        crawler._add_url(url, source='link', depth=1)
+    crawler.status.update({'https://example.com/': 200, 'https://example.com/ok': 200, 'https://example.com/missing': 404})
+    crawler.url_data['https://example.com/missing'] = 'HTTP 404'
+    crawler._record_links('https://example.com/', ['https://example.com/ok', 'https://example.com/missing',
+                                                   'https://example.com/not-queued'])
+    for url in ('https://example.com/', 'https://example.com/ok', 'https://example.com/missing'):
+        crawler._settle(url)
+
+    assert 'https://example.com/missing' in crawler.seen
+    assert 'https://example.com/missing' not in crawler.visited
+    assert all('https://example.com/missing' not in per_url
+               for per_url in (crawler.discovery, crawler.status, crawler.url_data))
+    assert crawler.link_graph.freeze().urls == ['https://example.com/', 'https://example.com/ok']
+
+
+def test_spill_threshold_covers_exact_dedup_and_per_url_metadata():
+    from seen_set import make_seen_set
+    from spill_store import SpillingDict, SpillingSeenSet
+
+    crawler = EnhancedCrawler('https://example.com', seen_set=make_seen_set('exact'), spill_threshold=5)
+    crawler.crawl_start = time.time()
+    for i in range(20):
+        crawler._add_url(f'https://example.com/{i}', source='link', depth=1)
+        crawler.visited.add(f'https://example.com/{i}')
+
+    assert isinstance(crawler.visited, SpillingSeenSet) and crawler.seen is crawler.visited
+    assert isinstance(crawler.discovery, SpillingDict) and len(crawler.discovery._memory) == 5
+    assert crawler.discovery['https://example.com/19'] == ('link', 1)
+    crawler.close()
+
+
+def test_page_cache_keeps_only_recent_responses(monkeypatch):
+    import enhanced_crawler
+
+    monkeypatch.setattr(enhanced_crawler, 'PAGE_CACHE_SIZE', 3)
+    crawler = EnhancedCrawler('https://example.com', record_links=False)
+    monkeypatch.setattr(crawler, '_get', lambda url, **kwargs: FakeResponse())
+    for i in range(10):
+        crawler._get_cached(f'https://example.com/{i}')
+
+    assert list(crawler._page_cache) == ['https://example.com/7', 'https://example.com/8', 'https://example.com/9']
+
+
+def test_tiny_time_budget_stops_the_crawl_and_reports_it(local_site):
+    budget = 0.3
+    crawler = EnhancedCrawler(f"http://{local_site.config.base_domain}", time_budget=budget, record_links=False)
+    start = time.time()
+    crawler.crawl()
+    elapsed = time.time() - start
+    report = crawler.budget_report()
+
+    # An unbudgeted crawl of the site takes several seconds
+    assert elapsed < budget + 2
+    assert report['deadline_hit'] and report['time_budget'] == budget
+    assert report['elapsed'] >= budget
+    assert report['skipped_urls'] == sum(report['skipped_by_source'].values()) > 0
+    assert report['cut_short'] and set(report['cut_short']) <= {'sitemaps', 'feeds', 'blog', 'subdomains', 'patterns'}
+    # Guesses the deadline left unfetched are not listed
+    assert all(crawler.status.get(url) in (200, 'unconfirmed') for url in crawler.visited
+               if crawler.discovery[url][0] == 'pattern')
@@ -0,0 +1,73 @@
+import os
+import threading
+
+import pytest
+
+import exports
+from exports import ColumnarWriter, CrawlRecord, export_crawl, read_columnar
+
+
+class FinishedCrawl:
+    """The crawler attributes export_crawl reads"""
+
+    def __init__(self, count):
+        self.start_url = 'https://example.com'
+        self.visited = {f'https://example.com/page-{i:05d}' for i in range(count)}
+        self.lock = threading.Lock()
+        self.url_data = {url: f'Sayfa {url[-5:]}' for url in self.visited}
+        self.discovery = {url: ('link', int(url[-1])) for url in self.visited}
+        self.status = {url: 200 for url in self.visited}
+        self.lastmod = {}
+        self.link_graph = None
+
+
+def test_columnar_row_groups_round_trip(tmp_path):
+    path = tmp_path / 'crawl.smcol'
+    records = [CrawlRecord(f'https://example.com/{i}', 200 if i % 3 else None, f'Başlık {i}' if i % 2 else None,
+                           i % 4 or None, 'sitemap' if i % 5 else 'link', '2024-01-01' if i % 7 else None)
+               for i in range(25)]
+    with open(path, 'wb') as f:
+        writer = ColumnarWriter(f, rows_per_group=10)
+        for record in records:
+            writer.write(record)
+        # Full groups are written as they fill up
+        assert writer._group_rows == 5
+        writer.close()
+
+    columns = read_columnar(path)
+    assert columns['url'] == [record.url for record in records]
+    assert columns['title'] == [record.title or '' for record in records]
+    assert columns['status'] == [None if record.status is None else str(record.status) for record in records]
+    assert columns['depth'] == [record.depth for record in records]
+    assert columns['lastmod'] == [record.lastmod for record in records]
+    assert columns['priority'] == [None] * 25
+
+
+def test_columnar_empty_export(tmp_path):
+    path = tmp_path / 'crawl.smcol'
+    with open(path, 'wb') as f:
+        ColumnarWriter(f).close()
+    assert read_columnar(path)['url'] == []
+
+
+def test_export_crawl_writes_every_format(tmp_path):
+    paths = export_crawl(FinishedCrawl(30), str(tmp_path))
+
+    assert set(paths) == set(exports.EXPORT_FORMATS)
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in paths.values())
+    assert len(read_columnar(paths['columnar'])['url']) == 30
+
+
+def test_failed_export_leaves_no_temporary_files(tmp_path, monkeypatch):
+    class BrokenWriter:
+        def __init__(self, fileobj):
+            pass
+
+        def write(self, record):
+            raise OSError('disk full')
+
+    monkeypatch.setitem(exports.EXPORT_FORMATS, 'txt', ('sitemap.txt', 'text/plain', BrokenWriter))
+    with pytest.raises(OSError):
+        export_crawl(FinishedCrawl(3), str(tmp_path), formats=['xml', 'txt', 'csv'])
+
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,79 @@
+import json
+
+from feeds import json_feed_entries, page_feeds_and_json_ld, wordpress_page, xml_feed_entries
+
+RSS = b'''<?xml version="1.0"?>
+<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"><channel>
+<generator>https://wordpress.org/?v=6.4</generator>
+<atom:link rel="next" href="https://example.com/feed/?paged=2"/>
+<item><link>https://example.com/post-1/</link><pubDate>Mon, 01 Jan 2024 10:00:00 +0000</pubDate></item>
+<item><guid isPermaLink="true">https://example.com/post-2/</guid></item>
+<item><guid isPermaLink="false">tag:example.com,2024:3</guid></item>
+</channel></rss>'''
+
+ATOM = b'''<feed xmlns="http://www.w3.org/2005/Atom">
+<entry><link rel="alternate" type="text/html" href="https://example.com/a"/><updated>2024-02-01T00:00:00Z</updated></entry>
+<entry><link rel="enclosure" href="https://example.com/a.mp3"/><link rel="alternate" type="application/pdf" href="https://example.com/b.pdf"/></entry>
+</feed>'''
+
+
+def chunked(data, size=7):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_rss_entries_stream_across_chunks():
+    assert list(xml_feed_entries(chunked(RSS))) == [
+        ('wordpress', None, None),
+        ('next', 'https://example.com/feed/?paged=2', None),
+        ('entry', 'https://example.com/post-1/', '2024-01-01'),
+        ('entry', 'https://example.com/post-2/', None),
+    ]
+
+
+def test_atom_prefers_html_alternate_links():
+    assert list(xml_feed_entries([ATOM])) == [
+        ('entry', 'https://example.com/a', '2024-02-01T00:00:00Z'),
+        ('entry', 'https://example.com/b.pdf', None),
+    ]
+
+
+def test_json_feed_entries():
+    feed = {'version': 'https://jsonfeed.org/version/1.1', 'next_url': 'https://example.com/feed.json?page=2',
+            'items': [{'url': 'https://example.com/x', 'date_modified': '2024-03-01'},
+                      {'external_url': 'https://other.example/y'}, {'id': '3'}, 'junk']}
+    assert list(json_feed_entries(json.dumps(feed))) == [
+        ('entry', 'https://example.com/x', '2024-03-01'),
+        ('entry', 'https://other.example/y', None),
+        ('next', 'https://example.com/feed.json?page=2', None),
+    ]
+    assert list(json_feed_entries('[1, 2]')) == []
+    assert list(json_feed_entries(json.dumps({'items': feed['items']}))) == []
+
+
+def test_page_feeds_and_json_ld():
+    html = '''<html><head>
+    <link rel="alternate" type="application/rss+xml" href="/feed/">
+    <link rel="alternate" type="application/atom+xml; charset=utf-8" href="https://example.com/atom.xml">
+    <link rel="alternate" hreflang="de" href="/de/">
+    <link rel="stylesheet" type="text/css" href="/s.css">
+    <script type="application/ld+json">{"@type": "ItemList", "itemListElement": [{"url": "/posts/1"}]}</script>
+    </head></html>'''
+    feeds, structured = page_feeds_and_json_ld(html, 'https://example.com/blog/')
+    assert feeds == ['https://example.com/feed/', 'https://example.com/atom.xml']
+    assert structured == ['https://example.com/posts/1']
+
+
+def test_wordpress_api_links_are_not_feeds():
+    html = '''<html><head>
+    <link rel="alternate" type="application/json" href="https://example.com/wp-json/wp/v2/pages/2">
+    <link rel="alternate" type="application/feed+json" href="/feed.json">
+    </head></html>'''
+    feeds, _ = page_feeds_and_json_ld(html, 'https://example.com/')
+    assert feeds == ['https://example.com/feed.json']
+    feeds, _ = page_feeds_and_json_ld(html.splitlines()[1], 'https://example.com/')
+    assert feeds == []
+
+
+def test_wordpress_page_replaces_the_paged_parameter():
+    assert wordpress_page('https://example.com/feed/', 2) == 'https://example.com/feed/?paged=2'
+    assert wordpress_page('https://example.com/?feed=rss2&paged=2', 3) == 'https://example.com/?feed=rss2&paged=3'
@@ -0,0 +1,109 @@
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from http_pool import SharedConnectionPool, SharedPoolAdapter
+from metrics import CrawlStats
+
+BODY = b'<html><head><title>Pool</title></head></html>'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class TLSServer(ThreadingHTTPServer):
+    """Local HTTPS server counting accepted, i.e. newly handshaken, connections"""
+
+    daemon_threads = True
+
+    def __init__(self, certfile, keyfile):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        self.socket = context.wrap_socket(self.socket, server_side=True)
+        self.accepted = 0
+
+    def get_request(self):
+        request = super().get_request()
+        request[0].setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.accepted += 1
+        return request
+
+
+@pytest.fixture(scope='module')
+def certificate(tmp_path_factory):
+    if shutil.which('openssl') is None:
+        pytest.skip('openssl CLI not available')
+    directory = tmp_path_factory.mktemp('tls')
+    certfile, keyfile = str(directory / 'cert.pem'), str(directory / 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                    '-keyout', keyfile, '-out', certfile, '-subj', '/CN=127.0.0.1',
+                    '-addext', 'subjectAltName=IP:127.0.0.1'], check=True, capture_output=True)
+    return certfile, keyfile
+
+
+@pytest.fixture
+def server(certificate):
+    server = TLSServer(*certificate)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def run_job(pool, stats, url, certfile, count):
+    """One crawl job: a fresh session on the shared pool, closed at the end"""
+    session = requests.Session()
+    session.mount('https://', SharedPoolAdapter(stats=stats, pool=pool))
+    try:
+        for _ in range(count):
+            assert session.get(url, verify=certfile, timeout=5).content == BODY
+    finally:
+        session.close()
+
+
+def test_sessions_on_the_shared_pool_reuse_one_connection(server, certificate):
+    pool = SharedConnectionPool(pool_connections=4, pool_maxsize=2)
+    url = f'https://127.0.0.1:{server.server_address[1]}/'
+    first, second = CrawlStats(), CrawlStats()
+
+    run_job(pool, first, url, certificate[0], 3)
+    run_job(pool, second, url, certificate[0], 3)
+
+    assert server.accepted == 1
+    assert (first.cache_misses['connection'], first.cache_hits['connection']) == (1, 2)
+    assert (second.cache_misses['connection'], second.cache_hits['connection']) == (0, 3)
+    assert pool.snapshot()['idle_connections'] == 1
+    pool.clear()
+
+
+def test_separate_pools_connect_again(server, certificate):
+    url = f'https://127.0.0.1:{server.server_address[1]}/'
+    pools = [SharedConnectionPool(), SharedConnectionPool()]
+    first, second = CrawlStats(), CrawlStats()
+
+    run_job(pools[0], first, url, certificate[0], 2)
+    run_job(pools[1], second, url, certificate[0], 2)
+
+    assert server.accepted == 2
+    assert second.cache_misses['connection'] == 1
+    for pool in pools:
+        pool.clear()
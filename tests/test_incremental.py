@@ -0,0 +1,65 @@
+from incremental import MAX_INDEX_DEPTH, load_previous_sitemap
+
+URLSET = ('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+          '<url><loc>{}</loc><lastmod>2024-01-01</lastmod></url></urlset>')
+INDEX = '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{}</sitemapindex>'
+
+
+def index_of(*urls):
+    return INDEX.format(''.join(f'<sitemap><loc>{url}</loc></sitemap>' for url in urls))
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.content = body.encode()
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, documents):
+        self.documents = documents
+        self.requested = []
+
+    def get(self, url, timeout=None):
+        self.requested.append(url)
+        return FakeResponse(self.documents[url])
+
+
+def test_local_paths_are_not_read(tmp_path):
+    sitemap = tmp_path / 'sitemap.xml'
+    sitemap.write_text(URLSET.format('https://example.com/secret'))
+    session = FakeSession({})
+
+    assert load_previous_sitemap(str(sitemap), session) == {}
+    assert load_previous_sitemap(f'file://{sitemap}', session) == {}
+    assert session.requested == []
+
+
+def test_index_entries_pointing_to_files_are_skipped():
+    session = FakeSession({'https://example.com/index.xml': index_of('/etc/passwd', 'https://example.com/a.xml'),
+                           'https://example.com/a.xml': URLSET.format('https://example.com/a')})
+
+    pages = load_previous_sitemap('https://example.com/index.xml', session)
+
+    assert pages == {'https://example.com/a': {'lastmod': '2024-01-01'}}
+    assert session.requested == ['https://example.com/index.xml', 'https://example.com/a.xml']
+
+
+def test_self_referencing_indexes_are_read_once():
+    session = FakeSession({'https://example.com/a.xml': index_of('https://example.com/a.xml', 'https://example.com/b.xml'),
+                           'https://example.com/b.xml': index_of('https://example.com/a.xml')})
+
+    assert load_previous_sitemap('https://example.com/a.xml', session) == {}
+    assert session.requested == ['https://example.com/a.xml', 'https://example.com/b.xml']
+
+
+def test_index_depth_is_capped():
+    chain = [f'https://example.com/level-{i}.xml' for i in range(MAX_INDEX_DEPTH + 3)]
+    documents = {url: index_of(child) for url, child in zip(chain, chain[1:])}
+    documents[chain[-1]] = URLSET.format('https://example.com/deep')
+    session = FakeSession(documents)
+
+    assert load_previous_sitemap(chain[0], session) == {}
+    assert session.requested == chain[:MAX_INDEX_DEPTH + 1]
@@ -0,0 +1,64 @@
+from bs4 import BeautifulSoup
+
+from js_routes import extract_json_routes, extract_routes, route_like, script_routes, string_literals
+
+
+def test_regex_literals_are_not_strings_but_division_is_division():
+    source = 'a=/"(\\/x)"/g;b=c/2/d;e="/real";f=x.replace(/\'/g,"");g=(h)/"/after-division"'
+    assert list(string_literals(source)) == ['/real', '', '/after-division']
+    assert extract_routes(source) == ['/real', '/after-division']
+
+
+def test_quotes_inside_comments_do_not_open_strings():
+    source = ('// don\'t follow "/commented"\n'
+              'var a="/kept"; /* it\'s "/also-commented" */ b=\'/kept-too\';\n'
+              '/*! unterminated "/tail')
+    assert list(string_literals(source)) == ['/kept', '/kept-too']
+
+
+def test_escaped_quotes_and_escape_sequences():
+    source = r'''a="/say \"hi\"";b='/it\'s';c="\/escaped\/slash";d="/café";e='/x\x41';'''
+    assert list(string_literals(source)) == ['/say "hi"', "/it's", '/escaped/slash', '/café', '/xA']
+    assert extract_routes(source) == ["/it's", '/escaped/slash', '/café', '/xA']
+
+
+def test_template_literals():
+    source = 'a=`/plain/page`;b=`/blog/${slug}`;c=`line\none`'
+    assert list(string_literals(source)) == ['/plain/page', 'line\none']
+    assert extract_routes(source) == ['/plain/page']
+
+
+def test_unclosed_quote_is_passed_over():
+    assert list(string_literals('a="/broken\nb="/fine"')) == ['/fine']
+
+
+def test_keyed_values_accept_relative_links():
+    source = 'x={href:"about",url:"blog/post-1",title:"hello world",myurl:"nope"};a.location = "contact";b.link=="cmp"'
+    assert extract_routes(source) == ['about', 'blog/post-1', 'contact']
+
+
+def test_keyed_json_values():
+    text = ('{"props":{"canonicalUrl":"https://example.com/a","itemLink":"b/c","@id":"/d",'
+            '"title":"e/f","image":"/img/1.jpg","list":[{"href":"/g"}]}}')
+    assert extract_json_routes(text) == ['https://example.com/a', 'b/c', '/d', '/g']
+    assert extract_json_routes('{"broken": ') is None
+
+
+def test_route_like_rejections():
+    rejected = ['', '/', '//', '/-', '/static/app.js', '/img/logo.SVG?v=2', 'text/html', '/blog/[slug]',
+                '/a b', '^\\/(?:blog)\\/$', 'about', '#top', 'mailto:a@b.c', 'http://', 'https://exa mple.com',
+                '/' + 'a' * 600]
+    assert [value for value in rejected if route_like(value)] == []
+    assert [value for value in ('#top', './x', '?q=1', 'javascript:void(0)') if route_like(value, keyed=True)] == []
+    accepted = ['/blog', '/blog/post?page=2#c', '/page.html', '//cdn.example.com/x', 'https://example.com/a.json?x']
+    assert [value for value in accepted if not route_like(value)] == ['https://example.com/a.json?x']
+    assert route_like('https://example.com/download?file=a.js')
+
+
+def test_script_routes_reads_json_blocks_as_json():
+    html = ('<script id="__NEXT_DATA__" type="application/json">{"page":"/blog/[slug]","href":"post-1"}</script>'
+            '<script type="application/ld+json">{"url": "https://example.com/"}</script>'
+            '<script type="application/json">{not json "/fallback"}</script>'
+            '<script>router.push("/js-route")</script>')
+    soup = BeautifulSoup(html, 'html.parser')
+    assert script_routes(soup) == ['post-1', 'https://example.com/', '/fallback', '/js-route']
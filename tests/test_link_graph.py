@@ -0,0 +1,30 @@
+from link_graph import LinkGraph
+
+
+def test_discarded_pages_and_their_links_are_left_out_of_the_frozen_graph():
+    graph = LinkGraph()
+    graph.add_links('https://example.com/', ['https://example.com/a', 'https://example.com/gone'])
+    graph.add_links('https://example.com/a', ['https://example.com/', 'https://example.com/gone'])
+    graph.add_links('https://example.com/gone', ['https://example.com/a'])
+
+    graph.discard('https://example.com/gone')
+    graph.discard('https://example.com/never-seen')
+    frozen = graph.freeze()
+
+    assert len(graph) == 2 and graph.snapshot()['discarded'] == 1
+    assert frozen.urls == ['https://example.com/', 'https://example.com/a']
+    assert [list(frozen.targets[frozen.offsets[i]:frozen.offsets[i + 1]]) for i in range(2)] == [[1], [0]]
+
+
+def test_importing_the_app_and_cli_does_not_load_numpy(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    # A stand-in numpy on the path shows whether anything imports it
+    (tmp_path / 'numpy.py').write_text('')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = 'import sys, app, cli, link_graph; print("numpy" in sys.modules)'
+    env = dict(os.environ, PYTHONPATH=str(tmp_path))
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=root, env=env)
+    assert output.stdout.split() == ['False']
@@ -0,0 +1,90 @@
+from metrics import LATENCY_BUCKETS, CrawlStats, render_prometheus
+
+
+def test_prometheus_exposition_format():
+    stats = CrawlStats()
+    for status, seconds in [(200, 0.01), (200, 0.3), (404, 0.3), ('timeout', 9.0)]:
+        stats.record_fetch(status, 1000, seconds)
+    stats.record_retry()
+    stats.record_phase('fetch', 1.5)
+    stats.record_parse('title', 0.25)
+    stats.record_cache('content', True)
+    stats.record_cache('content', False)
+    stats.record_cache('content', False)
+
+    text = render_prometheus(stats, {'sitemap_sessions': ('Crawl sessions held in memory', 3)})
+    lines = text.splitlines()
+
+    assert text.endswith('\n')
+    assert lines[:3] == ['# HELP sitemap_fetches_total HTTP requests issued by crawlers',
+                         '# TYPE sitemap_fetches_total counter', 'sitemap_fetches_total 4']
+    for expected in ['sitemap_fetch_retries_total 1', 'sitemap_bytes_downloaded_total 4000',
+                     'sitemap_http_responses_total{status="200"} 2', 'sitemap_http_responses_total{status="404"} 1',
+                     'sitemap_http_responses_total{status="timeout"} 1',
+                     'sitemap_phase_seconds_total{phase="fetch"} 1.500000',
+                     'sitemap_parse_seconds_total{kind="title"} 0.250000', 'sitemap_parse_total{kind="title"} 1',
+                     'sitemap_cache_requests_total{cache="content",result="hit"} 1',
+                     'sitemap_cache_requests_total{cache="content",result="miss"} 2',
+                     '# TYPE sitemap_sessions gauge', 'sitemap_sessions 3']:
+        assert expected in lines
+
+    # Histogram buckets are cumulative and end with +Inf == _count
+    assert '# TYPE sitemap_fetch_duration_seconds histogram' in lines
+    buckets = [line for line in lines if line.startswith('sitemap_fetch_duration_seconds_bucket')]
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    counts = [int(line.rsplit(' ', 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    assert buckets[0] == 'sitemap_fetch_duration_seconds_bucket{le="0.05"} 1'
+    assert 'sitemap_fetch_duration_seconds_bucket{le="0.5"} 3' in buckets
+    assert buckets[-1] == 'sitemap_fetch_duration_seconds_bucket{le="+Inf"} 4'
+    assert 'sitemap_fetch_duration_seconds_count 4' in lines
+    assert 'sitemap_fetch_duration_seconds_sum 9.610000' in lines
+
+    # Every sample line belongs to a metric declared by a TYPE line before it
+    declared = set()
+    for line in lines:
+        if line.startswith('# TYPE '):
+            declared.add(line.split()[2])
+        elif not line.startswith('#'):
+            name = line.split('{', 1)[0].split(' ', 1)[0]
+            assert name in declared or name.rsplit('_', 1)[0] in declared
+
+
+def test_label_values_are_escaped():
+    stats = CrawlStats()
+    stats.record_parse('say "hi"\\\n', 1.0)
+    assert 'sitemap_parse_total{kind="say \\"hi\\"\\\\\\n"} 1' in render_prometheus(stats).splitlines()
+
+
+def test_session_stats_roll_up_into_their_parent():
+    parent = CrawlStats()
+    first, second = CrawlStats(parent=parent), CrawlStats(parent=parent)
+    first.record_fetch(200, 100, 0.1)
+    second.record_fetch(500, 50, 2.0)
+    second.record_retry()
+    first.record_phase('fetch', 1.0)
+    second.record_phase('fetch', 2.0)
+    first.record_cache('result', True)
+    with second.timer('title'):
+        pass
+    first.set_queue_depth(7)
+
+    assert (parent.fetches, parent.bytes_downloaded, parent.retries) == (2, 150, 1)
+    assert parent.status_counts == {'200': 1, '500': 1}
+    assert parent.phase_seconds == {'fetch': 3.0}
+    assert parent.cache_hits == {'result': 1} and parent.parse_counts == {'title': 1}
+    assert sum(parent.latency_buckets) == 2
+    # Sessions keep their own numbers, and queue depth is a per-session gauge
+    assert (first.fetches, second.fetches) == (1, 1)
+    assert parent.queue_depth == 0 and first.snapshot()['max_queue_depth'] == 7
+
+
+def test_percentiles_and_snapshot():
+    stats = CrawlStats()
+    assert stats.percentile(50) == 0.0
+    for i in range(1, 101):
+        stats.record_fetch(200, 0, i / 100)
+    snapshot = stats.snapshot()
+    assert snapshot['latency_p50'] == 0.51
+    assert snapshot['latency_p99'] == 0.99
+    assert snapshot['fetches'] == 100 and snapshot['status_counts'] == {'200': 100}
@@ -0,0 +1,58 @@
+import tracemalloc
+
+import pytest
+
+from profiling import JobProfiler
+
+
+def work():
+    return [str(i) for i in range(1000)]
+
+
+def test_profiler_leaves_an_existing_trace_running():
+    tracemalloc.start()
+    try:
+        profiler = JobProfiler('outer-trace')
+        with profiler.block('crawl'):
+            work()
+        assert tracemalloc.is_tracing()
+        assert 'crawl' in profiler.allocations
+    finally:
+        tracemalloc.stop()
+
+
+def test_profiler_stops_the_trace_it_started():
+    assert not tracemalloc.is_tracing()
+    profiler = JobProfiler('own-trace')
+    with profiler.block('crawl'):
+        assert tracemalloc.is_tracing()
+        work()
+    assert not tracemalloc.is_tracing()
+
+
+def test_overlapping_profilers_share_one_trace():
+    first, second = JobProfiler('first'), JobProfiler('second')
+    with first.block('crawl'):
+        with second.block('crawl'):
+            work()
+        assert tracemalloc.is_tracing()
+    assert not tracemalloc.is_tracing()
+
+
+def test_failed_enable_releases_the_trace(monkeypatch):
+    profiler = JobProfiler('busy')
+
+    def busy():
+        raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(profiler.profile, 'enable', busy)
+    with pytest.raises(ValueError):
+        with profiler.block('crawl'):
+            pass
+    profiler.sampler.stop()
+    assert not tracemalloc.is_tracing()
+    assert profiler._snapshots == {}
+
+    with JobProfiler('after').block('crawl'):
+        work()
+    assert not tracemalloc.is_tracing()
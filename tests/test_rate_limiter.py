@@ -0,0 +1,74 @@
+import pytest
+
+from rate_limiter import LocalBackend, RateLimiter, SQLiteBackend, decide, open_backend, slide
+
+WINDOW = 30.0
+LIMIT = 3
+
+
+def test_slide_moves_counts_between_windows():
+    assert slide(None, 5) == (0, 0)
+    assert slide((5, 2, 1), 5) == (2, 1)
+    assert slide((5, 2, 1), 6) == (0, 2)
+    assert slide((5, 2, 1), 8) == (0, 0)
+
+
+def test_decide_weights_the_previous_window_by_its_overlap():
+    # Start of a window: the previous window still counts fully
+    assert decide(0, 3, LIMIT, WINDOW, 300.0)[0] is False
+    # Two thirds through it, only a third of the previous window's 3 requests remain
+    assert decide(0, 3, LIMIT, WINDOW, 320.0) == (True, 0.0)
+    assert decide(2, 0, LIMIT, WINDOW, 310.0) == (True, 0.0)
+    assert decide(3, 0, LIMIT, WINDOW, 310.0)[0] is False
+
+
+@pytest.mark.parametrize('current,previous,offset', [(3, 0, 10.0), (1, 3, 5.0), (0, 3, 0.0), (2, 2, 12.5), (3, 3, 29.0)])
+def test_retry_after_is_when_the_next_request_fits(current, previous, offset):
+    """Brute force: denied just before retry_after, allowed at it (counts slid forward as the backends do)"""
+    now = 300.0 + offset
+    allowed, retry_after = decide(current, previous, LIMIT, WINDOW, now)
+    assert not allowed and retry_after > 0
+
+    def allowed_at(t):
+        counts = slide((10, current, previous), int(t // WINDOW))
+        return decide(*counts, LIMIT, WINDOW, t)[0]
+
+    assert allowed_at(now + retry_after + 1e-6)
+    assert not allowed_at(now + retry_after - 0.01)
+
+
+def limiter_backends(tmp_path):
+    return [LocalBackend(), SQLiteBackend(str(tmp_path / 'limits.db'))]
+
+
+def test_backends_agree_on_a_request_sequence(tmp_path):
+    times = [0.0, 1.0, 2.0, 3.0, 29.0, 31.0, 40.0, 50.0, 61.0, 95.0, 96.0, 97.0, 98.0]
+    results = []
+    for backend in limiter_backends(tmp_path):
+        limiter = RateLimiter(LIMIT, WINDOW, backend)
+        results.append([limiter.hit('10.0.0.1', now=1000 * WINDOW + t) for t in times])
+        backend.close()
+    assert results[0] == results[1]
+    # At 40 s two thirds of the first window's 3 requests still count, leaving room for one
+    assert [allowed for allowed, _ in results[0]] == [True, True, True, False, False, False, True, True,
+                                                       True, True, True, False, False]
+
+
+def test_local_backend_drops_the_least_recently_seen_client():
+    backend = LocalBackend(max_keys=2)
+    limiter = RateLimiter(1, WINDOW, backend)
+    assert limiter.hit('a', now=0.0)[0]
+    assert limiter.hit('b', now=0.0)[0]
+    assert not limiter.hit('a', now=1.0)[0]
+    assert limiter.hit('c', now=1.0)[0]  # Evicts b, seen before a
+
+    assert len(backend) == 2 and backend.evicted == 1
+    assert limiter.hit('b', now=2.0)[0]
+    assert not limiter.hit('c', now=2.0)[0]
+
+
+def test_open_backend_specs(tmp_path):
+    assert isinstance(open_backend('local'), LocalBackend)
+    assert isinstance(open_backend(f'sqlite://{tmp_path}/limits.db'), SQLiteBackend)
+    with pytest.raises(ValueError):
+        open_backend('memcached://localhost')
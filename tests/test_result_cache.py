@@ -0,0 +1,77 @@
+import threading
+
+import result_cache
+from result_cache import ResultCache, cache_key, normalize_start_url
+
+
+def test_start_urls_are_normalized():
+    assert normalize_start_url(' Example.COM/ ') == 'https://example.com/'
+    assert normalize_start_url('https://example.com:443/blog/') == 'https://example.com/blog'
+    assert normalize_start_url('http://example.com:8080') == 'http://example.com:8080/'
+    assert cache_key('example.com', {'b': 1, 'a': 2}) == cache_key('https://EXAMPLE.com/', {'a': 2, 'b': 1})
+    assert cache_key('example.com', {'max_urls': 10}) != cache_key('example.com', {'max_urls': 20})
+
+
+def test_identical_requests_are_coalesced():
+    cache = ResultCache(ttl=60, max_bytes=1000)
+    claimed = []
+    threads = [threading.Thread(target=lambda i=i: claimed.append(cache.claim('key', f'session-{i}')))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every request joins whichever claimed first, running or finished
+    assert len(set(claimed)) == 1
+    assert cache.holds(claimed[0]) and cache.snapshot() == {'entries': 1, 'running': 1, 'bytes': 0}
+    cache.finish('key', claimed[0], 10)
+    assert cache.claim('key', 'late') == claimed[0]
+    assert cache.snapshot() == {'entries': 1, 'running': 0, 'bytes': 10}
+
+
+def test_finish_and_discard_only_touch_their_own_session():
+    cache = ResultCache(ttl=60, max_bytes=1000)
+    cache.claim('key', 'first')
+    assert cache.finish('key', 'other', 10) == []
+    cache.discard('key', 'other')
+    assert cache.claim('key', 'second') == 'first'
+
+    cache.discard('key', 'first')
+    assert not cache.holds('first')
+    assert cache.claim('key', 'second') == 'second'
+
+
+def test_finished_results_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, 'time', lambda: now[0])
+    cache = ResultCache(ttl=60, max_bytes=1000)
+    cache.claim('key', 'first')
+    cache.finish('key', 'first', 10)
+
+    now[0] += 59
+    assert cache.holds('first') and cache.claim('key', 'second') == 'first'
+    now[0] += 2
+    assert not cache.holds('first')
+    assert cache.claim('key', 'second') == 'second'
+    assert cache.snapshot() == {'entries': 1, 'running': 1, 'bytes': 0}
+
+
+def test_least_recently_used_results_are_evicted_past_max_bytes():
+    cache = ResultCache(ttl=60, max_bytes=100)
+    for name in ('a', 'b', 'c'):
+        cache.claim(name, name)
+    cache.claim('running', 'running')
+    assert cache.finish('a', 'a', 40) == []
+    assert cache.finish('b', 'b', 40) == []
+    cache.claim('a', 'ignored')  # Reading a moves it to the most recently used end
+
+    # c needs room: b goes first, a stays, running crawls are never evicted
+    assert cache.finish('c', 'c', 40) == ['b']
+    assert not cache.holds('b') and cache.holds('a') and cache.holds('running')
+    assert cache.snapshot() == {'entries': 3, 'running': 1, 'bytes': 80}
+
+    # A result too large for the cache is not kept, but its own session is not reported
+    cache.claim('huge', 'huge')
+    assert cache.finish('huge', 'huge', 500) == ['c', 'a']
+    assert not cache.holds('huge') and cache.snapshot()['bytes'] == 0
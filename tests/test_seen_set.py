@@ -0,0 +1,43 @@
+import pytest
+
+from seen_set import BloomFilter, ExactSeenSet, ScalableBloomFilter, make_seen_set
+
+
+def test_make_seen_set_kinds():
+    assert isinstance(make_seen_set('exact'), ExactSeenSet)
+    assert not make_seen_set('exact').probabilistic
+    bloom = make_seen_set('bloom', 0.01)
+    assert bloom.probabilistic and bloom.error_rate == 0.01
+    with pytest.raises(ValueError):
+        make_seen_set('cuckoo')
+    with pytest.raises(ValueError):
+        make_seen_set('bloom', 1.5)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    urls = [f'https://example.com/page-{i}' for i in range(1000)]
+    for url in urls:
+        bloom.add(url)
+    assert all(url in bloom for url in urls)
+    assert len(bloom) == 1000
+
+
+def test_scalable_filter_grows_and_keeps_its_error_rate():
+    seen = ScalableBloomFilter(error_rate=0.01, initial_capacity=1000)
+    urls = [f'https://example.com/page-{i}' for i in range(10000)]
+    for url in urls:
+        seen.add(url)
+
+    assert len(seen.stages) > 1
+    assert all(url in seen for url in urls)
+    # error_rate bounds the expected rate; leave room for sampling noise
+    false_positives = sum(f'https://example.com/other-{i}' in seen for i in range(20000))
+    assert false_positives / 20000 < 0.015
+
+
+def test_scalable_filter_counts_repeats_once():
+    seen = ScalableBloomFilter(initial_capacity=100)
+    for _ in range(3):
+        seen.add('https://example.com/')
+    assert len(seen) == 1
@@ -0,0 +1,35 @@
+import xml.etree.ElementTree as ET
+
+from sitemap_generator import SitemapGenerator, host_runs, merge_sorted_runs
+
+NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+def test_merge_sorted_runs_merges_and_drops_repeats():
+    runs = [['https://a.com/1', 'https://a.com/3', 'https://c.com/'],
+            ['https://a.com/2', 'https://a.com/3'],
+            [],
+            iter(['https://b.com/', 'https://c.com/'])]
+    assert list(merge_sorted_runs(runs)) == ['https://a.com/1', 'https://a.com/2', 'https://a.com/3',
+                                             'https://b.com/', 'https://c.com/']
+
+
+def test_host_runs_merge_back_to_the_full_sort():
+    urls = [f'https://{host}.example.com/{i}' for i in range(50) for host in ('www', 'blog', 'docs')]
+    runs = host_runs(reversed(urls))
+    assert len(runs) == 3
+    assert all(run == sorted(run) for run in runs)
+    assert list(merge_sorted_runs(runs)) == sorted(urls)
+
+
+def test_generate_paths_write_the_same_sitemap(tmp_path):
+    urls = [f'https://{host}.example.com/{i}' for i in range(40) for host in ('www', 'blog')]
+    lastmod = {'https://www.example.com/7': '2024-01-01'}
+    generator = SitemapGenerator()
+    generator.generate(set(urls), lastmod, path=str(tmp_path / 'unsorted.xml'))
+    generator.generate_runs(host_runs(urls), lastmod, path=str(tmp_path / 'runs.xml'))
+
+    assert (tmp_path / 'unsorted.xml').read_bytes() == (tmp_path / 'runs.xml').read_bytes()
+    root = ET.parse(tmp_path / 'runs.xml').getroot()
+    assert [elem.findtext(f'{NS}loc') for elem in root.iter(f'{NS}url')] == sorted(urls)
+    assert root.find(f'{NS}url[{NS}loc="https://www.example.com/7"]/{NS}lastmod').text == '2024-01-01'
@@ -0,0 +1,66 @@
+import random
+
+from frontier import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, Frontier
+from spill_store import SpillingDict, SpillingFrontier, SpillingSeenSet
+
+
+def test_seen_set_spills_past_its_memory_limit():
+    seen = SpillingSeenSet(memory_limit=10)
+    urls = [f'https://example.com/{i:03d}' for i in range(50)]
+    shuffled = urls[:]
+    random.Random(1).shuffle(shuffled)
+    for url in shuffled + shuffled[:20]:
+        seen.add(url)
+
+    assert len(seen._memory) == 10
+    assert len(seen) == 50
+    assert all(url in seen for url in urls)
+    assert 'https://example.com/999' not in seen
+    assert sorted(seen) == urls
+    assert list(seen.iter_sorted()) == urls
+    seen.close()
+    assert len(seen) == 0
+
+
+def test_spilling_frontier_keeps_the_in_memory_order():
+    entries = [(f'https://example.com/{i}', random.Random(i).choice((PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW)))
+               for i in range(300)]
+    reference, spilling = Frontier(), SpillingFrontier(memory_limit=16)
+    for url, priority in entries:
+        reference.put(url, priority)
+        spilling.put(url, priority)
+    assert len(spilling) == 300 and spilling._spilled > 0
+
+    order = []
+    while (url := spilling.get(timeout=0)) is not None:
+        order.append(url)
+        spilling.task_done()
+    expected = []
+    while (url := reference.get(timeout=0)) is not None:
+        expected.append(url)
+        reference.task_done()
+
+    assert order == expected
+    assert spilling.is_drained()
+    spilling.close()
+
+
+def test_spilling_dict_behaves_like_a_dict():
+    mapping, reference = SpillingDict(memory_limit=10), {}
+    rng = random.Random(2)
+    for i in range(200):
+        key = f'https://example.com/{rng.randrange(60)}'
+        action = rng.random()
+        if action < 0.6:
+            mapping[key] = reference[key] = (f'source-{i}', i) if i % 2 else {'etag': str(i), 'last_modified': None}
+        elif action < 0.8:
+            assert mapping.pop(key, None) == reference.pop(key, None)
+        else:
+            assert mapping.setdefault(key, i) == reference.setdefault(key, i)
+    assert len(mapping._memory) <= 10 and mapping._spilled > 0
+    assert len(mapping) == len(reference)
+    assert sorted(mapping) == sorted(reference)
+    assert dict(mapping.items()) == reference
+    assert 'https://example.com/missing' not in mapping and mapping.get('https://example.com/missing') is None
+    mapping.close()
+    assert len(mapping) == 0
@@ -0,0 +1,105 @@
+import random
+
+import pytest
+from bs4 import BeautifulSoup
+
+from title_extractor import NO_TITLE, TitleExtractor, TitleMemo
+
+DOMAIN = 'example.com'
+
+
+def extract_title_bs4(html, domain=DOMAIN):
+    """EnhancedCrawler._extract_title as it was before the streaming extractor"""
+    try:
+        soup = BeautifulSoup(html, 'html.parser')
+        title = None
+        title_tag = soup.find('title')
+        if title_tag and title_tag.get_text().strip():
+            title = title_tag.get_text().strip()
+        if not title or len(title) < 3:
+            og_title = soup.find('meta', property='og:title')
+            if og_title and og_title.get('content'):
+                title = og_title.get('content').strip()
+        if not title or len(title) < 3:
+            twitter_title = soup.find('meta', attrs={'name': 'twitter:title'})
+            if twitter_title and twitter_title.get('content'):
+                title = twitter_title.get('content').strip()
+        if not title or len(title) < 3:
+            h1_tag = soup.find('h1')
+            if h1_tag and h1_tag.get_text().strip():
+                title = h1_tag.get_text().strip()
+        if title:
+            title = ' '.join(title.split())
+            for suffix in [' - ' + domain, ' | ' + domain, ' :: ' + domain]:
+                if title.endswith(suffix):
+                    title = title[:-len(suffix)]
+            if len(title) > 2 and title.lower() not in ['untitled', 'page', 'home']:
+                return title
+        return NO_TITLE
+    except Exception:
+        return NO_TITLE
+
+
+PAGES = [
+    '<html><head><title>Makale &amp; daha fazlası | example.com</title></head><body></body></html>',
+    '<html><head><title></title><meta property="og:title" content="OG başlık"></head></html>',
+    '<html><head><title>Hi</title><meta name="twitter:title" content="Twitter başlık"></head></html>',
+    '<html><head><title>Hi</title><meta property="og:title" content="OG"><meta name="twitter:title" content="Twitter"></head></html>',
+    '<html><head><title>  </title></head><body><header><h1>Başlık <span>1</span></h1></header></body></html>',
+    '<html><head><title>\n  Çok\n  satırlı   başlık\n</title></head></html>',
+    '<html><head><title>Home</title></head></html>',
+    '<html><head><title>Sayfa - example.com</title></head></html>',
+    '<html><body><h1></h1><h1>İkinci</h1></body></html>',
+    '<html><body><p>Başlıksız</p></body></html>',
+    '<title>Kapanmamış başlık',
+    '<html><head><script>var t = "<title>script</title>";</script><title>Gerçek başlık</title></head></html>',
+    '<html><head><title>Ab</title></head><body><h1>Uzun başlık</h1></body></html>',
+    '',
+    '<html><body><svg><title>SVG başlık</title></svg><h1>Gerçek</h1></body></html>',
+    '<h1>Kapanmamış h1 <b>kalın',
+    '<h1>Home<h1></h1><h1>İç içe h1',
+    '<html><head><meta property="og:title"><meta property="og:title" content="İkinci og"><title>x</title></head></html>',
+    '<html><head><meta property="og:title" name="twitter:title" content="Ortak"><title>x</title></head></html>',
+    '<title><h1>Başlıkta h1</title>sonrası</h1>',
+    '<h1>Önce <script>var a = "b";</script>sonra</h1>',
+]
+
+HEAD_PARTS = ['<title>', '</title>', '<meta property="og:title" content="OG başlık">', '<meta property="og:title" content="">',
+              '<meta name="twitter:title" content="Tw">', '<meta name="twitter:title" content="Twitter başlık">', 'Metin ',
+              'ab', '  ', '&amp;', '<script>x = "<title>s</title>"</script>', '<!-- <title>c</title> -->',
+              '| example.com', 'Home', '<link rel="icon" href="/i.png">', '<style>p {}</style>']
+BODY_PARTS = ['<title>', '</title>', '<h1>', '</h1>', 'Metin ', 'ab', '  ', '</head>', '<body>', '</body>', '<b>', '</b>',
+              '<p>', '</p>', '&amp;', '<script>x = "<title>s</title>"</script>', '<!-- <title>c</title> -->',
+              '| example.com', 'Home', '<br>', '<br/>', '<h1/>', '<div>', '</div>', '<svg>', '</svg>']
+
+
+@pytest.mark.parametrize('html', PAGES)
+def test_matches_the_beautifulsoup_rules(html):
+    assert TitleExtractor(DOMAIN, memo=None).extract(html) == extract_title_bs4(html)
+
+
+def test_matches_the_beautifulsoup_rules_on_random_markup():
+    rng = random.Random(5)
+    for _ in range(3000):
+        html = ('<html><head>' + ''.join(rng.choice(HEAD_PARTS) for _ in range(rng.randint(0, 6)))
+                + rng.choice(['</head><body>', '<body>', '</head>', ''])
+                + ''.join(rng.choice(BODY_PARTS) for _ in range(rng.randint(0, 10))))
+        assert TitleExtractor(DOMAIN, memo=None).extract(html) == extract_title_bs4(html), html
+
+
+def test_meta_titles_are_only_read_from_the_head():
+    # The one deliberate difference: <meta> belongs in the head, so the body is not scanned for it
+    html = '<html><head><title>Hi</title></head><body><h1>Başlık</h1><meta property="og:title" content="Gövdede"></body></html>'
+    assert extract_title_bs4(html) == 'Gövdede'
+    assert TitleExtractor(DOMAIN, memo=None).extract(html) == 'Başlık'
+
+
+def test_memo_is_keyed_by_content_and_domain():
+    memo = TitleMemo(maxsize=2)
+    html = '<title>Başlık | example.com</title>'
+    assert TitleExtractor(DOMAIN, memo=memo).extract(html) == 'Başlık'
+    # The suffix rule depends on the domain, so another domain gets its own entry
+    assert TitleExtractor('other.com', memo=memo).extract(html) == 'Başlık | example.com'
+    for i in range(3):
+        TitleExtractor(DOMAIN, memo=memo).extract(f'<title>Sayfa {i}</title>')
+    assert len(memo._entries) == 2
@@ -0,0 +1,195 @@
+# Lightweight page title extraction: streaming scan that stops early, plus a content-hash memo
+import hashlib
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+
+NO_TITLE = "Başlık bulunamadı"
+CHUNK_SIZE = 16384  # Characters fed to the tokenizer at a time
+# Elements BeautifulSoup's html.parser builder closes immediately
+VOID_TAGS = frozenset(('area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed', 'frame', 'hr', 'image',
+                       'img', 'input', 'isindex', 'keygen', 'link', 'menuitem', 'meta', 'nextid', 'param', 'source',
+                       'spacer', 'track', 'wbr'))
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _TitleParser(HTMLParser):
+    """Collects the first <title>, og:title, twitter:title and <h1> of a page.
+
+    These are the elements the BeautifulSoup version looked up, with their
+    text taken the way its tree builder nests elements. <title> and <h1> are
+    found anywhere; the two <meta> tags only in the head, where HTML allows
+    them, so pages with a short <title> stop at their first <h1> instead of
+    being scanned to the end. Parsing stops as soon as later markup can no
+    longer change the result, which for a page with a usable <title> is at
+    its end tag.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.og_title = None
+        self.twitter_title = None
+        self.h1 = None
+        self.in_body = False
+        self._stack = []  # Open elements, innermost last
+        self._open = {}  # 'title'/'h1' -> (stack depth, text parts) while the first one is open
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'meta' and not self.in_body:
+            attrs = dict(attrs)
+            if attrs.get('property') == 'og:title' and self.og_title is None:
+                self.og_title = (attrs.get('content') or '').strip()
+            if attrs.get('name') == 'twitter:title' and self.twitter_title is None:
+                self.twitter_title = (attrs.get('content') or '').strip()
+            self._check_done()
+        elif tag in ('body', 'h1'):
+            self._end_head()
+        if tag in VOID_TAGS:
+            return
+        if tag in ('title', 'h1') and getattr(self, tag) is None and tag not in self._open:
+            self._open[tag] = (len(self._stack), [])
+        self._stack.append(tag)
+
+    def handle_endtag(self, tag):
+        # Like the tree builder: an end tag closes its innermost open element and
+        # everything opened inside it; end tags of elements not open are ignored
+        if tag == 'head':
+            self._end_head()
+        if tag not in self._stack:
+            return
+        depth = len(self._stack) - 1 - self._stack[::-1].index(tag)
+        del self._stack[depth:]
+        closed = [name for name, (start, _parts) in self._open.items() if start >= depth]
+        for name in closed:
+            setattr(self, name, ''.join(self._open.pop(name)[1]).strip())
+        if closed:
+            self._check_done()
+
+    def handle_data(self, data):
+        # get_text() skips script and style contents
+        if self._open and self._stack[-1] not in ('script', 'style'):
+            for _depth, parts in self._open.values():
+                parts.append(data)
+
+    def _end_head(self):
+        if not self.in_body:
+            self.in_body = True
+            # Meta titles the head did not have will not come any more
+            if self.og_title is None:
+                self.og_title = ''
+            if self.twitter_title is None:
+                self.twitter_title = ''
+            self._check_done()
+
+    def finish(self):
+        """A <title> or <h1> the page never closes runs to the end of the input"""
+        for tag, (_depth, parts) in self._open.items():
+            setattr(self, tag, ''.join(parts).strip())
+        self._open = {}
+
+    def best_title(self):
+        """First candidate of at least 3 characters in <title>, og, twitter, <h1> order"""
+        for candidate in (self.title, self.og_title, self.twitter_title, self.h1):
+            if candidate and len(candidate) >= 3:
+                return candidate
+        return None
+
+    def _check_done(self):
+        # A candidate is final once seen, and each one is only used if every earlier one is too short
+        for candidate in (self.title, self.og_title, self.twitter_title, self.h1):
+            if candidate is None:
+                return
+            if len(candidate) >= 3:
+                raise _StopParsing
+        raise _StopParsing
+
+
+def scan_title(html):
+    """Return the raw title of a page, or None; same candidates and order as the BeautifulSoup version"""
+    parser = _TitleParser()
+    try:
+        for start in range(0, len(html), CHUNK_SIZE):
+            parser.feed(html[start:start + CHUNK_SIZE])
+        parser.close()
+        parser.finish()
+    except _StopParsing:
+        pass
+    except Exception:
+        # Malformed markup: use whatever was collected so far
+        parser.finish()
+    return parser.best_title()
+
+
+class TitleMemo:
+    """Thread-safe LRU of extracted titles keyed by content hash"""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(html, domain):
+        digest = hashlib.blake2b(html.encode('utf-8', 'surrogatepass'), digest_size=16)
+        digest.update(domain.encode('utf-8'))
+        return digest.digest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def put(self, key, title):
+        with self._lock:
+            self._entries[key] = title
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+# Shared by all crawlers: the same page is often fetched again by later jobs
+TITLE_MEMO = TitleMemo()
+
+
+class TitleExtractor:
+    """Title extraction with the rules of the original BeautifulSoup version (og/twitter titles from the head only)"""
+
+    def __init__(self, domain, stats=None, memo=TITLE_MEMO):
+        self.domain = domain
+        self.stats = stats
+        self.memo = memo
+        self.suffixes = [' - ' + domain, ' | ' + domain, ' :: ' + domain]
+
+    def extract(self, html):
+        key = self.memo.key(html, self.domain) if self.memo is not None else None
+        if key is not None:
+            cached = self.memo.get(key)
+            if self.stats:
+                self.stats.record_cache('title', cached is not None)
+            if cached is not None:
+                return cached
+
+        title = self._clean(scan_title(html))
+        if key is not None:
+            self.memo.put(key, title)
+        return title
+
+    def _clean(self, title):
+        if title:
+            # Remove extra whitespace and newlines
+            title = ' '.join(title.split())
+            # Remove common unwanted suffixes
+            for suffix in self.suffixes:
+                if title.endswith(suffix):
+                    title = title[:-len(suffix)]
+
+            # Return if meaningful title found
+            if len(title) > 2 and title.lower() not in ['untitled', 'page', 'home']:
+                return title
+        return NO_TITLE